@@ -1,6 +1,9 @@
 import asyncio
+import importlib
 import os
+import time
 from datetime import date, datetime, timedelta
+from functools import cached_property
 
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent, filter
@@ -14,17 +17,29 @@ from astrbot.core.star.context import Context
 
 from .src.analysis.calculator import LoveCalculator
 from .src.analysis.classifier import ArchetypeClassifier
-from .src.analysis.llm_analyzer import LLMAnalyzer
-from .src.handlers.history_fetcher import OneBotAdapter
+from .src.analysis.provider_pool import parse_provider_pool
+from .src.handlers.member_directory import MemberDirectory
 from .src.handlers.message_handler import MessageHandler
 from .src.handlers.notice_handler import NoticeHandler
+from .src.handlers.precompute_scheduler import PrecomputeScheduler
 from .src.persistence.database import DBManager
+from .src.persistence.hot_tier import DailyHotTier
 from .src.persistence.repo import LoveRepo
-from .src.visual.renderer import LoveRenderer
-from .src.visual.theme_manager import ThemeManager
+from .src.persistence.report_cache import ReportCache
+from .src.utils.blocking import BlockingExecutor, b64encode_file
+from .src.utils.loop_monitor import LoopLagMonitor
+from .src.utils.metrics import MetricsRegistry
+from .src.utils.pipeline import StagePipeline
+from .src.visual.output_tracker import RenderOutputTracker
+from .src.visual.render_scheduler import RenderQueueFull
+
+# 渲染 (aiohttp / Jinja2 / PyYAML / Pillow)、LLM 分析与历史拉取等重型子系统
+# 在首次使用时才导入和构造 (见下方 cached_property)，缩短 AstrBot 启动与插件重载耗时
 
 
 class LoveFormulaPlugin(Star):
+    WARMUP_DELAY = 5  # 启动后延迟多少秒在后台预热渲染子系统
+
     def __init__(self, context: Context, config: dict):
         super().__init__(context)
         self.config = config
@@ -59,24 +74,180 @@ class LoveFormulaPlugin(Star):
         if not os.path.exists(data_dir):
             os.makedirs(data_dir, exist_ok=True)
 
-        self.db_mgr = DBManager(db_path)
-        self.repo = LoveRepo(self.db_mgr)
+        self.db_mgr = DBManager(
+            db_path,
+            profile=self.config.get("db_profile", DBManager.DEFAULT_PROFILE),
+            read_connections=self.config.get(
+                "db_read_connections", DBManager.READ_CONNECTIONS
+            ),
+        )
+        self.repo = LoveRepo(
+            self.db_mgr,
+            DailyHotTier(
+                self.db_mgr,
+                interval=self.config.get(
+                    "daily_checkpoint_sec", DailyHotTier.CHECKPOINT_INTERVAL
+                ),
+            ),
+        )
 
         # 2. 初始化处理器和逻辑
 
         self.msg_handler = MessageHandler(self.repo)
         self.notice_handler = NoticeHandler(self.repo)
-        self.history_fetcher = OneBotAdapter(context, config)
-        self.theme_mgr = ThemeManager(os.path.dirname(os.path.abspath(__file__)))
-        self.renderer = LoveRenderer(context, self.theme_mgr)
-        self.llm = LLMAnalyzer(context, self.config)
+        # 群成员名录：群名片/昵称在后台按群刷新，请求路径上只查内存
+        self.members = MemberDirectory(
+            self._fetch_group_members,
+            refresh_interval=self.config.get("member_refresh_hours", 6) * 3600,
+        )
+        self.data_dir = data_dir
+        self.metrics = MetricsRegistry()
+        self.blocking = BlockingExecutor(
+            workers=self.config.get("blocking_workers", 4), metrics=self.metrics
+        )
+        self.loop_monitor = LoopLagMonitor(self.metrics)
+        self.render_outputs = RenderOutputTracker(
+            os.path.join(data_dir, "render_outputs.json"),
+            owned_dirs=(os.path.join(data_dir, "cards"),),
+            max_age=self.config.get("render_output_ttl_hours", 24) * 3600,
+            executor=self.blocking,
+        )
         self.calculator = LoveCalculator()
         self.classifier = ArchetypeClassifier()
+        self.report_cache = ReportCache(
+            tolerance=self.config.get("precompute_score_tolerance", 5)
+        )
+        self.precompute = PrecomputeScheduler(
+            self.repo, self.config, self._precompute_report
+        )
+        self._warmup_task: asyncio.Task | None = None
+
+    # ---------- 按需构造的重型子系统 ----------
+    def _loaded(self, name: str) -> bool:
+        """子系统是否已被构造 (cached_property 已写入实例字典)"""
+        return name in self.__dict__
+
+    async def _fetch_group_members(self, event: AstrMessageEvent) -> list[dict]:
+        # 名录刷新只需一次 API 调用，不为此构造 history_fetcher
+        from .src.handlers.history_fetcher import OneBotAdapter
+
+        return await OneBotAdapter.fetch_group_member_list(event)
+
+    @cached_property
+    def history_fetcher(self):
+        from .src.handlers.history_fetcher import OneBotAdapter
+
+        return OneBotAdapter(self.context, self.config, self.members)
+
+    @cached_property
+    def llm(self):
+        from .src.analysis.llm_analyzer import LLMAnalyzer
+
+        return LLMAnalyzer(self.context, self.config)
+
+    @cached_property
+    def http(self):
+        from .src.utils.http_client import SharedHttpClient
+
+        return SharedHttpClient(self.metrics)
+
+    @cached_property
+    def theme_mgr(self):
+        from .src.visual.theme_manager import ThemeManager
+
+        return ThemeManager(
+            os.path.dirname(os.path.abspath(__file__)),
+            bytecode_cache_dir=os.path.join(self.data_dir, "jinja_cache"),
+            hot_reload=self.config.get("theme_hot_reload", False),
+        )
+
+    @cached_property
+    def avatar_cache(self):
+        from .src.visual.avatar_cache import AvatarCache
+
+        return AvatarCache(
+            os.path.join(self.data_dir, "avatar_cache"),
+            ttl=self.config.get("avatar_cache_ttl_hours", 24) * 3600,
+            disk_limit=self.config.get("avatar_cache_disk_mb", 64) * 1024 * 1024,
+            executor=self.blocking,
+        )
+
+    @cached_property
+    def renderer(self):
+        from .src.visual.pil_renderer import PillowCardRenderer
+        from .src.visual.render_cache import RenderCache
+        from .src.visual.render_scheduler import RenderScheduler
+        from .src.visual.renderer import LoveRenderer
+
+        return LoveRenderer(
+            self.context,
+            self.theme_mgr,
+            self.avatar_cache,
+            self.http,
+            self.metrics,
+            RenderCache(
+                os.path.join(self.data_dir, "render_cache"),
+                max_bytes=self.config.get("render_cache_mb", 200) * 1024 * 1024,
+            ),
+            RenderScheduler(
+                workers=self.config.get("render_workers", 2),
+                max_queue=self.config.get("render_queue_size", 10),
+                timeout=self.config.get("render_timeout", 60),
+                metrics=self.metrics,
+            ),
+            max_bytes=self.config.get("render_max_kb", 2048) * 1024,
+            pillow=PillowCardRenderer(
+                os.path.join(self.data_dir, "cards"), self.theme_mgr.themes_dir
+            ),
+            pillow_fallback=self.config.get("render_fallback_pillow", True),
+            executor=self.blocking,
+            outputs=self.render_outputs,
+        )
 
     async def initialize(self):
         """AstrBot 调用的异步初始化方法"""
         await self.db_mgr.init_db()
+        # 载入今日计数到内存热层，并开始定期落盘
+        await self.repo.hot.start()
         logger.info("LoveFormula DB initialized.")
+        self.loop_monitor.start()
+        self.render_outputs.start()
+        if self.config.get("enable_precompute", False):
+            self.precompute.start()
+        # 渲染子系统的导入与主题预加载推迟到启动完成之后在后台进行
+        self._warmup_task = asyncio.create_task(self._warmup())
+
+    async def _warmup(self) -> None:
+        """后台预热渲染子系统：在线程池中导入重型模块，再预加载主题资源"""
+        await asyncio.sleep(self.WARMUP_DELAY)
+        try:
+            await self.blocking.run(
+                "warmup_import",
+                importlib.import_module,
+                f"{__package__}.src.visual.renderer",
+            )
+            theme_mgr = self.renderer.theme_manager
+            themes = await self.blocking.run("theme_preload", theme_mgr.preload)
+            logger.info(f"LoveFormula 主题资源已预加载: {themes}")
+        except Exception as e:
+            logger.warning(f"LoveFormula 渲染子系统预热失败: {e}")
+
+    async def terminate(self):
+        """插件卸载/重载时释放后台任务"""
+        if self._warmup_task:
+            self._warmup_task.cancel()
+        await self.precompute.stop()
+        await self.members.stop()
+        await self.loop_monitor.stop()
+        await self.render_outputs.stop()
+        if self._loaded("http"):
+            await self.http.close()
+        try:
+            await self.repo.hot.stop()
+        except Exception as e:
+            logger.warning(f"今日计数落盘失败: {e}")
+        await self.db_mgr.close()
+        self.blocking.shutdown()
 
     @filter.event_message_type(EventMessageType.GROUP_MESSAGE)
     async def on_group_message(self, event: AstrMessageEvent):
@@ -91,6 +262,9 @@ class LoveFormulaPlugin(Star):
         if not self._is_group_allowed(event.message_obj.group_id):
             return
 
+        self.precompute.remember_group(event)
+        self.members.observe(event)
+
         logger.debug(
             f"[LoveFormula] on_group_message 触发: {event.message_obj.message_id}"
         )
@@ -110,10 +284,8 @@ class LoveFormulaPlugin(Star):
                 if str(component.qq) == self_id:
                     continue
                 targeted_user_id = str(component.qq)
-                # 尝试获取 被 at 人的昵称，如果获取不到则使用默认
-                targeted_nickname = (
-                    getattr(component, "display", None) or f"用户{targeted_user_id}"
-                )
+                # 尝试获取 被 at 人的昵称，获取不到时由成员名录解析
+                targeted_nickname = getattr(component, "display", None)
                 break
 
         async for result in self._handle_love_profile(
@@ -131,6 +303,251 @@ class LoveFormulaPlugin(Star):
         async for result in self._handle_love_profile(event, user_id):
             yield result
 
+    @filter.command("恋爱法庭")
+    async def cmd_love_court(self, event: AstrMessageEvent):
+        """今日恋爱法庭：一次 LLM 调用批量审判群内活跃成员"""
+        group_id = event.message_obj.group_id
+        if not group_id:
+            yield event.plain_result("请在群聊中使用此功能。")
+            return
+
+        if not self._is_group_allowed(group_id):
+            yield event.plain_result("此群未启用恋爱分析功能。")
+            return
+
+        # 按群节流，避免反复触发整群批量分析
+        cooldown_sec = self.config.get("command_cooldown", 60)
+        if cooldown_sec > 0:
+            remaining = await self.repo.check_and_update_cooldown(
+                "__love_court__", str(group_id), cooldown_sec
+            )
+            if remaining > 0:
+                yield event.plain_result(
+                    f"☕ 法庭休庭中，请 {remaining} 秒后再来旁听。"
+                )
+                return
+
+        min_msg = self.config.get("min_msg_threshold", 3)
+        max_users = self.config.get("digest_max_users", 30)
+        today_refs = await self.repo.get_group_daily_refs(
+            str(group_id), date.today(), min_msg=min_msg, limit=max_users
+        )
+        if not today_refs:
+            yield event.plain_result("今日群内尚无足够发言，法庭暂不开庭。")
+            return
+
+        yield event.plain_result(
+            f"⚖️ 恋爱法庭开庭，正在批量审判 {len(today_refs)} 名被告..."
+        )
+
+        yesterday_refs = await self.repo.get_group_daily_refs(
+            str(group_id), date.today() - timedelta(days=1)
+        )
+        yesterday_scores = {
+            ref.user_id: self.calculator.calculate_scores(ref).get("score", 0)
+            for ref in yesterday_refs
+        }
+
+        entries = []
+        for ref in today_refs:
+            scores = self.calculator.calculate_scores(
+                ref, yesterday_score=yesterday_scores.get(ref.user_id, 0)
+            )
+            _, archetype_name = ArchetypeClassifier.classify(scores)
+            entries.append(
+                {
+                    "user_id": ref.user_id,
+                    "nickname": self.members.name(group_id, ref.user_id)
+                    or f"用户{ref.user_id}",
+                    "scores": scores,
+                    "archetype": archetype_name,
+                    "raw_data": ref.model_dump(),
+                }
+            )
+
+        comments = {}
+        if self.config.get("enable_llm_commentary", True):
+            comments = await self.llm.generate_batch_commentary(
+                entries, provider_id=self._provider_pool("commentary")
+            )
+
+        lines = [f"⚖️ 今日恋爱法庭 · {date.today().isoformat()}", ""]
+        entries.sort(key=lambda e: e["scores"]["score"], reverse=True)
+        for rank, entry in enumerate(entries, start=1):
+            comment = comments.get(entry["user_id"], {}).get("comment", "")
+            lines.append(
+                f"{rank}. {entry['nickname']} 【{entry['archetype']}】 "
+                f"好感度 {entry['scores']['score']}%"
+            )
+            if comment:
+                lines.append(f"   {comment}")
+        yield event.plain_result("\n".join(lines))
+
+    @filter.command("恋爱统计")
+    async def cmd_love_stats(self, event: AstrMessageEvent):
+        """查看插件运行状态 (LLM Provider 健康度等)"""
+        lines = ["📊 恋爱公式运行状态", "", "【LLM Provider 健康度】"]
+        # LLM 分析器尚未被使用时不为统计而构造它
+        providers = self.llm.balancer.snapshot() if self._loaded("llm") else []
+        if not providers:
+            lines.append("暂无调用记录")
+        for p in providers:
+            latency = f"{p['latency_ms']}ms" if p["latency_ms"] is not None else "-"
+            state = p["state"]
+            if state == "open":
+                state += f" ({p['reopen_in']}s 后重试)"
+            lines.append(
+                f"- {p['provider_id']}: {state} | 延迟 {latency} | "
+                f"错误率 {p['error_rate']:.0%} | 调用 {p['calls']} 次 (失败 {p['failures']})"
+            )
+
+        cache = self.report_cache
+        total = cache.hits + cache.misses
+        hit_rate = f"{cache.hits / total:.0%}" if total else "-"
+        lines += [
+            "",
+            "【缓存】",
+            f"- 缓存卡片 {len(cache)} 张 | 命中 {cache.hits} / 未命中 {cache.misses}"
+            f" (命中率 {hit_rate})",
+        ]
+        hot = self.repo.hot.snapshot()
+        lines.append(
+            f"- 今日计数热层: {hot['rows']} 行 | 待落盘 {hot['dirty']} 行"
+            f" | 已落盘 {hot['checkpoints']} 次 / {hot['rows_written']} 行"
+        )
+        mb = self.members.snapshot()
+        lines.append(
+            f"- 群成员名录: {mb['groups']} 群 / {mb['members']} 人 | "
+            f"刷新 {mb['refreshes']} 次 (失败 {mb['failures']}) | "
+            f"命中率 {mb['hit_rate']:.0%}"
+        )
+        # 按需构造的子系统未加载时不为统计而构造
+        av = None
+        if self._loaded("avatar_cache"):
+            av = self.avatar_cache.snapshot()
+            lines.append(
+                f"- 头像缓存: 命中率 {av['hit_rate']:.0%} (内存 {av['memory_hits']} / "
+                f"磁盘 {av['disk_hits']} / 304 {av['revalidated']})"
+                f" | 下载 {av['downloads']} | 合并 {av['coalesced']}"
+                f" | 节省 {av['bytes_saved'] / 1024:.0f} KB"
+            )
+        else:
+            lines.append("- 头像缓存: 未加载")
+
+        if self._loaded("http"):
+            http = self.http.snapshot()
+            lines.append(
+                f"- HTTP 连接池: 请求 {http['requests']}"
+                f" | 新建连接 {http['new_connections']}"
+                f" | 复用 {http['reused_connections']}"
+                f" (复用率 {http['reuse_rate']:.0%})"
+            )
+        else:
+            lines.append("- HTTP 连接池: 未加载")
+        for name, st in self.metrics.snapshot("http.").items():
+            lines.append(
+                f"  · {name.removeprefix('http.')}: 平均 {st['avg']:.0f}ms"
+                f" | p95 {st['p95']:.0f}ms"
+            )
+
+        if self.config.get("enable_precompute", False):
+            st = self.precompute.stats
+            last_run = (
+                time.strftime("%m-%d %H:%M", time.localtime(st["last_run"]))
+                if st["last_run"]
+                else "尚未运行"
+            )
+            window = self.precompute.window()
+            window = (
+                f"{window[0].strftime('%H:%M')}-{window[1].strftime('%H:%M')}"
+                if window
+                else "无效"
+            )
+            lines.append(
+                f"- 离峰预计算: 窗口 {window} | 上次 {last_run} | "
+                f"候选 {st['candidates']} | "
+                f"生成 {st['generated']} | 跳过 {st['skipped']} | 失败 {st['failed']}"
+            )
+
+        rc = None
+        if self._loaded("renderer"):
+            rc = self.renderer.render_cache.snapshot()
+            lines.append(
+                f"- 渲染结果缓存: {rc['entries']} 张 / "
+                f"{rc['bytes'] / 1024 / 1024:.1f} MB | 命中 {rc['hits']} / "
+                f"未命中 {rc['misses']} (命中率 {rc['hit_rate']:.0%})"
+                f" | 淘汰 {rc['evictions']}"
+            )
+        else:
+            lines.append("- 渲染结果缓存: 未加载")
+
+        def _mb(snapshot: dict | None, key: str) -> str:
+            return f"{snapshot[key] / 1024**2:.1f} MB" if snapshot else "未加载"
+
+        outputs = await self.blocking.run("outputs", self.render_outputs.snapshot)
+        disk_bytes = outputs["tracked_bytes"]
+        disk_bytes += (rc["bytes"] if rc else 0) + (av["disk_bytes"] if av else 0)
+        lines.append(
+            f"- 磁盘占用: 共 {disk_bytes / 1024**2:.1f} MB"
+            f" (渲染缓存 {_mb(rc, 'bytes')} | 头像 {_mb(av, 'disk_bytes')}"
+            f" | 待发送卡片 {outputs['tracked']} 张 {outputs['tracked_bytes'] / 1024**2:.1f} MB)"
+            f" | 已清理 {outputs['released'] + outputs['swept']} 张"
+            f" / {outputs['bytes_freed'] / 1024**2:.1f} MB"
+        )
+
+        lag = self.metrics.snapshot("loop.lag").get("loop.lag")
+        if lag:
+            lines += [
+                "",
+                "【事件循环】",
+                f"- 循环延迟: 平均 {lag['avg']:.1f}ms | p95 {lag['p95']:.1f}ms"
+                f" | 历史最大 {self.loop_monitor.max_lag_ms:.0f}ms",
+            ]
+            for name, st in self.metrics.snapshot("blocking.").items():
+                lines.append(
+                    f"- 线程池 {name.removeprefix('blocking.')}: 平均 {st['avg']:.1f}ms"
+                    f" | p95 {st['p95']:.1f}ms | 共 {st['count']} 次"
+                )
+
+        render_stats = self.metrics.snapshot("render.")
+        if render_stats:
+            lines += ["", "【渲染耗时 (ms, 最近样本)】"]
+            for name, st in render_stats.items():
+                lines.append(
+                    f"- {name.removeprefix('render.')}: 平均 {st['avg']:.1f}"
+                    f" | p95 {st['p95']:.1f} | 共 {st['count']} 次"
+                )
+
+        if self._loaded("renderer"):
+            if self.renderer.strategy_stats:
+                sizes = self.metrics.snapshot("render_size.")
+                lines += ["", "【截图策略】"]
+                for name, c in self.renderer.strategy_stats.items():
+                    size = sizes.get(f"render_size.{name}")
+                    avg_kb = f"{size['avg']:.0f} KB" if size else "-"
+                    lines.append(
+                        f"- {name}: 成功 {c['ok']} | 失败 {c['failed']} | "
+                        f"超出体积预算 {c['over_budget']} | 平均体积 {avg_kb}"
+                    )
+            if self.renderer.fallback_count:
+                lines.append(f"- Pillow 兜底渲染: {self.renderer.fallback_count} 次")
+
+        stage_stats = self.metrics.snapshot("stage.")
+        if stage_stats:
+            profile_total = self.metrics.snapshot("profile.total").get("profile.total")
+            lines += ["", "【今日人设阶段耗时 (ms, 最近样本)】"]
+            if profile_total:
+                lines.append(
+                    f"- 总计: 平均 {profile_total['avg']:.0f} | p95 {profile_total['p95']:.0f}"
+                    f" | 共 {profile_total['count']} 次"
+                )
+            for name, st in stage_stats.items():
+                lines.append(
+                    f"- {name.removeprefix('stage.')}: 平均 {st['avg']:.0f}"
+                    f" | p95 {st['p95']:.0f}"
+                )
+        yield event.plain_result("\n".join(lines))
+
     async def _handle_love_profile(
         self,
         event: AstrMessageEvent,
@@ -167,91 +584,257 @@ class LoveFormulaPlugin(Star):
         user_id = target_user_id if target_user_id else sender_id
         nickname = (
             target_nickname
-            if target_nickname
-            else (
-                event.message_obj.sender.nickname
-                if user_id == sender_id
-                else f"用户{user_id}"
-            )
+            or self.members.name(group_id, user_id)
+            or (event.message_obj.sender.nickname if user_id == sender_id else None)
+            or f"用户{user_id}"
         )
 
         # Disable default LLM reply for this command.
         event.should_call_llm(True)
 
-        # 1. 获取数据回溯
-        # --- 深度冷启动回填与荣誉同步 ---
-        today_data = await self.repo.get_today_data(group_id, user_id)
-        if not today_data or today_data.msg_sent < 3:
-            # 数据显著不足，启动深度同步
+        # 1. 以依赖图组织各阶段：互不依赖的阶段 (头像预取、昨日数据、群荣誉、
+        #    上下文拉取等) 同时启动，依赖方在前置阶段完成后自动接续
+        pipe = StagePipeline("profile", self.metrics)
+        try:
+            async for result in self._run_profile_pipeline(
+                pipe, event, str(group_id), user_id, sender_id, nickname
+            ):
+                yield result
+        finally:
+            total = await pipe.close()
+            logger.info(
+                f"[LoveFormula] 今日人设 {group_id}/{user_id} 总耗时 {total:.0f}ms: "
+                f"{pipe.format_timings()}"
+            )
+
+    async def _run_profile_pipeline(
+        self,
+        pipe: StagePipeline,
+        event: AstrMessageEvent,
+        group_id: str,
+        user_id: str,
+        sender_id: str,
+        nickname: str,
+    ):
+        min_msg = self.config.get("min_msg_threshold", 3)
+        llm_enabled = self.config.get("enable_llm_commentary", True)
+        history_enabled = llm_enabled and self.config.get(
+            "enable_history_analysis", True
+        )
+
+        async def _record_request():
+            # 记录请求历史，供离峰预计算预测次日的高频请求者与请求高峰时段
+            await self.repo.record_report_request(group_id, user_id, nickname)
+            self.precompute.observe_request()
+
+        async def _days():
+            # 今日与昨日数据一次取回 (均在内存热层中时不访问数据库)
+            return await self.repo.get_today_and_yesterday(group_id, user_id)
+
+        def _is_cold(today_data) -> bool:
+            # 数据显著不足时才需要深度冷启动同步
+            return not today_data or today_data.msg_sent < 3
+
+        async def _honor(days):
+            # 同步群荣誉 (龙王、快乐源泉等)，返回被更新的今日行
+            if not _is_cold(days[0]):
+                return {}
             try:
-                # 1. 同步群荣誉 (龙王、快乐源泉等)
                 honor_data = await self.history_fetcher.fetch_group_honor(event)
-                honor_count = 0
-                if honor_data:
-                    honor_count = await self.repo.apply_honor_bonus(
-                        str(group_id), honor_data
-                    )
-                    logger.info(f"已同步群 {group_id} 的 {honor_count} 条荣誉数据。")
+                if not honor_data:
+                    return {}
+                honored = await self.repo.apply_honor_bonus(group_id, honor_data)
+                logger.info(f"已同步群 {group_id} 的 {len(honored)} 位成员的荣誉数据。")
+                return honored
+            except Exception as e:
+                logger.warning(f"群荣誉同步失败: {e}")
+                return {}
 
-                # 2. 回填历史消息
-                raw_history = await self.history_fetcher.fetch_raw_group_history(
+        async def _history(days):
+            if not _is_cold(days[0]):
+                return None
+            try:
+                return await self.history_fetcher.fetch_raw_group_history(
                     event, count=self.config.get("analyze_history_count", 100)
                 )
-                if raw_history:
-                    stats = await self.msg_handler.backfill_from_history(
-                        str(group_id), raw_history
-                    )
-                    logger.info(
-                        f"[LoveFormula] 成功为群 {group_id} 执行了增强型历史回填: {stats}, 同步荣誉: {honor_count}"
-                    )
+            except Exception as e:
+                logger.warning(f"历史消息拉取失败: {e}")
+                return None
 
+        async def _backfill(raw_history):
+            # 回填历史消息，返回被更新的今日行
+            if not raw_history:
+                return {}
+            try:
+                stats, backfilled = await self.msg_handler.backfill_from_history(
+                    group_id, raw_history
+                )
+                logger.info(
+                    f"[LoveFormula] 成功为群 {group_id} 执行了增强型历史回填: {stats}"
+                )
+                return backfilled
             except Exception as e:
                 logger.warning(f"深度冷启动同步失败: {e}")
-        # ---------------------
-
-        # 尝试获取昨日得分作为白月光值
-        yesterday = date.today() - timedelta(days=1)
-        yesterday_data = await self.repo.get_data_by_date(group_id, user_id, yesterday)
-        yesterday_score = 0
-        if yesterday_data:
-            y_scores = self.calculator.calculate_scores(yesterday_data)
-            yesterday_score = y_scores.get("score", 0)
-            logger.debug(f"Yesterday score for {user_id}: {yesterday_score}")
-
-        daily_data = await self.repo.get_today_data(group_id, user_id)
-
-        # 检查配置中的阈值
-        min_msg = self.config.get("min_msg_threshold", 3)
-        if not daily_data or daily_data.msg_sent < min_msg:
+                return {}
+
+        async def _yesterday_score(days):
+            # 昨日得分作为白月光值 (回填只写入今日数据，与之无关)
+            yesterday_data = days[1]
+            if not yesterday_data:
+                return 0
+            y_score = self.calculator.calculate_scores(yesterday_data).get("score", 0)
+            logger.debug(f"Yesterday score for {user_id}: {y_score}")
+            return y_score
+
+        async def _today1(days, honored, backfilled):
+            # 热层中的今日行在原对象上累加，荣誉与回填阶段直接返回更新后的行，
+            # 无需再次读取；两者都没有写入时沿用阶段开始时取回的今日数据
+            return backfilled.get(user_id) or honored.get(user_id) or days[0]
+
+        async def _score(daily_data, yesterday_score):
+            # 2. 计算分数 + 3. 归类人设
+            if not daily_data or daily_data.msg_sent < min_msg:
+                return None
+            scores = self.calculator.calculate_scores(
+                daily_data, yesterday_score=yesterday_score
+            )
+            archetype_key, archetype_name = ArchetypeClassifier.classify(scores)
+            return daily_data, scores, archetype_key, archetype_name
+
+        async def _avatar():
+            return await self.renderer.fetch_avatar(user_id)
+
+        async def _context():
+            return await self.history_fetcher.fetch_context(event, user_id)
+
+        pipe.add("record", _record_request)
+        pipe.add("days", _days)
+        pipe.add("yesterday", _yesterday_score, deps=("days",))
+        pipe.add("avatar", _avatar)
+        if history_enabled:
+            pipe.add("context", _context)
+        pipe.add("honor", _honor, deps=("days",))
+        pipe.add("history", _history, deps=("days",))
+        pipe.add("backfill", _backfill, deps=("history",))
+        pipe.add("today1", _today1, deps=("days", "honor", "backfill"))
+        pipe.add("score", _score, deps=("today1", "yesterday"))
+
+        scored = await pipe.result("score")
+        if scored is None:
             prefix = "你" if user_id == sender_id else f"{nickname}"
             yield event.plain_result(
                 f"{prefix}今天太沉默了（发言少于{min_msg}条），甚至无法测算出恋爱成分。"
             )
             return
+        daily_data, scores, archetype_key, archetype_name = scored
 
-        # 2. 计算分数
-        scores = self.calculator.calculate_scores(
-            daily_data, yesterday_score=yesterday_score
+        # 命中结果缓存 (含离峰预计算) 且数据无实质变化时，直接返回已生成的卡片
+        cached = self.report_cache.get(
+            group_id, user_id, nickname, scores, archetype_key
         )
+        if cached:
+            logger.info(f"[LoveFormula] 命中今日人设结果缓存: {group_id}/{user_id}")
+            async for result in self._send_report_image(event, cached.image_path):
+                yield result
+            return
 
-        # 3. 归类人设
-        archetype_key, archetype_name = ArchetypeClassifier.classify(scores)
+        raw_data_dict = daily_data.model_dump()
+
+        async def _llm():
+            context_fetcher = None
+            if history_enabled:
 
+                def context_fetcher():
+                    return pipe.result("context")
+
+            return await self._run_llm_analysis(
+                scores, archetype_name, raw_data_dict, context_fetcher
+            )
+
+        async def _render(llm_output, avatar_url):
+            llm_result, deep_dive_result = llm_output
+            return await self._render_report(
+                group_id,
+                user_id,
+                nickname,
+                scores,
+                archetype_key,
+                archetype_name,
+                raw_data_dict,
+                llm_result,
+                deep_dive_result,
+                avatar_url=avatar_url,
+            )
+
+        pipe.add("llm", _llm)
+        pipe.add("render", _render, deps=("llm", "avatar"))
+
+        try:
+            await pipe.result("llm")
+            position = self.renderer.queue_position(self.config.get("theme", "galgame"))
+            if position > 0:
+                yield event.plain_result(
+                    f"🖨️ 渲染排队中，前面还有 {position} 张卡片，请稍候..."
+                )
+            image_path = await pipe.result("render")
+        except RenderQueueFull:
+            yield event.plain_result("🚦 当前生成请求过多，渲染队列已满，请稍后再试。")
+            return
+        except Exception as e:
+            logger.error(f"Render failed: {e}", exc_info=True)
+            yield event.plain_result(f"生成失败: {e}")
+            return
+
+        async for result in self._send_report_image(event, image_path):
+            yield result
+
+    @staticmethod
+    def _avatar_url(user_id: str) -> str:
+        return f"https://q1.qlogo.cn/g?b=qq&nk={user_id}&s=640"
+
+    async def _generate_report(
+        self,
+        group_id: str,
+        user_id: str,
+        nickname: str,
+        scores: dict,
+        archetype_key: str,
+        archetype_name: str,
+        raw_data_dict: dict,
+        context_fetcher=None,
+    ) -> str:
+        """LLM 分析 + 渲染，返回卡片图片路径并写入结果缓存 (供离峰预计算使用)"""
+        llm_result, deep_dive_result = await self._run_llm_analysis(
+            scores, archetype_name, raw_data_dict, context_fetcher
+        )
+        return await self._render_report(
+            group_id,
+            user_id,
+            nickname,
+            scores,
+            archetype_key,
+            archetype_name,
+            raw_data_dict,
+            llm_result,
+            deep_dive_result,
+        )
+
+    async def _run_llm_analysis(
+        self,
+        scores: dict,
+        archetype_name: str,
+        raw_data_dict: dict,
+        context_fetcher=None,
+    ) -> tuple[dict, dict | None]:
+        """并发生成毒舌点评与深度侧写，返回 (点评结果, 深度侧写结果)"""
         # 4. LLM 分析 (获取判词和诊断) - Data Driven
         llm_result = {"comment": "获取失败", "diagnostics": []}
         deep_dive_result = None
 
-        raw_data_dict = daily_data.model_dump()
-
         if self.config.get("enable_llm_commentary", True):
-            # 获取对应的 Provider ID
-            global_provider = self.config.get("llm_provider_id", "")
-            commentary_provider = (
-                self.config.get("commentary_provider_id", "") or global_provider
-            )
-            deep_dive_provider = (
-                self.config.get("deep_dive_provider_id", "") or global_provider
-            )
+            # 获取对应的 Provider 池
+            commentary_provider = self._provider_pool("commentary")
+            deep_dive_provider = self._provider_pool("deep_dive")
 
             async def _commentary_task():
                 return await self.llm.generate_commentary(
@@ -262,7 +845,7 @@ class LoveFormulaPlugin(Star):
                 )
 
             async def _deep_dive_task():
-                chat_context = await self.history_fetcher.fetch_context(event, user_id)
+                chat_context = await context_fetcher()
                 if not chat_context:
                     return None
                 return await self.llm.generate_deep_dive(
@@ -275,7 +858,7 @@ class LoveFormulaPlugin(Star):
 
             tasks = [asyncio.create_task(_commentary_task())]
 
-            if self.config.get("enable_history_analysis", True):
+            if context_fetcher and self.config.get("enable_history_analysis", True):
                 tasks.append(asyncio.create_task(_deep_dive_task()))
 
             try:
@@ -298,6 +881,22 @@ class LoveFormulaPlugin(Star):
         else:
             llm_result["comment"] = "LLM点评已关闭。"
 
+        return llm_result, deep_dive_result
+
+    async def _render_report(
+        self,
+        group_id: str,
+        user_id: str,
+        nickname: str,
+        scores: dict,
+        archetype_key: str,
+        archetype_name: str,
+        raw_data_dict: dict,
+        llm_result: dict,
+        deep_dive_result: dict | None,
+        avatar_url: str | None = None,
+    ) -> str:
+        """组装渲染数据并渲染卡片，返回图片路径并写入结果缓存"""
         # 5. 组装诊断叙事 (如果 LLM 没给，就用内置逻辑 fallback)
         if not llm_result.get("diagnostics"):
             logic_insights = self._generate_diagnostic_insights(
@@ -309,7 +908,8 @@ class LoveFormulaPlugin(Star):
         # 6. 构造渲染数据
         # Template expects: avatar_url, user_name, title, score, metrics, logic_insights, comment, generated_time
         user_name = nickname if nickname else f"用户{user_id}"
-        avatar_url = f"https://q1.qlogo.cn/g?b=qq&nk={user_id}&s=640"
+        # 预取失败或未预取时交给渲染器现场下载
+        avatar_url = avatar_url or self._avatar_url(user_id)
 
         render_data = {
             "user_name": user_name,
@@ -336,25 +936,78 @@ class LoveFormulaPlugin(Star):
 
         # 7. 渲染图片
         theme = self.config.get("theme", "galgame")
-        try:
-            image_path = await self.renderer.render(render_data, theme_name=theme)
-            logger.info(f"图片渲染成功: {image_path}")
+        image_path = await self.renderer.render(render_data, theme_name=theme)
+        logger.info(f"图片渲染成功: {image_path}")
+
+        self.report_cache.put(
+            group_id, user_id, nickname, scores, archetype_key, image_path
+        )
+        return image_path
 
+    async def _send_report_image(self, event: AstrMessageEvent, image_path: str):
+        """发送卡片图片，本地路径失败时回退到 Base64；发送完成后清理临时产物"""
+        try:
+            # 1. 优先尝试本地路径直接发送 (性能更好，减少内存占用)
+            yield event.chain_result([Image.fromFileSystem(image_path)])
+        except Exception as path_err:
+            logger.warning(f"路径发送失败，尝试 Base64 回退: {path_err}")
             try:
-                # 1. 优先尝试本地路径直接发送 (性能更好，减少内存占用)
-                yield event.chain_result([Image.fromFileSystem(image_path)])
-            except Exception as path_err:
-                logger.warning(f"路径发送失败，尝试 Base64 回退: {path_err}")
                 # 2. 回退到 Base64 方式 (规避部分平台富媒体传输失败问题)
-                import base64
-
-                with open(image_path, "rb") as f:
-                    b64_str = base64.b64encode(f.read()).decode()
+                # 在线程池中分块读取编码，大图也不会阻塞事件循环
+                b64_str = await self.blocking.run(
+                    "b64_encode", b64encode_file, image_path
+                )
 
                 yield event.chain_result([Image.fromBase64(b64_str)])
-        except Exception as e:
-            logger.error(f"Render failed: {e}", exc_info=True)
-            yield event.plain_result(f"生成失败: {e}")
+            except Exception as e:
+                logger.error(f"Render failed: {e}", exc_info=True)
+                yield event.plain_result(f"生成失败: {e}")
+
+        # 框架在生成器恢复前已完成发送；结果缓存中的卡片不会被删除
+        await self.renderer.release(image_path)
+
+    async def _precompute_report(
+        self, group_id: str, user_id: str, nickname: str, group_ref
+    ) -> bool:
+        """离峰预计算单个用户的今日人设卡片。返回是否实际生成了新卡片"""
+        daily_data, yesterday_data = await self.repo.get_today_and_yesterday(
+            group_id, user_id
+        )
+        min_msg = self.config.get("min_msg_threshold", 3)
+        if not daily_data or daily_data.msg_sent < min_msg:
+            return False
+
+        yesterday_score = 0
+        if yesterday_data:
+            yesterday_score = self.calculator.calculate_scores(yesterday_data).get(
+                "score", 0
+            )
+
+        scores = self.calculator.calculate_scores(
+            daily_data, yesterday_score=yesterday_score
+        )
+        archetype_key, archetype_name = ArchetypeClassifier.classify(scores)
+        nickname = nickname or self.members.name(group_id, user_id) or f"用户{user_id}"
+        if self.report_cache.get(group_id, user_id, nickname, scores, archetype_key):
+            return False
+
+        context_fetcher = None
+        if group_ref is not None:
+
+            def context_fetcher():
+                return self.history_fetcher.fetch_context(group_ref, user_id)
+
+        await self._generate_report(
+            group_id,
+            user_id,
+            nickname,
+            scores,
+            archetype_key,
+            archetype_name,
+            daily_data.model_dump(),
+            context_fetcher=context_fetcher,
+        )
+        return True
 
     @filter.platform_adapter_type(filter.PlatformAdapterType.AIOCQHTTP)
     @filter.command("学习")
@@ -401,7 +1054,7 @@ class LoveFormulaPlugin(Star):
                 logger.info("[LoveFormula] 超过最大消息获取数量,退出历史消息获取")
                 break
         if message_list:
-            stats = await self.msg_handler.backfill_from_history(
+            stats, _ = await self.msg_handler.backfill_from_history(
                 str(group_id), message_list
             )
             logger.info(
@@ -503,6 +1156,17 @@ class LoveFormulaPlugin(Star):
         }
         return reasons.get(key, "数据分布符合该人设的特征判定区间。")
 
+    def _provider_pool(self, kind: str) -> list[str]:
+        """
+        某功能 (commentary / deep_dive) 的 Provider 池：
+        {kind}_provider_pool 非空时优先，其次为单选的 {kind}_provider_id，最后回退到全局默认
+        """
+        return parse_provider_pool(
+            self.config.get(f"{kind}_provider_pool")
+            or self.config.get(f"{kind}_provider_id", ""),
+            fallback=self.config.get("llm_provider_id", ""),
+        )
+
     def _is_group_allowed(self, group_id: int | str | None) -> bool:
         """检查群组是否在黑白名单允许范围内"""
         if not group_id:
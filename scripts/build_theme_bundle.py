@@ -0,0 +1,201 @@
+"""
+主题离线字体包构建脚本。
+
+将模板用到的中文字体按实际需要的字形做子集化 (模板文本 + 插件内置文案 +
+GB2312 一级常用字)，编码为 WOFF2 后以 base64 @font-face 内联到
+assets/themes/<theme>/fonts.css。模板通过 Jinja include 引入该文件，
+渲染时无需访问 Google Fonts / jsdelivr，结果稳定且不受网络影响。
+
+--pillow 同时把第一个字体的第一个字重子集化为普通 OpenType 文件
+(assets/fonts/NotoSansSC-Subset.otf)，供 Pillow 渲染器在系统缺少中文字体时使用。
+
+仅构建时需要 fontTools (以及 WOFF2 所需的 brotli)，插件运行时不依赖它们:
+    pip install fonttools brotli
+
+用法 (在插件根目录执行):
+    python scripts/build_theme_bundle.py \\
+        --font "ZCOOL KuaiLe=fonts/ZCOOLKuaiLe-Regular.ttf" \\
+        --font "Noto Sans SC:400,700=fonts/NotoSansSC[wght].ttf"
+
+仓库中提交的字体包由 Noto Sans CJK SC Regular (SIL OFL 1.1，见 assets/fonts/OFL.txt)
+构建:
+    python scripts/build_theme_bundle.py --pillow \\
+        --font "Noto Sans SC=NotoSansCJKsc-Regular.otf"
+
+字体规格格式为 "家族名[:字重列表]=字体文件"。可变字体会按字重实例化。
+"""
+
+import argparse
+import base64
+import io
+import os
+import re
+import sys
+
+PLUGIN_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 额外保留的 ASCII 与常用全角标点
+BASE_CHARS = (
+    "".join(chr(c) for c in range(0x20, 0x7F))
+    + "，。！？、；：“”‘’（）《》【】「」『』…—～·％＃＠＆＊＋－＝／"
+    + "♥♡❤★☆→←↑↓⇒∫⋅βλ•"
+)
+
+# 插件源码中可能出现在卡片上的文案 (人设名称、诊断叙事、指标标签等)
+SOURCE_GLOBS = ("main.py", "src")
+
+# Pillow 渲染器使用的字体子集 (与 src/visual/pil_renderer.py 中的 BUNDLED_FONT 一致)
+PILLOW_FONT = os.path.join(PLUGIN_ROOT, "assets", "fonts", "NotoSansSC-Subset.otf")
+
+
+def gb2312_level1() -> str:
+    """GB2312 一级汉字 (3755 个最常用汉字)"""
+    chars = []
+    for hi in range(0xB0, 0xD8):
+        for lo in range(0xA1, 0xFF):
+            try:
+                chars.append(bytes([hi, lo]).decode("gb2312"))
+            except UnicodeDecodeError:
+                continue
+    return "".join(chars)
+
+
+def collect_source_chars(theme_dir: str) -> str:
+    """收集模板与插件源码中出现的全部非 ASCII 字符"""
+    seen = set()
+    paths = [os.path.join(theme_dir, "template.html")]
+    for entry in SOURCE_GLOBS:
+        full = os.path.join(PLUGIN_ROOT, entry)
+        if os.path.isfile(full):
+            paths.append(full)
+            continue
+        for root, _, files in os.walk(full):
+            paths.extend(os.path.join(root, f) for f in files if f.endswith(".py"))
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            seen.update(ch for ch in f.read() if ord(ch) > 0x7F)
+    return "".join(sorted(seen))
+
+
+def parse_font_spec(spec: str) -> tuple[str, list[int], str]:
+    match = re.fullmatch(r"\s*([^:=]+?)\s*(?::\s*([\d,\s]+))?\s*=\s*(.+)", spec)
+    if not match:
+        raise SystemExit(f"无法解析字体规格: {spec}")
+    family, weights, path = match.groups()
+    weight_list = [int(w) for w in (weights or "400").split(",") if w.strip()]
+    return family, weight_list, path.strip()
+
+
+def subset_font(path: str, weight: int, text: str, flavor: str | None) -> bytes:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(path)
+    if "fvar" in font:
+        from fontTools.varLib import instancer
+
+        axes = {a.axisTag: a for a in font["fvar"].axes}
+        location = {}
+        if "wght" in axes:
+            wght = axes["wght"]
+            location["wght"] = max(wght.minValue, min(wght.maxValue, weight))
+        font = instancer.instantiateVariableFont(font, location)
+
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    options.hinting = False  # 截图渲染不需要 hinting，可显著减小体积
+    # WOFF2 压缩对去子程序化后的字形更有效；未压缩的 OTF 保留子程序更小
+    options.desubroutinize = flavor is not None
+
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+
+    buf = io.BytesIO()
+    font.flavor = flavor
+    font.save(buf)
+    return buf.getvalue()
+
+
+def build_font_face(family: str, weight: int, data: bytes, flavor: str) -> str:
+    b64 = base64.b64encode(data).decode()
+    return (
+        "@font-face {\n"
+        f"    font-family: '{family}';\n"
+        "    font-style: normal;\n"
+        f"    font-weight: {weight};\n"
+        "    font-display: block;\n"
+        f"    src: url(data:font/{flavor};base64,{b64}) format('{flavor}');\n"
+        "}\n"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="构建主题离线字体包")
+    parser.add_argument("--theme", default="galgame")
+    parser.add_argument(
+        "--font",
+        action="append",
+        required=True,
+        help='字体规格，例如 "Noto Sans SC:400,700=NotoSansSC[wght].ttf"',
+    )
+    parser.add_argument(
+        "--no-common",
+        action="store_true",
+        help="不附带 GB2312 一级汉字，只保留模板与源码中出现的字符",
+    )
+    parser.add_argument("--output", help="输出路径，默认写入主题目录下的 fonts.css")
+    parser.add_argument(
+        "--pillow",
+        action="store_true",
+        help="同时生成 Pillow 渲染器使用的 OpenType 字体子集",
+    )
+    args = parser.parse_args()
+
+    theme_dir = os.path.join(PLUGIN_ROOT, "assets", "themes", args.theme)
+    if not os.path.isdir(theme_dir):
+        raise SystemExit(f"主题不存在: {theme_dir}")
+
+    text = BASE_CHARS + collect_source_chars(theme_dir)
+    if not args.no_common:
+        text += gb2312_level1()
+    text = "".join(sorted(set(text)))
+
+    try:
+        import brotli  # noqa: F401
+
+        flavor = "woff2"
+    except ImportError:
+        print("未安装 brotli，改用 WOFF 格式 (体积较大)")
+        flavor = "woff"
+
+    faces = [
+        f"/* 由 scripts/build_theme_bundle.py 生成，请勿手动修改。字符数: {len(text)} */\n"
+    ]
+    for spec in args.font:
+        family, weights, path = parse_font_spec(spec)
+        for weight in weights:
+            data = subset_font(path, weight, text, flavor)
+            faces.append(build_font_face(family, weight, data, flavor))
+            print(f"{family} {weight}: {len(data) / 1024:.1f} KB ({flavor})")
+
+    output = args.output or os.path.join(theme_dir, "fonts.css")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("\n".join(faces))
+    print(f"已写入 {output} ({os.path.getsize(output) / 1024:.1f} KB)")
+
+    if args.pillow:
+        family, weights, path = parse_font_spec(args.font[0])
+        os.makedirs(os.path.dirname(PILLOW_FONT), exist_ok=True)
+        with open(PILLOW_FONT, "wb") as f:
+            f.write(subset_font(path, weights[0], text, None))
+        print(f"已写入 {PILLOW_FONT} ({os.path.getsize(PILLOW_FONT) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 import math
 
-from ..models.tables import LoveDailyRef
+from ..models.dto import DailyCounters
 from .engines.ick import IckEngine
 from .engines.nostalgia import NostalgiaEngine
 from .engines.simp import SimpEngine
@@ -20,7 +20,7 @@ class LoveCalculator:
         self.ick_engine = IckEngine()
         self.nostalgia_engine = NostalgiaEngine()
 
-    def calculate_scores(self, data: LoveDailyRef, yesterday_score: int = 0) -> dict:
+    def calculate_scores(self, data: DailyCounters, yesterday_score: int = 0) -> dict:
         """根据每日数据计算各项得分"""
         # 1. 调用模块化引擎计算原始分值
         raw_simp = self.simp_engine.calculate(data)
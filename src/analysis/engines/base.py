@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
 
-from ...models.tables import LoveDailyRef
+from ...models.dto import DailyCounters
 
 
 class BaseMetricEngine(ABC):
     @abstractmethod
-    def calculate(self, data: LoveDailyRef) -> float:
+    def calculate(self, data: DailyCounters) -> float:
         """计算原始分值"""
         pass
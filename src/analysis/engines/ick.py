@@ -1,4 +1,4 @@
-from ...models.tables import LoveDailyRef
+from ...models.dto import DailyCounters
 from .base import BaseMetricEngine
 
 
@@ -12,6 +12,6 @@ class IckEngine(BaseMetricEngine):
     W_RECALL = 5.0  # 撤回处罚权重 (高，代表社交逃避)
     W_REPEAT = 3.0  # 复读处罚权重 (代表破坏社交节奏)
 
-    def calculate(self, data: LoveDailyRef) -> float:
+    def calculate(self, data: DailyCounters) -> float:
         # 原始分值 = (撤回数 * 权重) + (复读机次数 * 权重)
         return data.recall_count * self.W_RECALL + data.repeat_count * self.W_REPEAT
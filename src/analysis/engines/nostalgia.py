@@ -1,4 +1,4 @@
-from ...models.tables import LoveDailyRef
+from ...models.dto import DailyCounters
 from .base import BaseMetricEngine
 
 
@@ -12,6 +12,6 @@ class NostalgiaEngine(BaseMetricEngine):
     W_TOPIC = 8.0  # 话题引领权重 (略微下调以平衡总分)
     W_MEME = 1.0  # 图片贡献权重
 
-    def calculate(self, data: LoveDailyRef) -> float:
+    def calculate(self, data: DailyCounters) -> float:
         # 原始分值 = (引领话题数 * 权重) + (发送图片数 * 权重)
         return data.topic_count * self.W_TOPIC + data.image_sent * self.W_MEME
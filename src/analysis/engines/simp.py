@@ -1,4 +1,4 @@
-from ...models.tables import LoveDailyRef
+from ...models.dto import DailyCounters
 from .base import BaseMetricEngine
 
 
@@ -13,7 +13,7 @@ class SimpEngine(BaseMetricEngine):
     W_POKE_SENT = 2.0  # 主动交互权重
     W_AVG_LEN = 0.05  # 文本字数权重 (小作文功率)
 
-    def calculate(self, data: LoveDailyRef) -> float:
+    def calculate(self, data: DailyCounters) -> float:
         # 计算平均每条消息的长度
         avg_len = data.text_len_total / data.msg_sent if data.msg_sent > 0 else 0
 
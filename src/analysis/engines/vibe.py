@@ -1,4 +1,4 @@
-from ...models.tables import LoveDailyRef
+from ...models.dto import DailyCounters
 from .base import BaseMetricEngine
 
 
@@ -13,7 +13,7 @@ class VibeEngine(BaseMetricEngine):
     W_REACTION_RECV = 2.0  # 被贴贴权重 (代表情绪共鸣)
     W_POKE_RECV = 2.0  # 被戳一戳权重 (代表弱社交吸引)
 
-    def calculate(self, data: LoveDailyRef) -> float:
+    def calculate(self, data: DailyCounters) -> float:
         # 原始分值 = (被回复数 * 权重) + (被贴贴数 * 权重) + (被戳数 * 权重)
         return (
             data.reply_received * self.W_REPLY_RECV
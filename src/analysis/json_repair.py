@@ -0,0 +1,254 @@
+"""
+容错 JSON 提取器。
+
+LLM 输出的 JSON 经常夹带 Markdown 代码块、尾随逗号、未加引号的 key / #标签、
+字符串内未转义的引号，或者因 token 截断而缺少结尾。这里用一次线性扫描的
+递归下降解析器直接产出 Python 对象，不依赖多轮正则替换，最坏情况也是 O(n)。
+"""
+
+_WHITESPACE = " \t\r\n　"
+# 值结束后可能出现的分隔符 (含全角)
+_DELIMITERS = ",，]}:："
+# 裸值 (未加引号的字符串/数字) 的结束符，冒号不在其中以保留 "01:23" 之类的内容
+_BARE_END = ",，]}[{\n"
+_QUOTES = {'"': '"', "'": "'", "“": "”", "「": "」"}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "/": "/"}
+_LITERALS = {"true": True, "false": False, "null": None, "none": None}
+MAX_DEPTH = 64
+
+
+class _TolerantParser:
+    def __init__(self, text: str):
+        self.text = text
+        self.n = len(text)
+        self.pos = 0
+
+    # ---------- 基础工具 ----------
+    def _skip_ws(self) -> None:
+        text, n, pos = self.text, self.n, self.pos
+        while pos < n:
+            ch = text[pos]
+            if ch in _WHITESPACE:
+                pos += 1
+            elif ch == "/" and text.startswith("//", pos):
+                # 行注释
+                end = text.find("\n", pos)
+                pos = n if end == -1 else end + 1
+            else:
+                break
+        self.pos = pos
+
+    def _peek(self) -> str:
+        return self.text[self.pos] if self.pos < self.n else ""
+
+    def _closes_value(self, pos: int) -> bool:
+        """引号之后紧跟分隔符/换行/结尾时，才视为字符串真正结束"""
+        text, n = self.text, self.n
+        while pos < n and text[pos] in " \t\r　":
+            pos += 1
+        return pos >= n or text[pos] in _DELIMITERS or text[pos] == "\n"
+
+    # ---------- 值解析 ----------
+    def parse_value(self, depth: int = 0):
+        self._skip_ws()
+        ch = self._peek()
+        if not ch:
+            return None
+        if ch == "{":
+            return self._parse_object(depth + 1)
+        if ch == "[":
+            return self._parse_array(depth + 1)
+        if ch in _QUOTES:
+            return self._parse_string()
+        if ch == "#":
+            return self._parse_hashtag()
+        return self._parse_bare()
+
+    def _parse_object(self, depth: int) -> dict:
+        self.pos += 1  # {
+        result = {}
+        if depth > MAX_DEPTH:
+            self._skip_container("{", "}")
+            return result
+        while True:
+            self._skip_ws()
+            ch = self._peek()
+            if not ch:
+                return result  # 截断
+            if ch == "}":
+                self.pos += 1
+                return result
+            if ch in ",，":
+                self.pos += 1  # 多余/尾随逗号
+                continue
+            if ch == "]":
+                self.pos += 1  # 错配的括号，忽略
+                continue
+
+            key = self._parse_key()
+            self._skip_ws()
+            if self._peek() in (":", "："):
+                self.pos += 1
+                value = self.parse_value(depth)
+            else:
+                value = None
+            if key is not None:
+                result[key] = value
+
+    def _parse_key(self) -> str | None:
+        ch = self._peek()
+        if ch in _QUOTES:
+            return self._parse_string()
+        # 未加引号的 key：读到冒号或结构符为止
+        start = self.pos
+        text, n = self.text, self.n
+        pos = start
+        while pos < n and text[pos] not in ":：,，{}[]\n":
+            pos += 1
+        self.pos = pos
+        key = text[start:pos].strip().strip("\"'")
+        if not key:
+            if pos < n and text[pos] in "{[":
+                # 缺少 key 的嵌套结构，直接吞掉以保证前进
+                self.parse_value(MAX_DEPTH)
+            return None
+        return key
+
+    def _parse_array(self, depth: int) -> list:
+        self.pos += 1  # [
+        result = []
+        if depth > MAX_DEPTH:
+            self._skip_container("[", "]")
+            return result
+        while True:
+            self._skip_ws()
+            ch = self._peek()
+            if not ch:
+                return result  # 截断
+            if ch == "]":
+                self.pos += 1
+                return result
+            if ch in ",，":
+                self.pos += 1
+                continue
+            if ch == "}":
+                self.pos += 1  # 错配的括号，忽略
+                continue
+            start = self.pos
+            result.append(self.parse_value(depth))
+            if self.pos == start:
+                self.pos += 1  # 保证前进
+
+    def _skip_container(self, open_ch: str, close_ch: str) -> None:
+        """超过最大嵌套深度时，线性跳过整个容器"""
+        level = 1
+        text, n, pos = self.text, self.n, self.pos
+        while pos < n and level:
+            ch = text[pos]
+            if ch == open_ch:
+                level += 1
+            elif ch == close_ch:
+                level -= 1
+            pos += 1
+        self.pos = pos
+
+    def _parse_string(self) -> str:
+        text, n = self.text, self.n
+        quote = text[self.pos]
+        closing = _QUOTES[quote]
+        pos = self.pos + 1
+        parts = []
+        chunk_start = pos
+        while pos < n:
+            ch = text[pos]
+            if ch == "\\" and pos + 1 < n:
+                parts.append(text[chunk_start:pos])
+                esc = text[pos + 1]
+                if esc == "u" and pos + 6 <= n:
+                    try:
+                        parts.append(chr(int(text[pos + 2 : pos + 6], 16)))
+                        pos += 6
+                        chunk_start = pos
+                        continue
+                    except ValueError:
+                        pass
+                parts.append(_ESCAPES.get(esc, esc))
+                pos += 2
+                chunk_start = pos
+                continue
+            if ch == closing and self._closes_value(pos + 1):
+                parts.append(text[chunk_start:pos])
+                self.pos = pos + 1
+                return "".join(parts)
+            pos += 1
+        # 截断：字符串未闭合
+        parts.append(text[chunk_start:pos])
+        self.pos = n
+        return "".join(parts).rstrip()
+
+    def _parse_hashtag(self) -> str:
+        # 兼容 #Tag / #"Tag" / ##Tag 等幻觉写法，统一为 "#Tag"
+        text, n = self.text, self.n
+        pos = self.pos
+        while pos < n and text[pos] in "#\"' ":
+            pos += 1
+        start = pos
+        while pos < n and text[pos] not in _BARE_END and text[pos] not in "\"'":
+            pos += 1
+        word = text[start:pos].strip()
+        if pos < n and text[pos] in "\"'":
+            pos += 1
+        self.pos = pos
+        return f"#{word}" if word else "#"
+
+    def _parse_bare(self):
+        text, n = self.text, self.n
+        start = self.pos
+        pos = start
+        while pos < n and text[pos] not in _BARE_END:
+            pos += 1
+        self.pos = pos
+        token = text[start:pos].strip()
+        lowered = token.lower()
+        if lowered in _LITERALS:
+            return _LITERALS[lowered]
+        try:
+            return int(token)
+        except ValueError:
+            pass
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+
+def extract_json(text: str):
+    """
+    从 LLM 原始输出中提取第一个 JSON 对象/数组。
+    自动忽略代码块标记与前后说明文字，容忍尾随逗号、未加引号的 key、
+    #标签与截断的结尾。找不到任何结构时返回 None。
+    """
+    if not text:
+        return None
+
+    fence = text.find("```")
+    search_from = fence if fence != -1 else 0
+    obj_start = text.find("{", search_from)
+    arr_start = text.find("[", search_from)
+    if obj_start == -1 and arr_start == -1 and search_from:
+        obj_start = text.find("{")
+        arr_start = text.find("[")
+    if obj_start == -1 and arr_start == -1:
+        return None
+
+    parser = _TolerantParser(text)
+    parser.pos = obj_start
+    if arr_start != -1 and (obj_start == -1 or arr_start < obj_start):
+        # 仅当方括号后紧跟对象/字符串时才视为顶层数组，避免误吞 "[注]" 之类的说明文字
+        parser.pos = arr_start + 1
+        parser._skip_ws()
+        if obj_start == -1 or parser._peek() in '{"':
+            parser.pos = arr_start
+        else:
+            parser.pos = obj_start
+    return parser.parse_value()
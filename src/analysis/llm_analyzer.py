@@ -1,27 +1,90 @@
-import json
+import asyncio
 import re
+import time
 
 from astrbot.api import logger
 from astrbot.core.star.context import Context
 
+from .json_repair import extract_json
+from .provider_pool import ProviderBalancer, parse_provider_pool
+
+# 正则兜底提取使用的模式 (模块级预编译，避免每次调用重复编译)
+_RE_KEYWORDS = re.compile(r'(?i)keywords["\']?\s*[:：]\s*[\[\(]?([^\]\)]+)[\]\)]?')
+_RE_HASHTAG = re.compile(r'#\s*["\']?([^"\',，\s\]\}]+)["\']?')
+_RE_ANALYSIS_KEY = re.compile(r'(?i)analysis["\']?\s*[:：]\s*["\']?')
+_RE_EVIDENCE_KEY = re.compile(r'(?i)["\']?evidence["\']?\s*[:：]')
+_RE_TITLE_SPLIT = re.compile(r'(?i)title["\']?\s*[:：]')
+_RE_TITLE_VALUE = re.compile(r'\s*["\']?([^"\',]+)["\']?')
+_RE_REASON = re.compile(r'(?i)reason["\']?\s*[:：]\s*["\']?([^"\',\}]+)["\']?')
+_RE_DIALOGUE_KEY = re.compile(r'(?i)dialogue["\']?\s*[:：]\s*\[')
+_RE_DIALOGUE_ENTRY = re.compile(r"\{([^{}]+)\}")
+_RE_ROLE = re.compile(r'(?i)["\']?role["\']?\s*[:：]\s*["\']?([^"\']+)["\']?')
+_RE_CONTENT = re.compile(r'(?i)["\']?content["\']?\s*[:：]\s*["\']?([^"\']+)["\']?')
+
+BATCH_TOKEN_BUDGET = 6000  # 单次批量请求的 token 预算 (含预留输出)
+BATCH_OUTPUT_TOKENS_PER_USER = 160  # 每名用户预留的输出 token
+BATCH_MAX_RETRIES = 1  # 解析失败用户的重试轮数
+
+BATCH_PROMPT_HEADER = """
+你现在是极度毒舌、冷酷且满口 ACG 术语的 Galgame 《恋爱法庭》首席裁判官。
+今天需要一次性审判多名“被告”（群成员），请为每一位被告分别作出宣判。
+
+【输出要求】
+严格输出一个 JSON 对象，key 为被告的 ID，禁止任何多余解释：
+{"被告ID": {"comment": "一段极度毒舌且充满魅力的宣判，包含 ACG 角色属性", "diagnostics": ["针对纯爱值与存在感的点评", "针对败犬值的解构", "针对旧情指数的分析"]}}
+必须覆盖下列每一位被告，ID 必须原样保留。
+
+【案件卷宗】
+"""
+
+BATCH_ENTRY_TEMPLATE = (
+    "- 被告ID {user_id} ({nickname}): 人设 {archetype} | "
+    "纯爱 {s} 存在感 {v} 败犬 {i} 旧情 {n} | "
+    "发言 {msg_sent} 被回复 {reply_received} 被贴贴 {reaction_received} "
+    "撤回 {recall_count} 复读 {repeat_count} 新话题 {topic_count}"
+)
+
 
 class LLMAnalyzer:
     def __init__(self, context: Context, config: dict = None):
         self.context = context
         self.config = config or {}
+        self.balancer = ProviderBalancer()
+
+    async def _llm_generate(self, prompt: str, provider_id=None):
+        """
+        通过 Provider 池调用 LLM。
+        provider_id 可以是单个 ID、逗号分隔的多个 ID 或列表；
+        按健康权重选择首选 Provider，失败时依次故障转移。
+        """
+        pool = parse_provider_pool(provider_id)
+        last_exception = None
+        for pid in self.balancer.order(pool):
+            start = time.perf_counter()
+            try:
+                response = await self.context.llm_generate(
+                    prompt=prompt, chat_provider_id=pid
+                )
+            except Exception as e:
+                self.balancer.record(pid, time.perf_counter() - start, ok=False)
+                logger.warning(f"LLM Provider {pid or '(默认)'} 调用失败: {e}")
+                last_exception = e
+                continue
+            self.balancer.record(pid, time.perf_counter() - start, ok=True)
+            return response
 
-    async def generate_commentary(
-        self, scores: dict, archetype: str, raw_data: dict, provider_id: str = None
-    ) -> dict:
-        s, v, i, n = scores["simp"], scores["vibe"], scores["ick"], scores["nostalgia"]
+        raise last_exception or RuntimeError("没有可用的 LLM Provider")
 
-        # Prepare formatting context
-        format_data = {
+    def _build_judgment_format_data(
+        self, scores: dict, archetype: str, raw_data: dict
+    ) -> dict:
+        """构造判词模板的格式化变量 (单人与批量模式共用)"""
+        return {
             "archetype": archetype,
-            "s": s,
-            "v": v,
-            "i": i,
-            "n": n,
+            "s": scores["simp"],
+            "v": scores["vibe"],
+            "i": scores["ick"],
+            "n": scores["nostalgia"],
             "msg_sent": raw_data.get("msg_sent", 0),
             "reply_received": raw_data.get("reply_received", 0),
             "reaction_received": raw_data.get("reaction_received", 0),
@@ -30,6 +93,16 @@ class LLMAnalyzer:
             "topic_count": raw_data.get("topic_count", 0),
         }
 
+    async def generate_commentary(
+        self,
+        scores: dict,
+        archetype: str,
+        raw_data: dict,
+        provider_id: str | list[str] = None,
+    ) -> dict:
+        # Prepare formatting context
+        format_data = self._build_judgment_format_data(scores, archetype, raw_data)
+
         # Get prompt template from config
         template_obj = self.config.get("llm_judgment_template", {})
         if isinstance(template_obj, str):  # Backward compatibility or simple string
@@ -74,9 +147,7 @@ class LLMAnalyzer:
 
         # 调用 AstrBot LLM API
         try:
-            response = await self.context.llm_generate(
-                prompt=prompt, chat_provider_id=provider_id
-            )
+            response = await self._llm_generate(prompt, provider_id)
             text = response.completion_text
 
             # 解析结果
@@ -99,105 +170,178 @@ class LLMAnalyzer:
             logger.error(f"LLM Commentary failed: {e}")
             return {"comment": "LLM 暂时无法处理，请稍后再试。", "diagnostics": []}
 
-    def _repair_json(self, text: str) -> str:
-        """Attempts to repair common LLM JSON syntax errors."""
-
-        # 1. Fix unquoted hashtags and hallucinations like #"Tag" or ##Tag
-        # Match strings or hashtags (possibly with leading/trailing quotes/junk)
-        # Using a "match and skip" strategy for strings to avoid false positives.
-        pattern = r'("(?:\\.|[^"\\])*")|(#\s*"?[\w\u4e00-\u9fa5]+"?)|(#+)'
-
-        def replace_tag(match):
-            if match.group(1):  # It's a string, return as is
-                return match.group(1)
-
-            tag_content = match.group(2)
-            if tag_content:
-                # Normalize: remove stray quotes and # prefix, ensure single #
-                word = tag_content.lstrip("#").strip().strip('"')
-                if word:
-                    return f'"#{word}"'
-
-            # Stray # or ##, just quote it to avoid syntax error
-            return '"#"'
-
-        text = re.sub(pattern, replace_tag, text)
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算 token 数：CJK 字符按 1 token，其余字符按 4 字符 1 token"""
+        cjk = sum(1 for ch in text if ord(ch) > 0x2E80)
+        return cjk + (len(text) - cjk) // 4 + 1
+
+    async def generate_batch_commentary(
+        self, entries: list[dict], provider_id: str | list[str] = None
+    ) -> dict[str, dict]:
+        """
+        批量判词模式：将多名用户的评分向量打包进一次结构化请求。
+
+        Args:
+            entries: [{'user_id': str, 'nickname': str, 'scores': dict,
+                       'archetype': str, 'raw_data': dict}, ...]
+
+        Returns:
+            dict[str, dict]: user_id -> {'comment': str, 'diagnostics': list}
+        """
+        budget = self.config.get("batch_token_budget", BATCH_TOKEN_BUDGET)
+        header, entry_template = self._batch_templates()
+        header_tokens = self._estimate_tokens(header)
+
+        # 1. 按 token 预算切分批次 (每人额外预留输出 token)
+        pending: dict[str, str] = {}
+        for entry in entries:
+            format_data = self._build_judgment_format_data(
+                entry["scores"], entry["archetype"], entry["raw_data"]
+            )
+            format_data["user_id"] = entry["user_id"]
+            format_data["nickname"] = entry.get("nickname") or entry["user_id"]
+            try:
+                dossier = entry_template.format(**format_data)
+            except Exception as e:
+                logger.error(f"Failed to format batch entry: {e}，改用默认卷宗模板")
+                dossier = BATCH_ENTRY_TEMPLATE.format(**format_data)
+            pending[str(entry["user_id"])] = dossier
+
+        results: dict[str, dict] = {}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if not pending:
+                break
+
+            chunks: list[list[str]] = [[]]
+            used = header_tokens
+            for uid, dossier in pending.items():
+                cost = self._estimate_tokens(dossier) + BATCH_OUTPUT_TOKENS_PER_USER
+                if chunks[-1] and used + cost > budget:
+                    chunks.append([])
+                    used = header_tokens
+                chunks[-1].append(uid)
+                used += cost
+
+            async def _run_chunk(uids: list[str]) -> dict[str, dict]:
+                prompt = header + "\n".join(pending[u] for u in uids)
+                try:
+                    response = await self._llm_generate(prompt, provider_id)
+                except Exception as e:
+                    logger.error(f"LLM Batch Commentary failed: {e}")
+                    return {}
+                return self._parse_batch_response(response.completion_text, uids)
+
+            chunk_results = await asyncio.gather(*[_run_chunk(c) for c in chunks])
+            for parsed in chunk_results:
+                results.update(parsed)
+
+            # 2. 仅重试解析失败的用户
+            pending = {u: d for u, d in pending.items() if u not in results}
+            if pending:
+                logger.info(
+                    f"批量判词第 {attempt + 1} 轮有 {len(pending)} 名用户解析失败"
+                )
 
-        # 2. Fix trailing commas
-        text = re.sub(r",\s*([\]\}])", r"\1", text)
+        for uid in pending:
+            results[uid] = {
+                "comment": "LLM 暂时无法处理，请稍后再试。",
+                "diagnostics": [],
+            }
+        return results
 
-        return text
+    def _batch_templates(self) -> tuple[str, str]:
+        """批量判词的 (提示词头部, 单人卷宗模板)，未配置时使用内置默认值"""
+        template_obj = self.config.get("llm_batch_judgment_template", {})
+        if isinstance(template_obj, str):
+            template_obj = {"header": template_obj}
+        header = template_obj.get("header") or BATCH_PROMPT_HEADER
+        entry = template_obj.get("entry") or BATCH_ENTRY_TEMPLATE
+        return header.rstrip("\n") + "\n", entry
+
+    def _parse_batch_response(self, text: str, uids: list[str]) -> dict[str, dict]:
+        """解析以 user_id 为 key 的 JSON 批量判词，丢弃缺失或结构不合法的条目"""
+        data_json = extract_json(text)
+        if not isinstance(data_json, dict):
+            logger.debug(f"Batch commentary JSON invalid: {text[:200]}")
+            return {}
+
+        parsed = {}
+        for uid in uids:
+            item = data_json.get(uid)
+            if isinstance(item, str):
+                item = {"comment": item}
+            if not isinstance(item, dict) or not item.get("comment"):
+                continue
+            diagnostics = item.get("diagnostics") or []
+            if isinstance(diagnostics, str):
+                diagnostics = [d.strip() for d in diagnostics.split("\n") if d.strip()]
+            parsed[uid] = {
+                "comment": str(item["comment"]).strip(),
+                "diagnostics": [str(d).strip() for d in diagnostics if d],
+            }
+        return parsed
 
     def _reconstruct_from_regex(self, text: str) -> dict | None:
         """Heuristic extraction of deep dive data using regex fallback."""
         # 1. Keywords: Matches Keywords: ["#a", "#b"] or Keywords: #a #b
-        kw_match = re.search(
-            r'(?i)(?:KEYWORDS|keywords)["\']?\s*[:：]\s*[\[\(]?([^\]\)]+)[\]\)]?', text
-        )
+        kw_match = _RE_KEYWORDS.search(text)
         keywords = []
         if kw_match:
             # More permissive: extract anything starting with # and capture the word
-            raw_kws = re.findall(
-                r'#\s*["\']?([^"\',，\s\]\}]+)["\']?', kw_match.group(1)
-            )
+            raw_kws = _RE_HASHTAG.findall(kw_match.group(1))
             keywords = [f"#{k.strip()}" for k in raw_kws if k.strip()]
 
-        # 2. Analysis: Extracts content after ANALYSIS:
-        ana_match = re.search(
-            r'(?i)(?:ANALYSIS|analysis)["\']?\s*[:：]\s*["\']?(.*?)(?:["\']?\s*[,，]?\s*(?:"|EVIDENCE|evidence)|$)',
-            text,
-            re.DOTALL,
-        )
+        # 2. Analysis: content after ANALYSIS: up to the closing quote / EVIDENCE key.
+        # 线性查找结束位置，避免 DOTALL 惰性匹配在畸形输出上的回溯
         analysis = ""
+        ana_match = _RE_ANALYSIS_KEY.search(text)
         if ana_match:
-            analysis = ana_match.group(1).strip().strip('",')
+            start = ana_match.end()
+            end = len(text)
+            ev_match = _RE_EVIDENCE_KEY.search(text, start)
+            if ev_match:
+                end = ev_match.start()
+            quote_end = text.find('"', start, end)
+            if quote_end != -1:
+                end = quote_end
+            analysis = text[start:end].strip().strip('",')
 
         # 3. Evidence: Extracts scenes and their dialogues
         evidence = []
         # Find scenes using title/TITLE as anchors
-        scene_blocks = re.split(r'(?i)title["\']?\s*[:：]', text)[1:]
+        scene_blocks = _RE_TITLE_SPLIT.split(text)[1:]
         for block in scene_blocks:
             # Extract title (up to the next key or newline/comma)
-            title_match = re.match(r'\s*["\']?([^"\',]+)["\']?', block)
+            title_match = _RE_TITLE_VALUE.match(block)
             if not title_match:
                 continue
             title = title_match.group(1).strip()
 
             # NEW: Extract the actual reason from the block
             reason = "由正则表达式兜底提取 (Reason Extraction Failed)"
-            reason_match = re.search(
-                r'(?i)reason["\']?\s*[:：]\s*["\']?([^"\',\}]+)["\']?', block
-            )
+            reason_match = _RE_REASON.search(block)
             if reason_match:
                 reason = reason_match.group(1).strip()
 
             # Find the dialogue portion in this block
-            diag_match = re.search(
-                r'(?i)dialogue["\']?\s*[:：]\s*\[(.*)', block, re.DOTALL
-            )
-            if not diag_match or not diag_match.group(1):
+            diag_match = _RE_DIALOGUE_KEY.search(block)
+            if not diag_match:
                 continue
 
-            diag_blob = diag_match.group(1)
+            diag_blob = block[diag_match.end() :]
             # Find the closing bracket for this dialogue array
             last_bracket = diag_blob.rfind("]")
             if last_bracket != -1:
                 diag_blob = diag_blob[:last_bracket]
+            if not diag_blob:
+                continue
 
             dialogue = []
             # Extract entries like {"role": "...", "content": "..."}
-            entries = re.findall(r"\{([^{}]+)\}", diag_blob)
-            for entry in entries:
-                role_m = re.search(
-                    r'["\']?role["\']?\s*[:：]\s*["\']?([^"\']+)["\']?',
-                    entry,
-                    re.IGNORECASE,
-                )
-                content_m = re.search(
-                    r'["\']?content["\']?\s*[:：]\s*["\']?([^"\']+)["\']?',
-                    entry,
-                    re.IGNORECASE,
-                )
+            for entry in _RE_DIALOGUE_ENTRY.findall(diag_blob):
+                role_m = _RE_ROLE.search(entry)
+                content_m = _RE_CONTENT.search(entry)
                 if role_m and content_m:
                     dialogue.append(
                         {
@@ -221,7 +365,7 @@ class LLMAnalyzer:
         archetype: str,
         raw_data: dict,
         chat_context: list,
-        provider_id: str = None,
+        provider_id: str | list[str] = None,
     ) -> dict:
         """New method for deep contextual analysis"""
         if not chat_context:
@@ -314,37 +458,19 @@ class LLMAnalyzer:
             return None
 
         try:
-            response = await self.context.llm_generate(
-                prompt=prompt, chat_provider_id=provider_id
-            )
+            response = await self._llm_generate(prompt, provider_id)
             text = response.completion_text
 
             # Try parsing as JSON first (robust handling)
             try:
                 logger.debug(f"Raw LLM Deep Dive Response: {text}")
 
-                # Robust JSON Cleaner
-                clean_text = text.strip()
-
-                # 1. Remove Markdown Code Blocks
-                if "```" in clean_text:
-                    # Find the first opening brace after the first backtick block start
-                    start_idx = clean_text.find("{")
-                    end_idx = clean_text.rfind("}")
-                    if start_idx != -1 and end_idx != -1:
-                        clean_text = clean_text[start_idx : end_idx + 1]
-                else:
-                    # If no code blocks, look for the outer braces
-                    start_idx = clean_text.find("{")
-                    end_idx = clean_text.rfind("}")
-                    if start_idx != -1 and end_idx != -1:
-                        clean_text = clean_text[start_idx : end_idx + 1]
-
-                # 2. Repair common JSON errors
-                clean_text = self._repair_json(clean_text)
-
-                logger.debug(f"Repaired JSON Text: {clean_text}")
-                data_json = json.loads(clean_text)
+                # 单遍容错提取：代码块、尾随逗号、未加引号的 key、截断结尾
+                data_json = extract_json(text)
+                if not isinstance(data_json, dict) or not (
+                    "DEEP_PSYCHE" in data_json or "EVIDENCE" in data_json
+                ):
+                    raise ValueError("未找到 DEEP_PSYCHE / EVIDENCE 结构")
 
                 # Handle structure: {"DEEP_PSYCHE": {"KEYWORDS": ..., "ANALYSIS": ...}, "EVIDENCE": ...}
                 result = {}
@@ -427,8 +553,6 @@ class LLMAnalyzer:
 
                 return result
 
-            except json.JSONDecodeError:
-                pass  # Fallback to text parsing
             except Exception as e:
                 logger.warning(f"JSON parsing failed, trying text parse: {e}")
 
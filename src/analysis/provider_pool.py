@@ -0,0 +1,170 @@
+import random
+import time
+
+
+def parse_provider_pool(value, fallback: str = "") -> list[str]:
+    """
+    将配置中的 Provider 设置解析为 Provider 池。
+    支持单个 ID、逗号/空白分隔的多个 ID，或列表 (每项同样可用逗号分隔)。为空时使用 fallback。
+    """
+    values = value if isinstance(value, (list, tuple)) else [value]
+    items = []
+    for v in values:
+        items += str(v or "").replace("，", ",").replace(",", " ").split()
+
+    pool = []
+    for item in items:
+        if item and item not in pool:
+            pool.append(item)
+
+    if not pool:
+        # 空字符串代表 AstrBot 当前默认 Provider
+        return [fallback or ""]
+    return pool
+
+
+class ProviderHealth:
+    """单个 Provider 的实时健康数据 (EWMA 延迟、EWMA 错误率与熔断状态)"""
+
+    def __init__(self, provider_id: str):
+        self.provider_id = provider_id
+        self.latency_ewma: float | None = None
+        self.error_ewma = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.half_open = False
+        self.probe_started = 0.0  # 半开试探请求的发出时间，0 表示没有试探在进行
+
+    def state(self, now: float) -> str:
+        if self.open_until > now:
+            return "open"
+        if self.half_open:
+            return "half-open"
+        return "closed"
+
+
+class ProviderBalancer:
+    """
+    多 LLM Provider 加权负载均衡器。
+    调度权重 = 成功率 / EWMA 延迟；连续失败达到阈值的 Provider 会被熔断一段时间，
+    冷却结束后进入半开状态，仅放行一次试探请求：试探进行中时，其他调用把它与
+    熔断中的 Provider 一样排在最后，直到 record() 记录试探结果。
+    """
+
+    EWMA_ALPHA = 0.3  # EWMA 平滑系数
+    DEFAULT_LATENCY = 5.0  # 尚无样本时假定的延迟 (秒)
+    MIN_SUCCESS_RATE = 0.05  # 错误率再高也保留极小权重，避免饿死
+    BREAKER_THRESHOLD = 3  # 连续失败多少次后熔断
+    BREAKER_COOLDOWN = 60.0  # 熔断持续时间 (秒)
+    PROBE_TIMEOUT = 120.0  # 试探请求超过该时长仍无结果 (如被取消) 时允许重新试探
+
+    def __init__(self):
+        self._health: dict[str, ProviderHealth] = {}
+
+    def _get(self, provider_id: str) -> ProviderHealth:
+        health = self._health.get(provider_id)
+        if health is None:
+            health = ProviderHealth(provider_id)
+            self._health[provider_id] = health
+        return health
+
+    def _weight(self, health: ProviderHealth) -> float:
+        latency = health.latency_ewma
+        if latency is None:
+            known = [
+                h.latency_ewma
+                for h in self._health.values()
+                if h.latency_ewma is not None
+            ]
+            # 新 Provider 以已知均值参与调度，保证能获得探测流量
+            latency = sum(known) / len(known) if known else self.DEFAULT_LATENCY
+        success = max(self.MIN_SUCCESS_RATE, 1.0 - health.error_ewma)
+        return success / max(latency, 0.05)
+
+    def order(self, pool: list[str]) -> list[str]:
+        """
+        按加权随机顺序返回本次调用的候选列表 (首个为首选，其余用于故障转移)。
+        熔断中的 Provider 排在最后，仅在全部不可用时兜底使用。
+        半开的 Provider 由第一个调用者作为首选发出试探，保证试探结果会被 record()；
+        试探进行中时，其他调用者把它与熔断中的 Provider 一起排在最后。
+        """
+        now = time.time()
+        available = []
+        tripped = []
+        probe = None
+        for pid in pool:
+            health = self._get(pid)
+            if health.open_until > now:
+                tripped.append(health)
+                continue
+            if health.open_until:
+                # 冷却结束，进入半开状态
+                health.open_until = 0.0
+                health.half_open = True
+            if health.half_open:
+                if probe is None and now - health.probe_started >= self.PROBE_TIMEOUT:
+                    health.probe_started = now
+                    probe = health
+                else:
+                    tripped.append(health)
+                continue
+            available.append(health)
+
+        ordered = [probe.provider_id] if probe else []
+        candidates = list(available)
+        while candidates:
+            weights = [self._weight(h) for h in candidates]
+            chosen = random.choices(candidates, weights=weights, k=1)[0]
+            ordered.append(chosen.provider_id)
+            candidates.remove(chosen)
+
+        tripped.sort(key=lambda h: h.open_until)
+        ordered.extend(h.provider_id for h in tripped)
+        return ordered
+
+    def _ewma(self, current: float | None, sample: float) -> float:
+        if current is None:
+            return sample
+        return (1 - self.EWMA_ALPHA) * current + self.EWMA_ALPHA * sample
+
+    def record(self, provider_id: str, latency: float, ok: bool) -> None:
+        """记录一次调用结果"""
+        health = self._get(provider_id)
+        health.calls += 1
+        health.probe_started = 0.0
+        health.error_ewma = self._ewma(health.error_ewma, 0.0 if ok else 1.0)
+
+        if ok:
+            health.latency_ewma = self._ewma(health.latency_ewma, latency)
+            health.consecutive_failures = 0
+            health.half_open = False
+            return
+
+        health.failures += 1
+        health.consecutive_failures += 1
+        if health.half_open or health.consecutive_failures >= self.BREAKER_THRESHOLD:
+            health.open_until = time.time() + self.BREAKER_COOLDOWN
+            health.half_open = False
+
+    def snapshot(self) -> list[dict]:
+        """导出当前所有 Provider 的健康状态，用于统计指令展示"""
+        now = time.time()
+        rows = []
+        for pid, health in self._health.items():
+            rows.append(
+                {
+                    "provider_id": pid or "(默认)",
+                    "state": health.state(now),
+                    "latency_ms": int(health.latency_ewma * 1000)
+                    if health.latency_ewma is not None
+                    else None,
+                    "error_rate": round(health.error_ewma, 3),
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "weight": round(self._weight(health), 3),
+                    "reopen_in": max(0, int(health.open_until - now)),
+                }
+            )
+        return rows
@@ -1,19 +1,31 @@
+import asyncio
 import time
+from datetime import date
 
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent
 from astrbot.core.star.context import Context
 
+from .member_directory import MemberDirectory
+
 
 class OneBotAdapter:
     """
     用于与 OneBot V11 API 交互以获取历史记录的适配器。
     """
 
-    def __init__(self, context: Context, config: dict):
+    HONOR_RETRY_SEC = 600  # 群荣誉获取失败或为空时，间隔多久再次请求
+
+    def __init__(
+        self, context: Context, config: dict, members: MemberDirectory | None = None
+    ):
         self.context = context
         self.config = config
+        self.members = members
         self.filter_users = [str(u) for u in config.get("filter_users", [])]
+        # 群荣誉按群每日缓存: group_id -> (日期, 获取时间, 荣誉数据)
+        self._honor_cache: dict[str, tuple[date, float, dict]] = {}
+        self._honor_inflight: dict[str, asyncio.Future] = {}
 
     async def fetch_context(
         self, event: AstrMessageEvent, target_user_id: str
@@ -126,7 +138,12 @@ class OneBotAdapter:
             msg = raw_pool[original_idx]
             sender = msg.get("sender", {})
             sender_id = str(sender.get("user_id", ""))
-            nickname = sender.get("nickname", "Unknown")
+            # 优先使用成员名录中的群名片，与报告、榜单中的称呼保持一致
+            nickname = (
+                self.members.name(event.message_obj.group_id, sender_id)
+                if self.members
+                else None
+            ) or sender.get("nickname", "Unknown")
             role = "[Target]" if sender_id == target_str_id else "[Other]"
             content = self._extract_text(msg.get("message", ""))
 
@@ -167,19 +184,59 @@ class OneBotAdapter:
             if bot and hasattr(bot, "api") and hasattr(bot.api, "call_action"):
                 resp = await bot.api.call_action("get_group_msg_history", **params)
                 if resp:
-                    return resp.get("messages", [])
+                    return self._observe_senders(group_id, resp.get("messages", []))
 
             if bot and hasattr(bot, "call_api"):
                 resp = await bot.call_api("get_group_msg_history", **params)
                 if resp:
-                    return resp.get("messages", [])
+                    return self._observe_senders(group_id, resp.get("messages", []))
         except Exception as e:
             logger.warning(f"OneBotAdapter: 原始历史记录获取失败: {e}")
 
         return []
 
+    def _observe_senders(self, group_id, messages: list[dict]) -> list[dict]:
+        """历史消息中的发送者信息顺带更新成员名录"""
+        if self.members:
+            for msg in messages:
+                self.members.observe_sender(group_id, msg.get("sender"))
+        return messages
+
     async def fetch_group_honor(self, event: AstrMessageEvent) -> dict:
-        """获取群荣誉信息 (龙王、群聊之星等)"""
+        """
+        获取群荣誉信息 (龙王、群聊之星等)。
+        荣誉每天才变化一次，结果按群缓存到当天结束；获取失败或为空时
+        HONOR_RETRY_SEC 秒后才重试。同一群的并发请求合并为一次 API 调用。
+        """
+        group_id = str(event.message_obj.group_id)
+        today = date.today()
+        cached = self._honor_cache.get(group_id)
+        if cached and cached[0] == today:
+            if cached[2] or time.time() - cached[1] < self.HONOR_RETRY_SEC:
+                return cached[2]
+
+        inflight = self._honor_inflight.get(group_id)
+        if inflight:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if inflight.cancelled():
+                    return {}  # 发起请求的一方被取消，本次按无荣誉处理
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._honor_inflight[group_id] = future
+        try:
+            honor_data = await self._request_group_honor(event)
+            self._honor_cache[group_id] = (today, time.time(), honor_data)
+            future.set_result(honor_data)
+            return honor_data
+        finally:
+            self._honor_inflight.pop(group_id, None)
+            if not future.done():
+                future.cancel()
+
+    async def _request_group_honor(self, event: AstrMessageEvent) -> dict:
         group_id = event.message_obj.group_id
         bot = getattr(event, "bot", None)
         if not bot:
@@ -200,8 +257,9 @@ class OneBotAdapter:
             logger.warning(f"OneBotAdapter: 获取群荣誉失败: {e}")
         return {}
 
-    async def fetch_group_member_list(self, event: AstrMessageEvent) -> list[dict]:
-        """获取群成员列表数据"""
+    @staticmethod
+    async def fetch_group_member_list(event: AstrMessageEvent) -> list[dict]:
+        """获取群成员列表数据 (不依赖适配器状态，无需构造实例)"""
         group_id = event.message_obj.group_id
         bot = getattr(event, "bot", None)
         if not bot:
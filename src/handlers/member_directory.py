@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable
+
+from astrbot.api import logger
+from astrbot.api.event import AstrMessageEvent
+
+
+class MemberDirectory:
+    """
+    群成员名录缓存：group_id -> {user_id: 显示名 (群名片优先，其次昵称)}。
+    某群首次出现消息时在后台拉取 get_group_member_list，此后每隔 refresh_interval
+    秒整群刷新一次；每条消息的发送者信息 (实时消息与历史记录) 增量更新单个成员。
+    查询只读内存字典，请求路径上不产生任何 API 调用。
+    """
+
+    REFRESH_INTERVAL = 6 * 3600
+    RETRY_INTERVAL = 600  # 拉取失败或为空时的重试间隔
+
+    def __init__(
+        self,
+        fetch_members: Callable[[AstrMessageEvent], Awaitable[list[dict]]],
+        refresh_interval: float = REFRESH_INTERVAL,
+    ):
+        self.fetch_members = fetch_members
+        self.refresh_interval = refresh_interval
+        self._members: dict[str, dict[str, str]] = {}
+        self._next_refresh: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.stats = {"refreshes": 0, "failures": 0, "hits": 0, "misses": 0}
+
+    @staticmethod
+    def display_name(info) -> str:
+        """成员信息 (dict 或带属性的对象) 中的显示名：群名片优先"""
+        if isinstance(info, dict):
+            return str(info.get("card") or info.get("nickname") or "").strip()
+        card = getattr(info, "card", None)
+        return str(card or getattr(info, "nickname", None) or "").strip()
+
+    # ---------- 查询 ----------
+    def name(self, group_id: str, user_id: str) -> str | None:
+        """查询成员显示名，未知时返回 None"""
+        name = self._members.get(str(group_id), {}).get(str(user_id))
+        self.stats["hits" if name else "misses"] += 1
+        return name
+
+    # ---------- 更新 ----------
+    def update(self, group_id: str, user_id: str, name: str) -> None:
+        if name and user_id:
+            self._members.setdefault(str(group_id), {})[str(user_id)] = name
+
+    def observe_sender(self, group_id: str, sender: dict) -> None:
+        """用一条原始消息 (OneBot 格式) 的 sender 增量更新"""
+        if sender:
+            self.update(group_id, sender.get("user_id"), self.display_name(sender))
+
+    def observe(self, event: AstrMessageEvent) -> None:
+        """由每条群消息调用：更新发送者的显示名，并在到期时触发后台整群刷新"""
+        group_id = event.message_obj.group_id
+        if not group_id:
+            return
+        group_id = str(group_id)
+
+        raw = event.message_obj.raw_message
+        if isinstance(raw, dict) and raw.get("sender"):
+            self.observe_sender(group_id, raw["sender"])
+        else:
+            sender = event.message_obj.sender
+            self.update(group_id, sender.user_id, self.display_name(sender))
+
+        if time.time() >= self._next_refresh.get(group_id, 0.0):
+            self.schedule_refresh(group_id, event)
+
+    def schedule_refresh(self, group_id: str, event: AstrMessageEvent) -> None:
+        task = self._tasks.get(group_id)
+        if task and not task.done():
+            return
+        # 先推迟下次刷新时间，避免拉取期间的后续消息重复触发
+        self._next_refresh[group_id] = time.time() + self.RETRY_INTERVAL
+        self._tasks[group_id] = asyncio.create_task(self._refresh(group_id, event))
+
+    async def _refresh(self, group_id: str, event: AstrMessageEvent) -> None:
+        before = dict(self._members.get(group_id, {}))
+        try:
+            members = await self.fetch_members(event)
+        except Exception as e:
+            members = []
+            logger.warning(f"群 {group_id} 成员名录刷新失败: {e}")
+        if not members:
+            self.stats["failures"] += 1
+            return
+
+        # 合并而非替换：拉取期间由消息增量记录的名称比成员列表更新，予以保留
+        directory = self._members.setdefault(group_id, {})
+        fetched = 0
+        for member in members:
+            user_id = str(member.get("user_id") or "")
+            name = self.display_name(member)
+            if not user_id or not name:
+                continue
+            fetched += 1
+            if directory.get(user_id) == before.get(user_id):
+                directory[user_id] = name
+        self._next_refresh[group_id] = time.time() + self.refresh_interval
+        self.stats["refreshes"] += 1
+        logger.debug(f"群 {group_id} 成员名录已刷新: {fetched} 人")
+
+    async def stop(self) -> None:
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "groups": len(self._members),
+            "members": sum(len(m) for m in self._members.values()),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
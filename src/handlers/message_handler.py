@@ -4,7 +4,7 @@ from ..analysis.collectors.ick_collector import IckCollector
 from ..analysis.collectors.nostalgia_collector import NostalgiaCollector
 from ..analysis.collectors.simp_collector import SimpCollector
 from ..analysis.collectors.vibe_collector import VibeCollector
-from ..models.tables import MessageOwnerIndex
+from ..models.dto import MessageOwner
 from ..persistence.repo import LoveRepo
 
 
@@ -81,7 +81,7 @@ class MessageHandler:
                     )
 
     async def backfill_from_history(self, group_id: str, messages: list[dict]):
-        """从历史记录中回填今日数据（批量写入）"""
+        """从历史记录中回填今日数据（批量写入），返回 (回填统计, 被更新的今日行)"""
         from datetime import date, datetime
 
         today = date.today()
@@ -97,7 +97,7 @@ class MessageHandler:
         user_history_text: dict[str, str] = {}
 
         # ===== 批量缓冲区 =====
-        msg_indexes: list[MessageOwnerIndex] = []
+        msg_indexes: list[MessageOwner] = []
 
         msg_stats: dict[str, dict] = {}
         behavior_stats: dict[str, dict] = {}
@@ -189,14 +189,7 @@ class MessageHandler:
                 behavior_stats[user_id]["repeat"] += repeat_inc
 
             # ===== 消息索引 =====
-            msg_indexes.append(
-                MessageOwnerIndex(
-                    message_id=msg_id,
-                    group_id=group_id,
-                    user_id=user_id,
-                    timestamp=msg_time,
-                )
-            )
+            msg_indexes.append(MessageOwner(msg_id, user_id, group_id, msg_time))
 
             # ===== 回复 / @ 交互 =====
             if reply_target_msg_id:
@@ -220,7 +213,7 @@ class MessageHandler:
             group_last_time = msg_time
 
         # ===== 一次性写库 =====
-        await self.repo.batch_backfill(
+        updated = await self.repo.batch_backfill(
             group_id=group_id,
             msg_indexes=msg_indexes,
             msg_stats=msg_stats,
@@ -229,4 +222,4 @@ class MessageHandler:
             interaction_received=interaction_received,
         )
 
-        return stats
+        return stats, updated
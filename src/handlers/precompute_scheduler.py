@@ -0,0 +1,270 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from types import SimpleNamespace
+
+from astrbot.api import logger
+from astrbot.api.event import AstrMessageEvent
+
+from ..persistence.repo import LoveRepo
+
+
+class GroupEventRef:
+    """
+    预计算时代替真实消息事件的轻量引用。
+    只保留历史拉取所需的 message_obj.group_id / bot / self_id。
+    """
+
+    def __init__(self, group_id: str, bot, self_id: str | None):
+        self.message_obj = SimpleNamespace(group_id=group_id)
+        self.bot = bot
+        self.self_id = self_id
+
+
+class PrecomputeScheduler:
+    """
+    离峰预计算调度器。
+    在请求低谷的时间窗口内，按「昨日请求次数 + 今日活跃度」预测最可能来查询的用户，
+    提前生成今日人设卡片写入结果缓存，高峰期请求即可直接命中。
+    卡片基于今日数据，窗口必须落在当天已有足够发言之后、请求高峰之前：默认 ("auto")
+    按近 HISTORY_DAYS 天各小时的请求量 (按天衰减) 找出高峰小时，
+    在其前 QUIET_SEARCH_HOURS 小时中选请求最少的一小时运行。
+    """
+
+    # 预测权重
+    W_REQUEST = 10.0
+    W_ACTIVITY = 0.1
+
+    CHECK_INTERVAL = 60
+    DEFAULT_WINDOW = "auto"
+    FALLBACK_PEAK_HOUR = 21  # 尚无请求记录时假定的高峰小时
+    QUIET_SEARCH_HOURS = 4  # 在高峰前多少小时内寻找最空闲的一小时
+    HISTORY_DAYS = 7  # 请求量统计保留的天数
+    DAY_DECAY = 0.5  # 每早一天的请求量权重
+
+    def __init__(
+        self,
+        repo: LoveRepo,
+        config: dict,
+        build_report: Callable[[str, str, str, GroupEventRef | None], Awaitable[bool]],
+    ):
+        self.repo = repo
+        self.config = config
+        self.build_report = build_report
+        self._groups: dict[str, GroupEventRef] = {}
+        self._task: asyncio.Task | None = None
+        self._last_run_date: date | None = None
+        # 近 HISTORY_DAYS 天每天各小时 (本地时间) 的请求量，用于自动确定预计算窗口
+        self._requests: dict[date, list[float]] = {}
+
+        self.stats = {
+            "last_run": 0.0,
+            "last_duration": 0.0,
+            "candidates": 0,
+            "generated": 0,
+            "skipped": 0,
+            "failed": 0,
+        }
+
+    def remember_group(self, event: AstrMessageEvent) -> None:
+        """记录群组对应的 bot 实例，供离峰时拉取上下文使用"""
+        group_id = event.message_obj.group_id
+        if not group_id:
+            return
+        group_id = str(group_id)
+        bot = getattr(event, "bot", None)
+        ref = self._groups.get(group_id)
+        if ref is None or (bot is not None and ref.bot is not bot):
+            self._groups[group_id] = GroupEventRef(
+                group_id, bot, getattr(event, "self_id", None)
+            )
+
+    def observe_request(self, ts: float | None = None) -> None:
+        """记录一次今日人设请求的时间"""
+        moment = datetime.fromtimestamp(ts if ts is not None else time.time())
+        hours = self._requests.get(moment.date())
+        if hours is None:
+            cutoff = date.today() - timedelta(days=self.HISTORY_DAYS)
+            if moment.date() <= cutoff:
+                return
+            for day in [d for d in self._requests if d <= cutoff]:
+                del self._requests[day]
+            hours = self._requests[moment.date()] = [0.0] * 24
+        hours[moment.hour] += 1
+
+    def hourly_load(self) -> list[float]:
+        """近 HISTORY_DAYS 天各小时的请求量，越早的天权重越低"""
+        today = date.today()
+        load = [0.0] * 24
+        for day, hours in self._requests.items():
+            age = (today - day).days
+            if 0 <= age < self.HISTORY_DAYS:
+                weight = self.DAY_DECAY**age
+                for hour, count in enumerate(hours):
+                    load[hour] += weight * count
+        return load
+
+    def peak_hour(self, load: list[float] | None = None) -> int:
+        load = load or self.hourly_load()
+        if not any(load):
+            return self.FALLBACK_PEAK_HOUR
+        return max(range(24), key=load.__getitem__)
+
+    def quiet_hour(self, load: list[float] | None = None) -> int:
+        """高峰前 QUIET_SEARCH_HOURS 小时中请求最少的一小时 (并列时取更晚的)"""
+        load = load or self.hourly_load()
+        peak = self.peak_hour(load)
+        hours = [(peak - k) % 24 for k in range(1, self.QUIET_SEARCH_HOURS + 1)]
+        return min(hours, key=load.__getitem__)
+
+    async def load_request_history(self) -> None:
+        """
+        启动时用近 HISTORY_DAYS 天的请求记录初始化请求量。
+        记录只保存每人每天的最后请求时间，因此每条记录只计入该时刻的一次请求。
+        """
+        today = date.today()
+        for age in range(self.HISTORY_DAYS):
+            for log in await self.repo.get_report_requests(today - timedelta(days=age)):
+                if log.last_request_at:
+                    self.observe_request(log.last_request_at)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        try:
+            await self.load_request_history()
+        except Exception as e:
+            logger.warning(f"[LoveFormula] 读取请求记录失败: {e}")
+        window = self.window()
+        if window:
+            logger.info(
+                f"[LoveFormula] 离峰预计算已启用，当前窗口: "
+                f"{window[0].strftime('%H:%M')}-{window[1].strftime('%H:%M')}"
+            )
+        while True:
+            try:
+                await self.tick(datetime.now())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[LoveFormula] 预计算任务异常: {e}", exc_info=True)
+            await asyncio.sleep(self.CHECK_INTERVAL)
+
+    async def tick(self, now: datetime) -> bool:
+        """检查一次是否需要运行预计算 (每天最多一次)，返回本次是否运行"""
+        if self._last_run_date == now.date() or not self._in_window(now):
+            return False
+        self._last_run_date = now.date()
+        await self.run_once()
+        return True
+
+    def window(self) -> tuple[dt_time, dt_time] | None:
+        """
+        当前的预计算窗口 (起, 止)。
+        precompute_window 为 "auto" 或留空时取高峰前最空闲的一小时，
+        否则解析 "HH:MM-HH:MM"；格式无效时返回 None。
+        """
+        window = str(self.config.get("precompute_window") or self.DEFAULT_WINDOW)
+        if window.strip().lower() == "auto":
+            hour = self.quiet_hour()
+            return dt_time(hour), dt_time((hour + 1) % 24)
+        try:
+            start_str, end_str = window.replace(" ", "").split("-", 1)
+            start = datetime.strptime(start_str, "%H:%M").time()
+            end = datetime.strptime(end_str, "%H:%M").time()
+        except ValueError:
+            return None
+        return start, end
+
+    def _in_window(self, now: datetime) -> bool:
+        """判断当前时间是否在预计算窗口内 (支持跨零点)"""
+        window = self.window()
+        if window is None:
+            logger.warning(
+                f"[LoveFormula] 无效的 precompute_window: "
+                f"{self.config.get('precompute_window')}"
+            )
+            return False
+        start, end = window
+
+        current = now.time()
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    async def _predict_candidates(self) -> list[tuple[str, str, str]]:
+        """按预测得分排序，返回 [(group_id, user_id, nickname), ...]"""
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+
+        scores: dict[tuple[str, str], float] = {}
+        nicknames: dict[tuple[str, str], str] = {}
+
+        for log in await self.repo.get_report_requests(yesterday):
+            key = (log.group_id, log.user_id)
+            scores[key] = scores.get(key, 0.0) + self.W_REQUEST * log.request_count
+            nicknames[key] = log.nickname
+
+        # 仅对昨日有请求记录的群补充今日活跃度，避免全量扫描
+        for group_id in {k[0] for k in scores}:
+            for ref in await self.repo.get_group_daily_refs(group_id, today):
+                key = (group_id, ref.user_id)
+                if key in scores:
+                    scores[key] += self.W_ACTIVITY * ref.msg_sent
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        return [(g, u, nicknames.get((g, u), "")) for (g, u), _ in ranked]
+
+    async def run_once(self) -> None:
+        """执行一轮预计算 (受每日预算与并发上限约束)"""
+        started = time.time()
+        budget = int(self.config.get("precompute_max_reports", 20))
+        concurrency = max(1, int(self.config.get("precompute_concurrency", 2)))
+
+        candidates = (await self._predict_candidates())[:budget]
+        self.stats.update(
+            last_run=started,
+            candidates=len(candidates),
+            generated=0,
+            skipped=0,
+            failed=0,
+        )
+        if not candidates:
+            self.stats["last_duration"] = time.time() - started
+            return
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _build(group_id: str, user_id: str, nickname: str):
+            async with sem:
+                try:
+                    built = await self.build_report(
+                        group_id, user_id, nickname, self._groups.get(group_id)
+                    )
+                    self.stats["generated" if built else "skipped"] += 1
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    logger.warning(
+                        f"[LoveFormula] 预计算失败 {group_id}/{user_id}: {e}"
+                    )
+
+        await asyncio.gather(*(_build(*c) for c in candidates))
+        self.stats["last_duration"] = time.time() - started
+        logger.info(
+            f"[LoveFormula] 预计算完成: 候选 {len(candidates)}，"
+            f"生成 {self.stats['generated']}，跳过 {self.stats['skipped']}，"
+            f"失败 {self.stats['failed']}，耗时 {self.stats['last_duration']:.1f}s"
+        )
@@ -0,0 +1,102 @@
+from datetime import date as DateType
+
+# LoveDailyRef 中可累加的计数器列
+COUNTER_FIELDS = (
+    "msg_sent",
+    "text_len_total",
+    "reply_sent",
+    "reply_received",
+    "poke_sent",
+    "poke_received",
+    "reaction_sent",
+    "reaction_received",
+    "recall_count",
+    "repeat_count",
+    "image_sent",
+    "topic_count",
+)
+
+
+class DailyCounters:
+    """
+    单个用户单日计数器的轻量表示，字段与 LoveDailyRef 一致。
+    不经过 Pydantic 校验与 ORM 身份映射，可直接交给 LoveCalculator 与各引擎使用。
+    """
+
+    __slots__ = ("id", "date", "group_id", "user_id", *COUNTER_FIELDS, "updated_at")
+
+    def __init__(
+        self,
+        date: DateType,
+        group_id: str,
+        user_id: str,
+        id: int | None = None,
+        updated_at: float = 0.0,
+        **counters: int,
+    ):
+        self.id = id
+        self.date = date
+        self.group_id = group_id
+        self.user_id = user_id
+        self.updated_at = updated_at
+        for name in COUNTER_FIELDS:
+            setattr(self, name, counters.get(name, 0))
+
+    @classmethod
+    def from_mapping(cls, row) -> "DailyCounters":
+        """由 love_daily_ref 的一行 (RowMapping 或 dict) 构造"""
+        return cls(
+            row["date"],
+            row["group_id"],
+            row["user_id"],
+            id=row["id"],
+            updated_at=row["updated_at"],
+            **{name: row[name] for name in COUNTER_FIELDS},
+        )
+
+    def add(self, updated_at: float, **inc: int) -> None:
+        for name, value in inc.items():
+            setattr(self, name, getattr(self, name) + value)
+        self.updated_at = updated_at
+
+    def counters(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in COUNTER_FIELDS}
+
+    def model_dump(self) -> dict:
+        """与 LoveDailyRef.model_dump() 相同的字典结构"""
+        return {
+            "id": self.id,
+            "date": self.date,
+            "group_id": self.group_id,
+            "user_id": self.user_id,
+            **self.counters(),
+            "updated_at": self.updated_at,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"DailyCounters({self.date}, {self.group_id}/{self.user_id}, "
+            f"msg_sent={self.msg_sent})"
+        )
+
+
+class MessageOwner:
+    """message_owner_index 一行的轻量表示，字段与 MessageOwnerIndex 一致"""
+
+    __slots__ = ("message_id", "user_id", "group_id", "timestamp")
+
+    def __init__(self, message_id: str, user_id: str, group_id: str, timestamp: float):
+        self.message_id = message_id
+        self.user_id = user_id
+        self.group_id = group_id
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_mapping(cls, row) -> "MessageOwner":
+        return cls(row["message_id"], row["user_id"], row["group_id"], row["timestamp"])
+
+    def model_dump(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"MessageOwner({self.message_id}, {self.group_id}/{self.user_id})"
@@ -1,18 +1,29 @@
 from datetime import date as DateType
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
+from ..persistence.ids import PlatformId
+
 
 class LoveDailyRef(SQLModel, table=True):
     """每日恋爱成分指标快照，存储每个用户在群组中的各项互动数据"""
 
     __tablename__ = "love_daily_ref"
-    __table_args__ = {"extend_existing": True}
+    # 复合索引按实际查询设计 (见 tests/verify_query_plans.py)：
+    # - (date, group_id, user_id)：今日/昨日单点查询，前缀 (date, group_id) 服务群榜单
+    # - (group_id, user_id, date)：单个用户按日期范围查询 (趋势)
+    # 索引列写入后不再变化，计数器的更新不会触及索引
+    __table_args__ = (
+        Index("idx_daily_date_group_user", "date", "group_id", "user_id"),
+        Index("idx_daily_group_user_date", "group_id", "user_id", "date"),
+        {"extend_existing": True},
+    )
 
     id: int | None = Field(default=None, primary_key=True)
-    date: DateType = Field(index=True)
-    group_id: str = Field(index=True)
-    user_id: str = Field(index=True)
+    date: DateType
+    group_id: str = Field(sa_type=PlatformId)
+    user_id: str = Field(sa_type=PlatformId)
 
     # 文字指标
     msg_sent: int = Field(default=0)
@@ -41,11 +52,12 @@ class MessageOwnerIndex(SQLModel, table=True):
     """消息归属索引，用于将后续的 Reaction 归因到具体的发送者"""
 
     __tablename__ = "message_owner_index"
-    __table_args__ = {"extend_existing": True}
+    # 按主键 message_id 查找的窄表，WITHOUT ROWID 省去 rowid 与主键索引两份存储
+    __table_args__ = {"extend_existing": True, "sqlite_with_rowid": False}
 
-    message_id: str = Field(primary_key=True)
-    user_id: str
-    group_id: str
+    message_id: str = Field(primary_key=True, sa_type=PlatformId)
+    user_id: str = Field(sa_type=PlatformId)
+    group_id: str = Field(sa_type=PlatformId)
     timestamp: float  # 时间戳
 
 
@@ -55,6 +67,43 @@ class UserCooldown(SQLModel, table=True):
     __tablename__ = "user_cooldown"
     __table_args__ = {"extend_existing": True}
 
-    user_id: str = Field(primary_key=True)
-    group_id: str = Field(primary_key=True)
+    user_id: str = Field(primary_key=True, sa_type=PlatformId)
+    group_id: str = Field(primary_key=True, sa_type=PlatformId)
     last_rate_at: float = Field(default=0.0)
+
+
+class ReportRequestLog(SQLModel, table=True):
+    """今日人设请求记录（按日期/群组/用户聚合），用于预测高频请求者"""
+
+    __tablename__ = "report_request_log"
+    __table_args__ = {"extend_existing": True}
+
+    date: DateType = Field(primary_key=True)
+    group_id: str = Field(primary_key=True, sa_type=PlatformId)
+    user_id: str = Field(primary_key=True, sa_type=PlatformId)
+    nickname: str = Field(default="")
+    request_count: int = Field(default=0)
+    last_request_at: float = Field(default=0.0)
+
+
+class IdAlias(SQLModel, table=True):
+    """非数字平台 ID 的别名表 (见 persistence.ids)"""
+
+    __tablename__ = "id_alias"
+    __table_args__ = {"extend_existing": True}
+
+    id: int = Field(primary_key=True)
+    value: str
+
+
+class HonorBonusLedger(SQLModel, table=True):
+    """群荣誉加成发放记录，保证同一荣誉每天只为同一用户加成一次"""
+
+    __tablename__ = "honor_bonus_ledger"
+    __table_args__ = {"extend_existing": True, "sqlite_with_rowid": False}
+
+    date: DateType = Field(primary_key=True)
+    group_id: str = Field(primary_key=True, sa_type=PlatformId)
+    user_id: str = Field(primary_key=True, sa_type=PlatformId)
+    honor: str = Field(primary_key=True)  # talkative / performer / emotion
+    applied_at: float = Field(default=0.0)
@@ -1,25 +1,70 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from sqlalchemy import inspect, text
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlmodel import SQLModel
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from astrbot.api import logger
+
+from ..models.tables import IdAlias
+from . import ids, migrations
 
 
 class DBManager:
-    """数据库管理器，负责异步连接和会话管理"""
+    """
+    数据库管理器，负责异步连接和会话管理。
+    SQLite 同一时刻只允许一个写事务，因此写入走单连接的写引擎 (在连接池内排队，
+    避免多个连接争抢写锁触发 database is locked)；只读查询走独立的读引擎，
+    其连接设置 query_only，在 WAL 模式下可与写入并发执行。
+    synchronous / cache_size 等 PRAGMA 只对当前连接生效，统一在连接建立时的
+    connect 钩子中按所选档位设置，保证池中每个连接的调优一致。
+    """
+
+    # 连接级 PRAGMA 档位
+    PROFILES: dict[str, dict[str, int | str]] = {
+        # 耐久优先：每次提交都 fsync，断电也不丢已提交的事务
+        "durability": {
+            "synchronous": "FULL",
+            "cache_size": -8000,
+            "temp_store": "DEFAULT",
+            "mmap_size": 0,
+        },
+        # 吞吐优先：WAL 下 NORMAL 不会损坏数据库，断电最多丢失最近几次提交
+        "throughput": {
+            "synchronous": "NORMAL",
+            "cache_size": -20000,
+            "temp_store": "MEMORY",
+            "mmap_size": 134217728,
+        },
+    }
+    DEFAULT_PROFILE = "throughput"
+    BUSY_TIMEOUT_MS = 5000
+    READ_CONNECTIONS = 4
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        profile: str = DEFAULT_PROFILE,
+        read_connections: int = READ_CONNECTIONS,
+    ):
         self.db_url = f"sqlite+aiosqlite:///{db_path}"
+        if profile not in self.PROFILES:
+            logger.warning(f"未知的数据库档位 {profile}，使用 {self.DEFAULT_PROFILE}")
+            profile = self.DEFAULT_PROFILE
+        self.profile = profile
+        self.pragmas = self.PROFILES[profile]
 
-        # 创建异步引擎
-        self.engine = create_async_engine(
-            self.db_url,
-            echo=False,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            pool_size=5,
-            max_overflow=5,
+        # 写引擎：单连接，写事务在连接池中排队
+        self.engine = self._create_engine(pool_size=1, read_only=False)
+        # 读引擎：多个只读连接
+        self.read_engine = self._create_engine(
+            pool_size=max(1, int(read_connections)), read_only=True
         )
 
         # 创建会话工厂
@@ -28,65 +73,97 @@ class DBManager:
             class_=AsyncSession,
             expire_on_commit=False,
         )
+        self.read_session = async_sessionmaker(
+            self.read_engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
 
-    async def init_db(self):
-        """初始化数据库，创建所有定义的表"""
-        # 必须显式导入模型类，确保它们被注册到 SQLModel.metadata 中
-        from ..models.tables import (  # noqa: F401
-            LoveDailyRef,
-            MessageOwnerIndex,
-            UserCooldown,
+    def _create_engine(self, pool_size: int, read_only: bool) -> AsyncEngine:
+        engine = create_async_engine(
+            self.db_url,
+            echo=False,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            pool_size=pool_size,
+            max_overflow=0,
         )
+        pragmas = [f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}"]
+        pragmas += [f"PRAGMA {k}={v}" for k, v in self.pragmas.items()]
+        if read_only:
+            pragmas.append("PRAGMA query_only=ON")
 
-        # 1. 创建表
-        async with self.engine.begin() as conn:
-            await conn.run_sync(SQLModel.metadata.create_all)
-
-            def _needs_refresh(sync_conn):
-                inspector = inspect(sync_conn)
-                if "user_cooldown" not in inspector.get_table_names():
-                    return True
-                existing_columns = {
-                    col["name"] for col in inspector.get_columns("user_cooldown")
-                }
-                required_columns = set(UserCooldown.__table__.columns.keys())
-                if existing_columns != required_columns:
-                    return True
-                return False
-
-            needs_refresh = await conn.run_sync(_needs_refresh)
-            if needs_refresh:
-                await conn.run_sync(
-                    lambda sync_conn: UserCooldown.__table__.drop(
-                        sync_conn, checkfirst=True
-                    )
-                )
-                await conn.run_sync(
-                    lambda sync_conn: UserCooldown.__table__.create(
-                        sync_conn, checkfirst=True
-                    )
-                )
-
-        # 2. SQLite 优化 PRAGMA
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            try:
+                for sql in pragmas:
+                    cursor.execute(sql)
+            finally:
+                cursor.close()
+
+        return engine
+
+    async def init_db(self):
+        """初始化数据库：按 PRAGMA user_version 执行未应用的迁移"""
+        # 1. 版本已是最新时只读取一次 user_version，不做表结构反射
         async with self.engine.connect() as conn:
-            await conn.execute(text("PRAGMA journal_mode=WAL"))
-            await conn.execute(text("PRAGMA synchronous=NORMAL"))
-            await conn.execute(text("PRAGMA cache_size=-20000"))
-            await conn.execute(text("PRAGMA temp_store=MEMORY"))
-            await conn.execute(text("PRAGMA mmap_size=134217728"))
+            before, after = await conn.run_sync(migrations.upgrade)
+        if after != before:
+            logger.info(f"LoveFormula 数据库已从 v{before} 迁移到 v{after}")
 
-            # 确认表名正确
-            await conn.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_message_id ON message_owner_index(message_id)"
-                )
-            )
+        async with self.engine.connect() as conn:
+            # 2. 载入非数字平台 ID 的别名，供读取时还原
+            result = await conn.exec_driver_sql("SELECT id, value FROM id_alias")
+            ids.load_aliases(result.all())
+
+            # 3. journal_mode 持久化在数据库文件中，只需由写连接设置一次
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            await conn.exec_driver_sql("PRAGMA optimize")
+        logger.info(f"LoveFormula 数据库档位: {self.profile}")
 
-            await conn.execute(text("PRAGMA optimize"))
+    async def close(self):
+        await self.engine.dispose()
+        await self.read_engine.dispose()
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """异步获取数据库会话的上下文管理器"""
+        """异步获取数据库会话的上下文管理器 (写连接)"""
         async with self.async_session() as session:
             async with session.begin():
                 yield session
+                await session.flush()
+                aliases = await self._persist_aliases(session)
+            ids.mark_persisted(aliases)
+
+    @asynccontextmanager
+    async def get_read_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """获取只读会话，仅用于查询；其中的写操作会被 query_only 拒绝"""
+        async with self.read_session() as session:
+            async with session.begin():
+                yield session
+
+    @asynccontextmanager
+    async def write(self) -> AsyncGenerator[AsyncConnection, None]:
+        """Core 写连接 (单个事务)，热路径上跳过 ORM Session 与身份映射"""
+        async with self.engine.begin() as conn:
+            yield conn
+            aliases = await self._persist_aliases(conn)
+        ids.mark_persisted(aliases)
+
+    @asynccontextmanager
+    async def read(self) -> AsyncGenerator[AsyncConnection, None]:
+        """Core 只读连接"""
+        async with self.read_engine.connect() as conn:
+            yield conn
+
+    @staticmethod
+    async def _persist_aliases(conn: AsyncConnection | AsyncSession) -> dict:
+        """本事务中新出现的非数字 ID 别名随事务一同提交"""
+        aliases = ids.pending_aliases()
+        if aliases:
+            await conn.execute(
+                insert(IdAlias).prefix_with("OR IGNORE"),
+                [{"id": k, "value": v} for k, v in aliases.items()],
+            )
+        return aliases
@@ -0,0 +1,173 @@
+import asyncio
+import contextlib
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, insert, select, update
+
+from astrbot.api import logger
+
+from ..models.dto import COUNTER_FIELDS, DailyCounters
+from ..models.tables import LoveDailyRef
+from .database import DBManager
+
+DayTable = dict[tuple[str, str], DailyCounters]
+DAILY = LoveDailyRef.__table__
+
+UPDATE_COUNTERS = (
+    update(DAILY)
+    .where(DAILY.c.id == bindparam("_id"))
+    .values({name: bindparam(name) for name in (*COUNTER_FIELDS, "updated_at")})
+)
+INSERT_COUNTERS = insert(DAILY).returning(DAILY.c.id, sort_by_parameter_order=True)
+SELECT_DAY = select(DAILY).where(DAILY.c.date == bindparam("date"))
+
+
+class DailyHotTier:
+    """
+    今日 (及昨日) LoveDailyRef 计数器的内存热层。
+    每条消息的计数只在内存中累加，由后台任务每隔 interval 秒把变更过的行
+    批量写回 SQLite (一个事务)；interval <= 0 时每次写入后立即落盘。
+    某一天的数据在首次访问时从数据库整日载入，此后内存是这一天的权威数据源，
+    报告路径上的读取无需访问数据库。进程崩溃最多丢失最近 interval 秒的计数。
+    """
+
+    RETAIN_DAYS = 2  # 常驻内存的天数 (今日 + 昨日)
+    CHECKPOINT_INTERVAL = 10
+
+    def __init__(self, db: DBManager, interval: float = CHECKPOINT_INTERVAL):
+        self.db = db
+        self.interval = interval
+        self._days: dict[date, DayTable] = {}
+        self._dirty: dict[tuple[date, str, str], DailyCounters] = {}
+        self._load_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.stats = {"checkpoints": 0, "rows_written": 0, "last_checkpoint": 0.0}
+
+    # ---------- 读写 ----------
+    def retained(self, day: date) -> bool:
+        today = date.today()
+        return today - timedelta(days=self.RETAIN_DAYS - 1) <= day <= today
+
+    async def table(self, day: date) -> DayTable:
+        """返回某日的内存表 (首次访问时整日载入)，调用方需先确认 retained(day)"""
+        rows = self._days.get(day)
+        if rows is not None:
+            return rows
+        async with self._load_lock:
+            if day not in self._days:
+                self._days[day] = await self._load(day)
+                self._evict()
+            return self._days[day]
+
+    async def get(self, day: date, group_id: str, user_id: str):
+        return (await self.table(day)).get((group_id, user_id))
+
+    async def increment(self, group_id: str, user_id: str, **inc: int) -> DailyCounters:
+        """累加今日计数器，返回更新后的行"""
+        today = date.today()
+        rows = await self.table(today)
+        key = (group_id, user_id)
+        entry = rows.get(key)
+        if entry is None:
+            entry = rows[key] = DailyCounters(today, group_id, user_id)
+        entry.add(time.time(), **inc)
+        self._dirty[(today, group_id, user_id)] = entry
+        if self.interval <= 0:
+            await self.checkpoint()
+        return entry
+
+    # ---------- 落盘 ----------
+    async def checkpoint(self) -> int:
+        """把变更过的行写回数据库，返回写入行数"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            # 先取值快照，写库期间的新增计数会重新标记为脏行，由下次落盘写入
+            updates, inserts = [], []
+            for entry in dirty.values():
+                values = {**entry.counters(), "updated_at": entry.updated_at}
+                if entry.id is None:
+                    inserts.append((entry, values))
+                else:
+                    updates.append({"_id": entry.id, **values})
+
+            try:
+                async with self.db.write() as conn:
+                    if updates:
+                        await conn.execute(UPDATE_COUNTERS, updates)
+                    if inserts:
+                        result = await conn.execute(
+                            INSERT_COUNTERS,
+                            [
+                                {
+                                    "date": entry.date,
+                                    "group_id": entry.group_id,
+                                    "user_id": entry.user_id,
+                                    **values,
+                                }
+                                for entry, values in inserts
+                            ],
+                        )
+                        for (entry, _), row_id in zip(inserts, result.scalars()):
+                            entry.id = row_id
+            except Exception:
+                # 写入失败：放回脏行集合，下次重试 (期间新的变更优先)
+                self._dirty = {**dirty, **self._dirty}
+                raise
+
+            written = len(updates) + len(inserts)
+            self.stats["checkpoints"] += 1
+            self.stats["rows_written"] += written
+            self.stats["last_checkpoint"] = time.time()
+            self._evict()
+            return written
+
+    # ---------- 后台任务 ----------
+    async def start(self) -> None:
+        """载入今日数据并启动定期落盘"""
+        await self.table(date.today())
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.checkpoint()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                logger.warning(f"今日计数落盘失败，将在下次重试: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "rows": sum(len(rows) for rows in self._days.values()),
+            "dirty": len(self._dirty),
+        }
+
+    # ---------- 内部实现 ----------
+    async def _load(self, day: date) -> DayTable:
+        async with self.db.read() as conn:
+            result = await conn.execute(SELECT_DAY, {"date": day})
+            rows: DayTable = {}
+            for row in result.mappings():
+                entry = DailyCounters.from_mapping(row)
+                rows.setdefault((entry.group_id, entry.user_id), entry)
+            return rows
+
+    def _evict(self) -> None:
+        """移出保留期之外且已全部落盘的日期"""
+        dirty_days = {key[0] for key in self._dirty}
+        for day in list(self._days):
+            if not self.retained(day) and day not in dirty_days:
+                del self._days[day]
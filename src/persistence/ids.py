@@ -0,0 +1,93 @@
+"""
+平台 ID 的整数存储。
+
+OneBot 的群号、QQ 号与消息 ID 都是整数，按 TEXT 存储会让表和索引的体积翻倍。
+数据库中统一以 INTEGER 存储这些 ID，Python 侧仍然使用字符串：
+- 规范十进制整数 (无前导零、绝对值小于 ALIAS_BASE) 直接转为整数；
+- 其他平台的非数字 ID 映射到 ALIAS_BASE 以上的别名键 (值的 62 位哈希，
+  与数字 ID 不相交)，原文记录在 id_alias 表中，供读取时还原。
+
+别名键由值本身决定，编码时无需查询数据库；新出现的别名先记入内存，
+由 DBManager 在写事务提交前写入 id_alias (见 pending_aliases)。
+"""
+
+import hashlib
+import threading
+
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+ALIAS_BASE = 1 << 62
+
+_aliases: dict[int, str] = {}  # 别名键 -> 原始 ID
+_pending: dict[int, str] = {}  # 尚未写入 id_alias 的别名
+_lock = threading.Lock()
+
+
+def is_numeric_id(value: str) -> bool:
+    """是否为可无损转为整数存储的规范十进制 ID"""
+    digits = value[1:] if value.startswith("-") else value
+    if not digits.isascii() or not digits.isdigit():
+        return False
+    number = int(value)
+    return str(number) == value and abs(number) < ALIAS_BASE
+
+
+def alias_key(value: str) -> int:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return ALIAS_BASE + (int.from_bytes(digest, "big") & (ALIAS_BASE - 1))
+
+
+def encode_id(value: str | int) -> int:
+    if isinstance(value, int):
+        return value
+    value = str(value)
+    if is_numeric_id(value):
+        return int(value)
+    key = alias_key(value)
+    if key not in _aliases:
+        with _lock:
+            _aliases[key] = value
+            _pending[key] = value
+    return key
+
+
+def decode_id(key: int) -> str:
+    if key < ALIAS_BASE:
+        return str(key)
+    return _aliases.get(key, str(key))
+
+
+def load_aliases(rows) -> None:
+    """载入 id_alias 表中已持久化的别名 ((key, value) 序列)"""
+    with _lock:
+        for key, value in rows:
+            _aliases[int(key)] = value
+
+
+def pending_aliases() -> dict[int, str]:
+    with _lock:
+        return dict(_pending)
+
+
+def mark_persisted(keys) -> None:
+    with _lock:
+        for key in keys:
+            _pending.pop(key, None)
+
+
+class PlatformId(TypeDecorator):
+    """Python 侧为 str、数据库中为 INTEGER 的平台 ID 列类型"""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_id(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode_id(int(value))
@@ -0,0 +1,391 @@
+"""
+轻量级数据库迁移框架。
+
+Schema 版本保存在 SQLite 的 PRAGMA user_version 中。启动时只读取这一个整数，
+版本已是最新时直接返回，不再做任何表结构反射；否则按版本号顺序执行尚未应用的
+迁移步骤，每完成一步就写入新版本并提交，中途中断后下次启动会从断点继续。
+
+编写迁移的约定：
+- 每个步骤必须幂等 (重复执行结果不变)，因为 SQLite 的 DDL 不随 Python 驱动的
+  隐式事务回滚，步骤中途失败后会被完整地重新执行；
+- 只追加新版本，不修改已发布的步骤；
+- 新增表、列或索引都要写新的迁移；基线步骤是固定的 DDL，不随模型变化；
+- 大表数据回填使用 backfill() 分批提交，避免长时间持有写锁。
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy import Connection, text
+from sqlalchemy.schema import CreateTable, Table
+
+from astrbot.api import logger
+
+from . import ids
+
+
+class Migration:
+    """单个迁移步骤 (apply 接收同步 Connection，在 run_sync 中执行)"""
+
+    __slots__ = ("version", "description", "apply")
+
+    def __init__(
+        self, version: int, description: str, apply: Callable[[Connection], None]
+    ):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str):
+    """注册迁移步骤的装饰器，版本号必须严格递增"""
+
+    def decorator(func: Callable[[Connection], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"迁移版本号必须递增: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        return func
+
+    return decorator
+
+
+# ---------- 迁移辅助函数 (均为幂等操作) ----------
+def get_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def set_version(conn: Connection, version: int) -> None:
+    # PRAGMA 不支持参数绑定
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def table_columns(conn: Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """列不存在时添加；ddl 为列定义 (如 "INTEGER NOT NULL DEFAULT 0")"""
+    if column in table_columns(conn, table):
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return True
+
+
+def create_index(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: list[str],
+    unique: bool = False,
+) -> None:
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.exec_driver_sql(
+        f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    )
+
+
+def drop_index(conn: Connection, name: str) -> None:
+    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def backfill(
+    conn: Connection,
+    select_sql: str,
+    update_sql: str,
+    batch_size: int = 1000,
+) -> int:
+    """
+    分批回填数据，每批单独提交，返回处理的行数。
+    select_sql 需带 :limit 参数，只返回仍需回填的行 (回填后不再匹配，否则会死循环)；
+    update_sql 以每行的列名作为参数执行。
+    """
+    total = 0
+    while True:
+        rows = conn.execute(text(select_sql), {"limit": batch_size}).mappings().all()
+        if not rows:
+            return total
+        conn.execute(text(update_sql), [dict(r) for r in rows])
+        conn.commit()
+        total += len(rows)
+
+
+def table_sql(conn: Connection, table: str) -> str | None:
+    return conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).scalar()
+
+
+def persist_aliases(conn: Connection) -> None:
+    """把编码过程中新出现的非数字 ID 别名写入 id_alias"""
+    aliases = ids.pending_aliases()
+    if aliases:
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO id_alias (id, value) VALUES (?, ?)",
+            list(aliases.items()),
+        )
+        ids.mark_persisted(aliases)
+
+
+def rebuild_with_integer_ids(
+    conn: Connection, table: Table, batch_size: int = 1000
+) -> bool:
+    """
+    按模型定义重建表，把 TEXT 存储的平台 ID 列转为 INTEGER (见 persistence.ids)。
+    先建 <表名>__new 并复制数据，再删除旧表并改名；任一步中断后重新执行都能继续。
+    """
+    name, tmp = table.name, f"{table.name}__new"
+    id_columns = [c.name for c in table.columns if isinstance(c.type, ids.PlatformId)]
+
+    sql = table_sql(conn, name)
+    if sql is None:
+        if table_sql(conn, tmp) is None:
+            return False
+        # 上次中断在删除旧表之后
+        conn.exec_driver_sql(f"ALTER TABLE {tmp} RENAME TO {name}")
+    else:
+        types = {
+            row[1]: row[2].upper()
+            for row in conn.exec_driver_sql(f"PRAGMA table_info({name})")
+        }
+        with_rowid = table.dialect_options["sqlite"]["with_rowid"]
+        if all(types.get(c) == "INTEGER" for c in id_columns) and (
+            with_rowid or "WITHOUT ROWID" in sql.upper()
+        ):
+            return False
+
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {tmp}")
+        ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+        conn.exec_driver_sql(
+            ddl.replace(f"CREATE TABLE {name} ", f"CREATE TABLE {tmp} ", 1)
+        )
+
+        columns = [c.name for c in table.columns if c.name in types]
+        column_list = ", ".join(columns)
+        bound = ids.ALIAS_BASE - 1
+        numeric = " AND ".join(
+            f"(CAST(CAST({c} AS INTEGER) AS TEXT) = {c}"
+            f" AND CAST({c} AS INTEGER) BETWEEN {-bound} AND {bound})"
+            for c in id_columns
+        )
+        # 数字 ID 在 SQL 中直接转换
+        exprs = ", ".join(
+            f"CAST({c} AS INTEGER)" if c in id_columns else c for c in columns
+        )
+        conn.exec_driver_sql(
+            f"INSERT INTO {tmp} ({column_list}) "
+            f"SELECT {exprs} FROM {name} WHERE {numeric}"
+        )
+
+        # 其余 (非数字平台) 行在 Python 中分批编码
+        positions = [columns.index(c) for c in id_columns]
+        placeholders = ", ".join("?" for _ in columns)
+        last_rowid = -1
+        while True:
+            rows = conn.exec_driver_sql(
+                f"SELECT rowid, {column_list} FROM {name} "
+                f"WHERE NOT ({numeric}) AND rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).all()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            values = []
+            for row in rows:
+                row = list(row[1:])
+                for i in positions:
+                    row[i] = ids.encode_id(row[i])
+                values.append(tuple(row))
+            conn.exec_driver_sql(
+                f"INSERT INTO {tmp} ({column_list}) VALUES ({placeholders})", values
+            )
+        persist_aliases(conn)
+
+        conn.exec_driver_sql(f"DROP TABLE {name}")
+        conn.exec_driver_sql(f"ALTER TABLE {tmp} RENAME TO {name}")
+
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+    return True
+
+
+def upgrade(conn: Connection) -> tuple[int, int]:
+    """应用全部未执行的迁移，返回 (原版本, 新版本)"""
+    current = get_version(conn)
+    latest = MIGRATIONS[-1].version
+    if current >= latest:
+        return current, current
+
+    version = current
+    for step in MIGRATIONS:
+        if step.version <= version:
+            continue
+        logger.info(f"数据库迁移 v{step.version}: {step.description}")
+        step.apply(conn)
+        set_version(conn, step.version)
+        conn.commit()
+        version = step.version
+    return current, version
+
+
+# ---------- 迁移步骤 ----------
+# 基线表结构：引入版本号时 (v1) 的模型定义，固定为显式 DDL。
+# 此后的表、列与索引变更都由各自的迁移步骤完成，基线不随模型变化。
+BASELINE_TABLES = {
+    "love_daily_ref": """
+        CREATE TABLE IF NOT EXISTS love_daily_ref (
+            id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            group_id VARCHAR NOT NULL,
+            user_id VARCHAR NOT NULL,
+            msg_sent INTEGER NOT NULL,
+            text_len_total INTEGER NOT NULL,
+            reply_sent INTEGER NOT NULL,
+            reply_received INTEGER NOT NULL,
+            poke_sent INTEGER NOT NULL,
+            poke_received INTEGER NOT NULL,
+            reaction_sent INTEGER NOT NULL,
+            reaction_received INTEGER NOT NULL,
+            recall_count INTEGER NOT NULL,
+            repeat_count INTEGER NOT NULL,
+            image_sent INTEGER NOT NULL,
+            topic_count INTEGER NOT NULL,
+            updated_at FLOAT NOT NULL,
+            PRIMARY KEY (id)
+        )""",
+    "message_owner_index": """
+        CREATE TABLE IF NOT EXISTS message_owner_index (
+            message_id VARCHAR NOT NULL,
+            user_id VARCHAR NOT NULL,
+            group_id VARCHAR NOT NULL,
+            timestamp FLOAT NOT NULL,
+            PRIMARY KEY (message_id)
+        )""",
+    "user_cooldown": """
+        CREATE TABLE IF NOT EXISTS user_cooldown (
+            user_id VARCHAR NOT NULL,
+            group_id VARCHAR NOT NULL,
+            last_rate_at FLOAT NOT NULL,
+            PRIMARY KEY (user_id, group_id)
+        )""",
+    "report_request_log": """
+        CREATE TABLE IF NOT EXISTS report_request_log (
+            date DATE NOT NULL,
+            group_id VARCHAR NOT NULL,
+            user_id VARCHAR NOT NULL,
+            nickname VARCHAR NOT NULL,
+            request_count INTEGER NOT NULL,
+            last_request_at FLOAT NOT NULL,
+            PRIMARY KEY (date, group_id, user_id)
+        )""",
+}
+
+BASELINE_INDEXES = (
+    ("ix_love_daily_ref_date", "love_daily_ref", ["date"]),
+    ("ix_love_daily_ref_group_id", "love_daily_ref", ["group_id"]),
+    ("ix_love_daily_ref_user_id", "love_daily_ref", ["user_id"]),
+)
+
+# 引入版本号之前的旧库可能缺少的列 (均带默认值，可直接 ADD COLUMN)
+BASELINE_COLUMNS = {
+    "love_daily_ref": [
+        (column, "INTEGER NOT NULL DEFAULT 0")
+        for column in (
+            "msg_sent",
+            "text_len_total",
+            "reply_sent",
+            "reply_received",
+            "poke_sent",
+            "poke_received",
+            "reaction_sent",
+            "reaction_received",
+            "recall_count",
+            "repeat_count",
+            "image_sent",
+            "topic_count",
+        )
+    ]
+    + [("updated_at", "FLOAT NOT NULL DEFAULT 0.0")],
+    "report_request_log": [
+        ("nickname", "VARCHAR NOT NULL DEFAULT ''"),
+        ("request_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("last_request_at", "FLOAT NOT NULL DEFAULT 0.0"),
+    ],
+}
+
+
+@migration(1, "基线表结构 (兼容引入版本号之前的旧库)")
+def _baseline(conn: Connection) -> None:
+    for ddl in BASELINE_TABLES.values():
+        conn.exec_driver_sql(ddl)
+
+    # 旧版 user_cooldown 不按群隔离，主键不同无法 ALTER；冷却记录可丢弃，直接重建
+    if table_columns(conn, "user_cooldown") != {"user_id", "group_id", "last_rate_at"}:
+        conn.exec_driver_sql("DROP TABLE user_cooldown")
+        conn.exec_driver_sql(BASELINE_TABLES["user_cooldown"])
+
+    # 其余表补齐旧库缺少的列
+    for table, columns in BASELINE_COLUMNS.items():
+        for column, ddl in columns:
+            add_column(conn, table, column, ddl)
+    for name, table, columns in BASELINE_INDEXES:
+        create_index(conn, name, table, columns)
+
+
+@migration(2, "移除与主键重复的 message_owner_index.message_id 索引")
+def _drop_redundant_message_index(conn: Connection) -> None:
+    # message_id 已是主键 (自带唯一索引)，额外索引只会拖慢每条消息的写入
+    drop_index(conn, "idx_message_id")
+
+
+@migration(3, "平台 ID 改为 INTEGER 存储，message_owner_index 改为 WITHOUT ROWID")
+def _integer_platform_ids(conn: Connection) -> None:
+    from ..models.tables import (
+        IdAlias,
+        LoveDailyRef,
+        MessageOwnerIndex,
+        ReportRequestLog,
+        UserCooldown,
+    )
+
+    IdAlias.__table__.create(conn, checkfirst=True)
+    rebuilt = [
+        table.name
+        for table in (
+            LoveDailyRef.__table__,
+            MessageOwnerIndex.__table__,
+            UserCooldown.__table__,
+            ReportRequestLog.__table__,
+        )
+        if rebuild_with_integer_ids(conn, table)
+    ]
+    if rebuilt:
+        # 旧表删除后空出的页不会自动归还，VACUUM 收缩文件 (不能在事务中执行)
+        conn.commit()
+        conn.exec_driver_sql("VACUUM")
+        logger.info(f"已重建为整数 ID 存储: {', '.join(rebuilt)}")
+
+
+@migration(4, "love_daily_ref 改用按查询设计的复合索引")
+def _composite_daily_indexes(conn: Connection) -> None:
+    from ..models.tables import LoveDailyRef
+
+    # 三个单列索引每次只能用上一个 (查询今日数据时要扫描当天全部行再过滤)，
+    # 且 date 索引是新复合索引的前缀
+    for name in (
+        "ix_love_daily_ref_date",
+        "ix_love_daily_ref_group_id",
+        "ix_love_daily_ref_user_id",
+    ):
+        drop_index(conn, name)
+    for index in LoveDailyRef.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    conn.exec_driver_sql("ANALYZE love_daily_ref")
+
+
+@migration(5, "新增群荣誉加成发放记录表 honor_bonus_ledger")
+def _honor_bonus_ledger(conn: Connection) -> None:
+    from ..models.tables import HonorBonusLedger
+
+    HonorBonusLedger.__table__.create(conn, checkfirst=True)
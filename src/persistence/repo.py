@@ -1,57 +1,76 @@
 import time
-from datetime import date
-from typing import cast
-
-from sqlalchemy import and_, select, update
-from sqlalchemy.engine import CursorResult
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql.elements import ColumnElement
-
-from ..models.tables import LoveDailyRef, MessageOwnerIndex, UserCooldown
+from datetime import date, timedelta
+
+from sqlalchemy import and_, bindparam, insert, select
+
+from ..models.dto import DailyCounters, MessageOwner
+from ..models.tables import (
+    HonorBonusLedger,
+    LoveDailyRef,
+    MessageOwnerIndex,
+    ReportRequestLog,
+    UserCooldown,
+)
 from .database import DBManager
+from .hot_tier import DailyHotTier
+
+DAILY = LoveDailyRef.__table__
+OWNERS = MessageOwnerIndex.__table__
+HONORS = HonorBonusLedger.__table__
+
+# 各群荣誉对今日计数的加成
+HONOR_BONUSES: dict[str, dict[str, int]] = {
+    "talkative": {"msg_sent": 20, "reply_received": 5},  # 龙王
+    "performer": {"reply_received": 10},  # 群聊之火
+    "emotion": {"image_sent": 5, "topic_count": 2},  # 快乐源泉
+}
+
+# 热路径语句在导入时构造一次，参数全部为 bindparam：
+# 每次调用不再重建表达式树，SQLAlchemy 按语句缓存键直接复用编译结果
+INSERT_OWNER = insert(OWNERS)
+INSERT_OWNER_IGNORE = insert(OWNERS).prefix_with("OR IGNORE")
+# 只返回本次新插入的发放记录 (已发放过的被 OR IGNORE 跳过，不出现在结果中)
+INSERT_HONORS_IGNORE = (
+    insert(HONORS).prefix_with("OR IGNORE").returning(HONORS.c.user_id, HONORS.c.honor)
+)
+SELECT_OWNER = select(OWNERS).where(OWNERS.c.message_id == bindparam("message_id"))
+SELECT_EXISTING_OWNERS = select(OWNERS.c.message_id).where(
+    OWNERS.c.message_id.in_(bindparam("message_ids", expanding=True))
+)
+SELECT_USER_DAY = select(DAILY).where(
+    and_(
+        DAILY.c.date == bindparam("date"),
+        DAILY.c.group_id == bindparam("group_id"),
+        DAILY.c.user_id == bindparam("user_id"),
+    )
+)
+SELECT_USER_RANGE = (
+    select(DAILY)
+    .where(
+        and_(
+            DAILY.c.group_id == bindparam("group_id"),
+            DAILY.c.user_id == bindparam("user_id"),
+            DAILY.c.date >= bindparam("start_date"),
+            DAILY.c.date <= bindparam("end_date"),
+        )
+    )
+    .order_by(DAILY.c.date)
+)
 
 
 class LoveRepo:
-    """数据仓库，封装所有的数据库交互逻辑"""
+    """
+    数据仓库，封装所有的数据库交互逻辑。
+    今日与昨日的每日计数由内存热层 (DailyHotTier) 负责读写并定期落盘，
+    更早日期的数据直接查询数据库；读取结果统一为 DailyCounters。
+    """
 
-    def __init__(self, db_manager: DBManager):
+    def __init__(self, db_manager: DBManager, hot: DailyHotTier | None = None):
         self.db = db_manager
-
-    async def get_or_create_daily_ref(
-        self, session: AsyncSession, group_id: str, user_id: str
-    ) -> LoveDailyRef:
-        """并发安全的 get_or_create"""
-        today = date.today()
-
-        stmt = select(LoveDailyRef).where(
-            and_(
-                LoveDailyRef.date == today,
-                LoveDailyRef.group_id == group_id,
-                LoveDailyRef.user_id == user_id,
-            )
-        )
-
-        result = await session.execute(stmt)
-        record = result.scalar_one_or_none()
-        if record:
-            return record
-
-        record = LoveDailyRef(
-            date=today,
-            group_id=group_id,
-            user_id=user_id,
-            updated_at=time.time(),
-        )
-        session.add(record)
-
-        try:
-            await session.flush()
-            return record
-        except IntegrityError:
-            # 并发下被其他事务插入，重新读取
-            result = await session.execute(stmt)
-            return result.scalar_one()
+        self.hot = hot or DailyHotTier(db_manager)
+        # 今日已确认发放过的荣誉 (group_id, user_id, honor)，命中时无需再访问数据库
+        self._honors_day = date.today()
+        self._honors_applied: set[tuple[str, str, str]] = set()
 
     async def update_msg_stats(
         self,
@@ -60,28 +79,14 @@ class LoveRepo:
         text_len: int,
         image_count: int = 0,
     ) -> None:
-        """更新消息统计（原子 UPDATE，极高频）"""
-        async with self.db.get_session() as session:
-            stmt = (
-                update(LoveDailyRef)
-                .where(
-                    and_(
-                        LoveDailyRef.date == date.today(),
-                        LoveDailyRef.group_id == group_id,
-                        LoveDailyRef.user_id == user_id,
-                    )
-                )
-                .values(
-                    msg_sent=LoveDailyRef.msg_sent + 1,
-                    text_len_total=LoveDailyRef.text_len_total + text_len,
-                    image_sent=LoveDailyRef.image_sent + image_count,
-                    updated_at=time.time(),
-                )
-            )
-            result: CursorResult = await session.execute(stmt)
-            if result.rowcount == 0:
-                await self.get_or_create_daily_ref(session, group_id, user_id)
-                await session.execute(stmt)
+        """更新消息统计（极高频，只在内存中累加）"""
+        await self.hot.increment(
+            group_id,
+            user_id,
+            msg_sent=1,
+            text_len_total=text_len,
+            image_sent=image_count,
+        )
 
     async def update_interaction_sent(
         self,
@@ -92,29 +97,14 @@ class LoveRepo:
         reaction: int = 0,
         recall: int = 0,
     ) -> None:
-        async with self.db.get_session() as session:
-            stmt = (
-                update(LoveDailyRef)
-                .where(
-                    and_(
-                        LoveDailyRef.date == date.today(),
-                        LoveDailyRef.group_id == group_id,
-                        LoveDailyRef.user_id == user_id,
-                    )
-                )
-                .values(
-                    poke_sent=LoveDailyRef.poke_sent + poke,
-                    reply_sent=LoveDailyRef.reply_sent + reply,
-                    reaction_sent=LoveDailyRef.reaction_sent + reaction,
-                    recall_count=LoveDailyRef.recall_count + recall,
-                    updated_at=time.time(),
-                )
-            )
-
-            result: CursorResult = await session.execute(stmt)
-            if result.rowcount == 0:
-                await self.get_or_create_daily_ref(session, group_id, user_id)
-                await session.execute(stmt)
+        await self.hot.increment(
+            group_id,
+            user_id,
+            poke_sent=poke,
+            reply_sent=reply,
+            reaction_sent=reaction,
+            recall_count=recall,
+        )
 
     async def update_interaction_received(
         self,
@@ -124,28 +114,13 @@ class LoveRepo:
         reply: int = 0,
         reaction: int = 0,
     ) -> None:
-        async with self.db.get_session() as session:
-            stmt = (
-                update(LoveDailyRef)
-                .where(
-                    and_(
-                        LoveDailyRef.date == date.today(),
-                        LoveDailyRef.group_id == group_id,
-                        LoveDailyRef.user_id == user_id,
-                    )
-                )
-                .values(
-                    poke_received=LoveDailyRef.poke_received + poke,
-                    reply_received=LoveDailyRef.reply_received + reply,
-                    reaction_received=LoveDailyRef.reaction_received + reaction,
-                    updated_at=time.time(),
-                )
-            )
-
-            result: CursorResult = await session.execute(stmt)
-            if result.rowcount == 0:
-                await self.get_or_create_daily_ref(session, group_id, user_id)
-                await session.execute(stmt)
+        await self.hot.increment(
+            group_id,
+            user_id,
+            poke_received=poke,
+            reply_received=reply,
+            reaction_received=reaction,
+        )
 
     async def update_behavior_stats(
         self,
@@ -154,27 +129,9 @@ class LoveRepo:
         topic_inc: int = 0,
         repeat_inc: int = 0,
     ) -> None:
-        async with self.db.get_session() as session:
-            stmt = (
-                update(LoveDailyRef)
-                .where(
-                    and_(
-                        LoveDailyRef.date == date.today(),
-                        LoveDailyRef.group_id == group_id,
-                        LoveDailyRef.user_id == user_id,
-                    )
-                )
-                .values(
-                    topic_count=LoveDailyRef.topic_count + topic_inc,
-                    repeat_count=LoveDailyRef.repeat_count + repeat_inc,
-                    updated_at=time.time(),
-                )
-            )
-
-            result = await session.execute(stmt)
-            if result.rowcount == 0:
-                await self.get_or_create_daily_ref(session, group_id, user_id)
-                await session.execute(stmt)
+        await self.hot.increment(
+            group_id, user_id, topic_count=topic_inc, repeat_count=repeat_inc
+        )
 
     async def save_message_index(
         self,
@@ -182,32 +139,31 @@ class LoveRepo:
         group_id: str,
         user_id: str,
     ) -> None:
-        async with self.db.get_session() as session:
-            session.add(
-                MessageOwnerIndex(
-                    message_id=message_id,
-                    group_id=group_id,
-                    user_id=user_id,
-                    timestamp=time.time(),
-                )
+        async with self.db.write() as conn:
+            await conn.execute(
+                INSERT_OWNER,
+                {
+                    "message_id": message_id,
+                    "group_id": group_id,
+                    "user_id": user_id,
+                    "timestamp": time.time(),
+                },
             )
 
     async def get_message_owner(
         self,
         message_id: str,
-    ) -> MessageOwnerIndex | None:
-        async with self.db.get_session() as session:
-            stmt = select(MessageOwnerIndex).where(
-                and_(MessageOwnerIndex.message_id == message_id)
-            )
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+    ) -> MessageOwner | None:
+        async with self.db.read() as conn:
+            result = await conn.execute(SELECT_OWNER, {"message_id": message_id})
+            row = result.mappings().first()
+            return MessageOwner.from_mapping(row) if row else None
 
     async def get_today_data(
         self,
         group_id: str,
         user_id: str,
-    ) -> LoveDailyRef | None:
+    ) -> DailyCounters | None:
         return await self.get_data_by_date(
             group_id,
             user_id,
@@ -219,56 +175,176 @@ class LoveRepo:
         group_id: str,
         user_id: str,
         target_date: date,
-    ) -> LoveDailyRef | None:
-        async with self.db.get_session() as session:
-            stmt = select(LoveDailyRef).where(
-                and_(
-                    LoveDailyRef.date == target_date,
-                    LoveDailyRef.group_id == group_id,
-                    LoveDailyRef.user_id == user_id,
+    ) -> DailyCounters | None:
+        if self.hot.retained(target_date):
+            return await self.hot.get(target_date, group_id, user_id)
+        async with self.db.read() as conn:
+            result = await conn.execute(
+                SELECT_USER_DAY,
+                {"date": target_date, "group_id": group_id, "user_id": user_id},
+            )
+            row = result.mappings().first()
+            return DailyCounters.from_mapping(row) if row else None
+
+    async def get_group_daily_refs(
+        self,
+        group_id: str,
+        target_date: date,
+        min_msg: int = 0,
+        limit: int | None = None,
+    ) -> list[DailyCounters]:
+        """获取某群某日的全部用户数据 (按发言数降序)，用于群榜单与批量判词"""
+        if self.hot.retained(target_date):
+            rows = await self.hot.table(target_date)
+            refs = sorted(
+                (
+                    ref
+                    for (gid, _), ref in rows.items()
+                    if gid == group_id and ref.msg_sent >= min_msg
+                ),
+                key=lambda ref: ref.msg_sent,
+                reverse=True,
+            )
+            return refs[:limit] if limit else refs
+
+        async with self.db.read() as conn:
+            stmt = (
+                select(DAILY)
+                .where(
+                    and_(
+                        DAILY.c.date == target_date,
+                        DAILY.c.group_id == group_id,
+                        DAILY.c.msg_sent >= min_msg,
+                    )
                 )
+                .order_by(DAILY.c.msg_sent.desc())
             )
-            result = await session.execute(stmt)
-            return result.scalar_one_or_none()
+            if limit:
+                stmt = stmt.limit(limit)
+            result = await conn.execute(stmt)
+            return [DailyCounters.from_mapping(row) for row in result.mappings()]
+
+    async def get_user_days(
+        self,
+        group_id: str,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> dict[date, DailyCounters]:
+        """
+        获取某用户在 [start_date, end_date] 区间内的每日数据，按日期索引。
+        热层保留的日期直接读内存，其余日期合并为一次走
+        (group_id, user_id, date) 索引的区间查询；区间全部落在热层内时不访问数据库。
+        """
+        hot_start = date.today() - timedelta(days=self.hot.RETAIN_DAYS - 1)
+        by_day: dict[date, DailyCounters] = {}
+        if start_date < hot_start:
+            async with self.db.read() as conn:
+                result = await conn.execute(
+                    SELECT_USER_RANGE,
+                    {
+                        "group_id": group_id,
+                        "user_id": user_id,
+                        "start_date": start_date,
+                        "end_date": min(end_date, hot_start - timedelta(days=1)),
+                    },
+                )
+                for row in result.mappings():
+                    by_day[row["date"]] = DailyCounters.from_mapping(row)
+
+        # 热层中的日期以内存为准 (可能尚未落盘)
+        day = max(start_date, hot_start)
+        while day <= end_date and self.hot.retained(day):
+            if ref := await self.hot.get(day, group_id, user_id):
+                by_day[day] = ref
+            day += timedelta(days=1)
+        return by_day
+
+    async def get_user_daily_refs(
+        self,
+        group_id: str,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> list[DailyCounters]:
+        """获取某用户在 [start_date, end_date] 区间内的每日数据 (按日期升序)，用于趋势"""
+        by_day = await self.get_user_days(group_id, user_id, start_date, end_date)
+        return [by_day[d] for d in sorted(by_day)]
+
+    async def get_today_and_yesterday(
+        self, group_id: str, user_id: str
+    ) -> tuple[DailyCounters | None, DailyCounters | None]:
+        """报告路径一次取回今日与昨日数据"""
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        by_day = await self.get_user_days(group_id, user_id, yesterday, today)
+        return by_day.get(today), by_day.get(yesterday)
 
     async def apply_honor_bonus(
         self,
         group_id: str,
         honor_data: dict,
-    ) -> int:
-        async with self.db.get_session() as session:
-            if not honor_data:
-                return 0
-
-            honor_count = 0
-
-            async def apply(uid: str, **inc):
-                nonlocal honor_count
-                ref = await self.get_or_create_daily_ref(session, group_id, uid)
-                for k, v in inc.items():
-                    setattr(ref, k, getattr(ref, k) + v)
-                ref.updated_at = time.time()
-                honor_count += 1
-
-            if talkative := honor_data.get("talkative"):
-                uid = str(talkative.get("user_id"))
-                if uid:
-                    await apply(uid, msg_sent=20, reply_received=5)
-
-            for p in honor_data.get("performer", []):
-                uid = str(p.get("user_id"))
-                if uid:
-                    await apply(uid, reply_received=10)
-
-            for e in honor_data.get("emotion", []):
-                uid = str(e.get("user_id"))
-                if uid:
-                    ref = await self.get_or_create_daily_ref(session, group_id, uid)
-                    ref.image_sent += 5
-                    ref.topic_count += 2
-                    ref.updated_at = time.time()
-                    honor_count += 1
-        return honor_count
+    ) -> dict[str, DailyCounters]:
+        """
+        按群荣誉加成今日计数，同一用户的同一荣誉每天最多加成一次。
+        发放记录以一条 INSERT OR IGNORE 批量写入 honor_bonus_ledger，只有新插入的
+        记录才累加计数，随后计数立即落盘。返回被更新的今日行 (按用户 ID)
+        """
+        today = date.today()
+        if today != self._honors_day:
+            self._honors_day = today
+            self._honors_applied = set()
+
+        pending = [
+            (uid, honor)
+            for uid, honor in self._honorees(honor_data)
+            if (group_id, uid, honor) not in self._honors_applied
+        ]
+        if not pending:
+            return {}
+
+        now = time.time()
+        async with self.db.write() as conn:
+            result = await conn.execute(
+                INSERT_HONORS_IGNORE,
+                [
+                    {
+                        "date": today,
+                        "group_id": group_id,
+                        "user_id": uid,
+                        "honor": honor,
+                        "applied_at": now,
+                    }
+                    for uid, honor in pending
+                ],
+            )
+            granted = result.all()
+        self._honors_applied.update((group_id, uid, honor) for uid, honor in pending)
+
+        updated: dict[str, DailyCounters] = {}
+        for uid, honor in granted:
+            updated[uid] = await self.hot.increment(
+                group_id, uid, **HONOR_BONUSES[honor]
+            )
+        if updated:
+            # 发放记录已提交，加成也立即落盘，避免崩溃后记录在而加成丢失
+            await self.hot.checkpoint()
+        return updated
+
+    @staticmethod
+    def _honorees(honor_data: dict) -> list[tuple[str, str]]:
+        """把 get_group_honor_info 的返回值展开为去重的 [(user_id, honor)]"""
+        if not honor_data:
+            return []
+        pairs: dict[tuple[str, str], None] = {}
+        for honor in HONOR_BONUSES:
+            holders = honor_data.get(honor) or []
+            if isinstance(holders, dict):
+                holders = [holders]  # talkative 为单个对象
+            for holder in holders:
+                if uid := holder.get("user_id"):
+                    pairs[(str(uid), honor)] = None
+        return list(pairs)
 
     async def check_and_update_cooldown(
         self, user_id: str, group_id: str, cooldown_sec: int
@@ -297,121 +373,85 @@ class LoveRepo:
 
             return 0
 
+    async def record_report_request(
+        self, group_id: str, user_id: str, nickname: str = ""
+    ) -> None:
+        """记录一次今日人设请求 (按日期/群组/用户累加)"""
+        now = time.time()
+        async with self.db.get_session() as session:
+            stmt = select(ReportRequestLog).where(
+                and_(
+                    ReportRequestLog.date == date.today(),
+                    ReportRequestLog.group_id == group_id,
+                    ReportRequestLog.user_id == user_id,
+                )
+            )
+            result = await session.execute(stmt)
+            record = result.scalar_one_or_none()
+
+            if record:
+                record.request_count += 1
+                record.last_request_at = now
+                if nickname:
+                    record.nickname = nickname
+            else:
+                session.add(
+                    ReportRequestLog(
+                        date=date.today(),
+                        group_id=group_id,
+                        user_id=user_id,
+                        nickname=nickname or "",
+                        request_count=1,
+                        last_request_at=now,
+                    )
+                )
+
+    async def get_report_requests(self, target_date: date) -> list[ReportRequestLog]:
+        """获取某日的全部今日人设请求记录"""
+        async with self.db.get_read_session() as session:
+            stmt = select(ReportRequestLog).where(ReportRequestLog.date == target_date)
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+
     async def batch_backfill(
         self,
         group_id: str,
-        msg_indexes: list[MessageOwnerIndex],
+        msg_indexes: list[MessageOwner],
         msg_stats: dict[str, dict],
         behavior_stats: dict[str, dict],
         interaction_sent: dict[str, dict],
         interaction_received: dict[str, dict],
-    ) -> None:
-        """历史回填批量写入（单事务）"""
-        async with self.db.get_session() as session:
-            today = date.today()
-            now = time.time()
-
-            if msg_indexes:
-                # 检查输入数据是否包含重复的 message_id
-                unique_msgs = []
-                seen_ids = set()
-                for msg in msg_indexes:
-                    if msg.message_id not in seen_ids:
-                        seen_ids.add(msg.message_id)
-                        unique_msgs.append(msg)
-                msg_indexes = unique_msgs
-
-                # 过滤已存在的 message_id
-                msg_ids = [m.message_id for m in msg_indexes]
-                message_id_col = cast(ColumnElement[str], MessageOwnerIndex.message_id)
-                stmt = select(MessageOwnerIndex.message_id).where(
-                    message_id_col.in_(msg_ids)
-                )
-                result = await session.execute(stmt)
-                existed_ids = {row[0] for row in result.all()}
-                msg_indexes = [
-                    m for m in msg_indexes if m.message_id not in existed_ids
-                ]
-
-            if msg_indexes:
-                session.add_all(msg_indexes)
-
-            all_users = {
-                *msg_stats.keys(),
-                *behavior_stats.keys(),
-                *interaction_sent.keys(),
-                *interaction_received.keys(),
-            }
-
-            for uid in all_users:
-                await self.get_or_create_daily_ref(session, group_id, uid)
-
-            for uid, v in msg_stats.items():
-                await session.execute(
-                    update(LoveDailyRef)
-                    .where(
-                        and_(
-                            LoveDailyRef.date == today,
-                            LoveDailyRef.group_id == group_id,
-                            LoveDailyRef.user_id == uid,
-                        )
-                    )
-                    .values(
-                        msg_sent=LoveDailyRef.msg_sent + v["msg"],
-                        text_len_total=LoveDailyRef.text_len_total + v["text"],
-                        image_sent=LoveDailyRef.image_sent + v["image"],
-                        updated_at=now,
-                    )
+    ) -> dict[str, DailyCounters]:
+        """
+        历史回填批量写入：消息索引单事务写入，计数累加到热层后立即落盘。
+        返回被更新的今日行 (按用户 ID)，调用方无需再次读取
+        """
+        if msg_indexes:
+            # 重复或已存在的 message_id 由 INSERT OR IGNORE 跳过，无需先查询
+            async with self.db.write() as conn:
+                await conn.execute(
+                    INSERT_OWNER_IGNORE, [m.model_dump() for m in msg_indexes]
                 )
 
-            for uid, v in behavior_stats.items():
-                await session.execute(
-                    update(LoveDailyRef)
-                    .where(
-                        and_(
-                            LoveDailyRef.date == today,
-                            LoveDailyRef.group_id == group_id,
-                            LoveDailyRef.user_id == uid,
-                        )
-                    )
-                    .values(
-                        topic_count=LoveDailyRef.topic_count + v["topic"],
-                        repeat_count=LoveDailyRef.repeat_count + v["repeat"],
-                        updated_at=now,
-                    )
-                )
+        updated: dict[str, DailyCounters] = {}
 
-            for uid, v in interaction_sent.items():
-                await session.execute(
-                    update(LoveDailyRef)
-                    .where(
-                        and_(
-                            LoveDailyRef.date == today,
-                            LoveDailyRef.group_id == group_id,
-                            LoveDailyRef.user_id == uid,
-                        )
-                    )
-                    .values(
-                        reply_sent=LoveDailyRef.reply_sent + v.get("reply", 0),
-                        updated_at=now,
-                    )
-                )
+        async def apply(uid: str, **inc):
+            updated[uid] = await self.hot.increment(group_id, uid, **inc)
 
-            for uid, v in interaction_received.items():
-                await session.execute(
-                    update(LoveDailyRef)
-                    .where(
-                        and_(
-                            LoveDailyRef.date == today,
-                            LoveDailyRef.group_id == group_id,
-                            LoveDailyRef.user_id == uid,
-                        )
-                    )
-                    .values(
-                        reply_received=LoveDailyRef.reply_received + v.get("reply", 0),
-                        updated_at=now,
-                    )
-                )
+        for uid, v in msg_stats.items():
+            await apply(
+                uid, msg_sent=v["msg"], text_len_total=v["text"], image_sent=v["image"]
+            )
+        for uid, v in behavior_stats.items():
+            await apply(uid, topic_count=v["topic"], repeat_count=v["repeat"])
+        for uid, v in interaction_sent.items():
+            await apply(uid, reply_sent=v.get("reply", 0))
+        for uid, v in interaction_received.items():
+            await apply(uid, reply_received=v.get("reply", 0))
+
+        # 消息索引已提交，对应的计数也立即落盘，避免崩溃后这批消息不再被回填
+        await self.hot.checkpoint()
+        return updated
 
     async def filter_existing_message_ids(self, message_ids: list[str]) -> set[str]:
         """
@@ -421,10 +461,8 @@ class LoveRepo:
         if not message_ids:
             return set()
 
-        async with self.db.get_session() as session:
-            message_id_col = cast(ColumnElement[str], MessageOwnerIndex.message_id)
-            stmt = select(MessageOwnerIndex.message_id).where(
-                message_id_col.in_(message_ids)
+        async with self.db.read() as conn:
+            result = await conn.execute(
+                SELECT_EXISTING_OWNERS, {"message_ids": message_ids}
             )
-            result = await session.execute(stmt)
-            return {row[0] for row in result.all()}
+            return set(result.scalars())
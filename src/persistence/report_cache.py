@@ -0,0 +1,105 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import date
+
+
+class CachedReport:
+    """一张已生成的今日人设卡片及其生成时的数据快照"""
+
+    __slots__ = (
+        "day",
+        "nickname",
+        "scores",
+        "archetype_key",
+        "image_path",
+        "created_at",
+    )
+
+    def __init__(
+        self,
+        day: date,
+        nickname: str,
+        scores: dict,
+        archetype_key: str,
+        image_path: str,
+    ):
+        self.day = day
+        self.nickname = nickname
+        self.scores = scores
+        self.archetype_key = archetype_key
+        self.image_path = image_path
+        self.created_at = time.time()
+
+
+class ReportCache:
+    """
+    今日人设结果缓存 (按群/用户)。
+    交互请求与离峰预计算生成的卡片都会写入这里；当用户数据没有实质变化
+    (人设不变且各项分值变化不超过容差) 时直接复用已生成的卡片。
+    """
+
+    SCORE_KEYS = ("simp", "vibe", "ick", "nostalgia", "score")
+
+    def __init__(self, tolerance: int = 5, max_entries: int = 2000):
+        self.tolerance = tolerance
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], CachedReport] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        group_id: str,
+        user_id: str,
+        nickname: str,
+        scores: dict,
+        archetype_key: str,
+    ) -> CachedReport | None:
+        key = (str(group_id), str(user_id))
+        entry = self._entries.get(key)
+        if entry and self._is_fresh(entry, nickname, scores, archetype_key):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        if entry and entry.day != date.today():
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        group_id: str,
+        user_id: str,
+        nickname: str,
+        scores: dict,
+        archetype_key: str,
+        image_path: str,
+    ) -> None:
+        key = (str(group_id), str(user_id))
+        self._entries[key] = CachedReport(
+            date.today(),
+            nickname,
+            {k: scores.get(k, 0) for k in self.SCORE_KEYS},
+            archetype_key,
+            image_path,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _is_fresh(
+        self, entry: CachedReport, nickname: str, scores: dict, archetype_key: str
+    ) -> bool:
+        if entry.day != date.today():
+            return False
+        if entry.nickname != nickname or entry.archetype_key != archetype_key:
+            return False
+        for k in self.SCORE_KEYS:
+            if abs(entry.scores.get(k, 0) - scores.get(k, 0)) > self.tolerance:
+                return False
+        return bool(entry.image_path) and os.path.exists(entry.image_path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
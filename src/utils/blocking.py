@@ -0,0 +1,69 @@
+import asyncio
+import base64
+import functools
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .metrics import MetricsRegistry
+
+# 3 的整数倍，保证分块编码结果可以直接拼接 (中间块不产生 "=" 填充)
+B64_CHUNK_SIZE = 3 * 64 * 1024
+
+
+def b64encode_file(path: str, chunk_size: int = B64_CHUNK_SIZE) -> str:
+    """分块读取并编码文件，避免一次性读入整个文件再整体编码 (阻塞调用)"""
+    if chunk_size % 3:
+        raise ValueError("chunk_size 必须是 3 的整数倍")
+    parts = []
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+class BlockingExecutor:
+    """
+    插件专用的有界线程池，承载渲染与发送路径上的阻塞 I/O 和 CPU 工作
+    (Jinja 渲染、读回截图文件、Base64 编码等)。
+    与 asyncio 默认线程池隔离，避免占满其他插件共用的默认执行器；
+    按标签导出 blocking.<label> 耗时 (含排队)。
+    """
+
+    THREAD_NAME_PREFIX = "love_formula_io"
+
+    def __init__(self, workers: int = 4, metrics: MetricsRegistry | None = None):
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """已提交但尚未完成的任务数"""
+        return self._pending
+
+    async def run(self, label: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=self.THREAD_NAME_PREFIX
+            )
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        self._pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._pool, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+            if self.metrics:
+                self.metrics.observe(
+                    f"blocking.{label}", (time.perf_counter() - start) * 1000
+                )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
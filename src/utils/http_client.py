@@ -0,0 +1,82 @@
+import time
+from types import SimpleNamespace
+
+import aiohttp
+
+from .metrics import MetricsRegistry
+
+
+class SharedHttpClient:
+    """
+    插件级共享 HTTP 客户端。
+    会话在首次访问 session 时创建、terminate() 中关闭；keep-alive 连接池按主机限流并缓存 DNS，
+    渲染器等所有 HTTP 拉取方共用同一个会话，避免每张卡片重复建立 TCP/TLS 连接。
+    """
+
+    LIMIT = 32  # 连接池总上限
+    LIMIT_PER_HOST = 8  # 单主机连接上限
+    DNS_TTL = 300  # DNS 缓存秒数
+    KEEPALIVE_TIMEOUT = 30  # 空闲连接保活秒数
+    DEFAULT_TIMEOUT = 10
+
+    def __init__(self, metrics: MetricsRegistry | None = None):
+        self.metrics = metrics
+        self._session: aiohttp.ClientSession | None = None
+        self.stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享会话；首次访问或关闭后再次访问时创建"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.LIMIT,
+            limit_per_host=self.LIMIT_PER_HOST,
+            ttl_dns_cache=self.DNS_TTL,
+            keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.DEFAULT_TIMEOUT),
+            trace_configs=[self._trace_config()],
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx: SimpleNamespace, params):
+            ctx.start = time.perf_counter()
+            self.stats["requests"] += 1
+
+        async def on_request_end(session, ctx: SimpleNamespace, params):
+            if self.metrics and hasattr(ctx, "start"):
+                self.metrics.observe(
+                    f"http.{params.url.host}", (time.perf_counter() - ctx.start) * 1000
+                )
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats["new_connections"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats["reused_connections"] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def snapshot(self) -> dict:
+        total = self.stats["new_connections"] + self.stats["reused_connections"]
+        return {
+            **self.stats,
+            "reuse_rate": self.stats["reused_connections"] / total if total else 0,
+        }
@@ -0,0 +1,40 @@
+import asyncio
+import contextlib
+
+from .metrics import MetricsRegistry
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监控。
+    后台任务每隔 INTERVAL 秒休眠一次，实际唤醒时间与预期的差值即为这段时间内
+    事件循环被同步代码阻塞的时长，记录为 loop.lag (毫秒) 并保留历史最大值。
+    """
+
+    INTERVAL = 0.25
+
+    def __init__(self, metrics: MetricsRegistry, interval: float = INTERVAL):
+        self.metrics = metrics
+        self.interval = interval
+        self.max_lag_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - expected) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self.metrics.observe("loop.lag", lag_ms)
@@ -0,0 +1,65 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class MetricSeries:
+    """单项指标的滚动样本窗口 (毫秒)"""
+
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self, window: int):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": self.count, "avg": 0.0, "p50": 0.0, "p95": 0.0}
+        return {
+            "count": self.count,
+            "avg": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        }
+
+
+class MetricsRegistry:
+    """
+    轻量的进程内指标注册表。
+    按名称记录耗时等数值样本，只保留最近 WINDOW 个用于计算分位数。
+    """
+
+    WINDOW = 200
+
+    def __init__(self):
+        self._series: dict[str, MetricSeries] = {}
+
+    def observe(self, name: str, value: float) -> None:
+        series = self._series.get(name)
+        if series is None:
+            series = MetricSeries(self.WINDOW)
+            self._series[name] = series
+        series.add(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """记录代码块耗时 (毫秒)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self, prefix: str = "") -> dict[str, dict]:
+        return {
+            name: series.summary()
+            for name, series in sorted(self._series.items())
+            if name.startswith(prefix)
+        }
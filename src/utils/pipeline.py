@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+from .metrics import MetricsRegistry
+
+
+class StagePipeline:
+    """
+    按依赖关系并发执行的阶段流水线 (小型 DAG)。
+    每个阶段在 add() 时立即启动：先等待依赖阶段完成，再以依赖结果 (按声明顺序)
+    作为位置参数调用阶段函数。互不依赖的阶段因此天然并发。
+    每个阶段的开始偏移与耗时都会记录下来，并写入 MetricsRegistry。
+    """
+
+    def __init__(self, name: str, metrics: MetricsRegistry | None = None):
+        self.name = name
+        self.metrics = metrics
+        self.started_at = time.perf_counter()
+        # name -> (相对流水线开始的偏移 ms, 阶段自身耗时 ms)
+        self.timings: dict[str, tuple[float, float]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable],
+        deps: Iterable[str] = (),
+    ) -> asyncio.Task:
+        if name in self._tasks:
+            raise ValueError(f"阶段重复定义: {name}")
+        dep_tasks = []
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"阶段 {name} 依赖了未定义的阶段 {dep}")
+            dep_tasks.append(self._tasks[dep])
+
+        task = asyncio.create_task(self._run_stage(name, func, dep_tasks))
+        self._tasks[name] = task
+        return task
+
+    async def _run_stage(self, name: str, func, dep_tasks: list[asyncio.Task]):
+        # asyncio.shield 避免本阶段被取消时连带取消共享的依赖阶段
+        args = [await asyncio.shield(t) for t in dep_tasks]
+        start = time.perf_counter()
+        cancelled = False
+        try:
+            return await func(*args)
+        except asyncio.CancelledError:
+            # 被提前取消的阶段 (如命中缓存后不再需要的预取) 不计入耗时统计
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                end = time.perf_counter()
+                self.timings[name] = (
+                    (start - self.started_at) * 1000,
+                    (end - start) * 1000,
+                )
+                if self.metrics:
+                    self.metrics.observe(f"stage.{name}", (end - start) * 1000)
+
+    async def result(self, name: str):
+        """等待并返回某个阶段的结果 (阶段异常会原样抛出)"""
+        return await asyncio.shield(self._tasks[name])
+
+    async def close(self) -> float:
+        """取消仍未完成的阶段并回收所有任务，返回流水线总耗时 (ms)"""
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for task in pending:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+        total = (time.perf_counter() - self.started_at) * 1000
+        if self.metrics:
+            self.metrics.observe(f"{self.name}.total", total)
+        return total
+
+    def format_timings(self) -> str:
+        """按开始时间排序的阶段耗时摘要，便于日志排查"""
+        items = sorted(self.timings.items(), key=lambda kv: kv[1][0])
+        return " ".join(
+            f"{name}=+{offset:.0f}/{cost:.0f}ms" for name, (offset, cost) in items
+        )
@@ -0,0 +1,362 @@
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from astrbot.api import logger
+
+from ..utils.blocking import BlockingExecutor
+
+AVATAR_URL = "https://q1.qlogo.cn/g?b=qq&nk={uid}&s={size}"
+
+
+class AvatarEntry:
+    """一份已下载的头像及其 HTTP 校验信息"""
+
+    __slots__ = ("data_uri", "size", "etag", "last_modified", "fetched_at")
+
+    def __init__(
+        self,
+        data_uri: str,
+        size: int,
+        etag: str = "",
+        last_modified: str = "",
+        fetched_at: float = 0.0,
+    ):
+        self.data_uri = data_uri
+        self.size = size  # 原始图片字节数
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class AvatarCache:
+    """
+    两级头像缓存，按 (uid, 尺寸) 索引。
+    - 内存层：LRU 保存已编码的 data URI，按字节数限额；
+    - 磁盘层：原始图片 + 元数据 (ETag / Last-Modified)，按总大小限额淘汰最旧文件。
+    超过 TTL 的条目用条件请求重新校验，304 时直接续期；同一头像的并发请求合并为一次下载。
+    磁盘读写在共享的 BlockingExecutor 中执行。
+    """
+
+    REQUEST_TIMEOUT = 5
+    ENCODED_PREFIX = "~"  # 非纯数字/小写字母的 uid 以 "~" + 十六进制编码作为文件名
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: float = 86400,
+        memory_limit: int = 16 * 1024 * 1024,
+        disk_limit: int = 64 * 1024 * 1024,
+        executor: BlockingExecutor | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.executor = executor or BlockingExecutor()
+        self.ttl = ttl
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+
+        self._memory: OrderedDict[tuple[str, int], AvatarEntry] = OrderedDict()
+        self._memory_bytes = 0
+        # 磁盘索引: key -> 文件大小，按最近使用排序
+        self._disk_index: OrderedDict[tuple[str, int], int] | None = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._inflight: dict[tuple[str, int], asyncio.Future] = {}
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "revalidated": 0,
+            "downloads": 0,
+            "failures": 0,
+            "coalesced": 0,
+            "bytes_saved": 0,
+            "bytes_downloaded": 0,
+        }
+
+    # ---------- 对外接口 ----------
+    async def get(
+        self, uid: str, size: int, session: aiohttp.ClientSession
+    ) -> str | None:
+        """返回头像 data URI，下载失败且无旧副本时返回 None"""
+        key = (str(uid), int(size))
+
+        entry = self._memory.get(key)
+        if entry and not self._expired(entry):
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            self.stats["bytes_saved"] += entry.size
+            return entry.data_uri
+
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if inflight.cancelled():
+                    return None  # 发起下载的请求被取消，本次按未命中处理
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data_uri = await self._load(key, entry, session)
+            future.set_result(data_uri)
+            return data_uri
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled():
+                # 没有其他等待者时也要取走异常，避免 "never retrieved" 警告
+                future.exception()
+
+    def snapshot(self) -> dict:
+        lookups = (
+            self.stats["memory_hits"]
+            + self.stats["disk_hits"]
+            + self.stats["revalidated"]
+            + self.stats["downloads"]
+            + self.stats["failures"]
+        )
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_rate": (hits + self.stats["revalidated"]) / lookups if lookups else 0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk_index or {}),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # ---------- 加载流程 ----------
+    async def _load(
+        self,
+        key: tuple[str, int],
+        entry: AvatarEntry | None,
+        session: aiohttp.ClientSession,
+    ) -> str | None:
+        if entry is None:
+            entry = await self.executor.run("avatar_disk", self._read_disk, key)
+            if entry and not self._expired(entry):
+                self.stats["disk_hits"] += 1
+                self.stats["bytes_saved"] += entry.size
+                self._remember(key, entry)
+                return entry.data_uri
+
+        fresh = await self._download(key, entry, session)
+        if fresh is not None:
+            self._remember(key, fresh)
+            return fresh.data_uri
+
+        if entry is not None:
+            # 网络失败时退回过期副本，总好过默认头像
+            self._remember(key, entry)
+            return entry.data_uri
+        return None
+
+    async def _download(
+        self,
+        key: tuple[str, int],
+        stale: AvatarEntry | None,
+        session: aiohttp.ClientSession,
+    ) -> AvatarEntry | None:
+        uid, size = key
+        url = AVATAR_URL.format(uid=uid, size=size)
+        headers = {}
+        if stale:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        try:
+            async with session.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT),
+            ) as resp:
+                if resp.status == 304 and stale:
+                    self.stats["revalidated"] += 1
+                    self.stats["bytes_saved"] += stale.size
+                    stale.fetched_at = time.time()
+                    await self.executor.run("avatar_disk", self._touch_disk, key, stale)
+                    return stale
+                if resp.status != 200:
+                    raise RuntimeError(f"HTTP {resp.status}")
+
+                content = await resp.read()
+                content_type = resp.headers.get("Content-Type", "image/jpeg")
+                if not content_type.startswith("image/"):
+                    content_type = "image/jpeg"
+                entry = AvatarEntry(
+                    f"data:{content_type};base64,{base64.b64encode(content).decode()}",
+                    len(content),
+                    resp.headers.get("ETag", ""),
+                    resp.headers.get("Last-Modified", ""),
+                    time.time(),
+                )
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.warning(f"Failed to fetch avatar {url}: {e}")
+            return None
+
+        self.stats["downloads"] += 1
+        self.stats["bytes_downloaded"] += entry.size
+        await self.executor.run("avatar_disk", self._write_disk, key, entry, content)
+        return entry
+
+    def _expired(self, entry: AvatarEntry) -> bool:
+        return time.time() - entry.fetched_at > self.ttl
+
+    # ---------- 内存层 ----------
+    def _remember(self, key: tuple[str, int], entry: AvatarEntry) -> None:
+        old = self._memory.pop(key, None)
+        if old:
+            self._memory_bytes -= len(old.data_uri)
+        self._memory[key] = entry
+        self._memory_bytes += len(entry.data_uri)
+        while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.data_uri)
+
+    # ---------- 磁盘层 (均在线程中执行，由 _disk_lock 串行化) ----------
+    @classmethod
+    def _encode_uid(cls, uid: str) -> str:
+        """uid -> 文件名片段 (可逆，且在大小写不敏感的文件系统上不冲突)"""
+        if uid.isascii() and uid.isalnum() and uid == uid.lower():
+            return uid
+        return cls.ENCODED_PREFIX + uid.encode().hex()
+
+    @classmethod
+    def _decode_uid(cls, stem: str) -> str | None:
+        if not stem.startswith(cls.ENCODED_PREFIX):
+            return stem if stem.isascii() and stem.isalnum() else None
+        try:
+            return bytes.fromhex(stem[len(cls.ENCODED_PREFIX) :]).decode()
+        except ValueError:
+            return None
+
+    def _paths(self, key: tuple[str, int]) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, f"{self._encode_uid(key[0])}_{key[1]}")
+        return base + ".img", base + ".json"
+
+    def _ensure_disk_index(self) -> OrderedDict:
+        if self._disk_index is not None:
+            return self._disk_index
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".img"):
+                continue
+            stem, _, size = name[:-4].rpartition("_")
+            uid = self._decode_uid(stem)
+            if not uid or not size.isdigit():
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            files.append((st.st_mtime, (uid, int(size)), st.st_size))
+
+        self._disk_index = OrderedDict()
+        self._disk_bytes = 0
+        for _, key, size in sorted(files):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        return self._disk_index
+
+    def _read_disk(self, key: tuple[str, int]) -> AvatarEntry | None:
+        with self._disk_lock:
+            return self._read_disk_locked(key)
+
+    def _read_disk_locked(self, key: tuple[str, int]) -> AvatarEntry | None:
+        index = self._ensure_disk_index()
+        if key not in index:
+            return None
+        img_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(img_path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            self._remove_disk(key)
+            return None
+
+        index.move_to_end(key)
+        content_type = meta.get("content_type", "image/jpeg")
+        return AvatarEntry(
+            f"data:{content_type};base64,{base64.b64encode(content).decode()}",
+            len(content),
+            meta.get("etag", ""),
+            meta.get("last_modified", ""),
+            meta.get("fetched_at", 0.0),
+        )
+
+    def _write_meta(self, key: tuple[str, int], entry: AvatarEntry) -> None:
+        _, meta_path = self._paths(key)
+        content_type = entry.data_uri[5 : entry.data_uri.index(";")]
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "content_type": content_type,
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "fetched_at": entry.fetched_at,
+                },
+                f,
+            )
+
+    def _write_disk(
+        self, key: tuple[str, int], entry: AvatarEntry, content: bytes
+    ) -> None:
+        with self._disk_lock:
+            self._write_disk_locked(key, entry, content)
+
+    def _write_disk_locked(
+        self, key: tuple[str, int], entry: AvatarEntry, content: bytes
+    ) -> None:
+        index = self._ensure_disk_index()
+        img_path, _ = self._paths(key)
+        try:
+            with open(img_path, "wb") as f:
+                f.write(content)
+            self._write_meta(key, entry)
+        except OSError as e:
+            logger.warning(f"头像磁盘缓存写入失败: {e}")
+            return
+
+        self._disk_bytes += len(content) - index.pop(key, 0)
+        index[key] = len(content)
+        while self._disk_bytes > self.disk_limit and len(index) > 1:
+            oldest = next(iter(index))
+            self._remove_disk(oldest)
+
+    def _touch_disk(self, key: tuple[str, int], entry: AvatarEntry) -> None:
+        with self._disk_lock:
+            index = self._ensure_disk_index()
+            if key not in index:
+                return
+            try:
+                self._write_meta(key, entry)
+                index.move_to_end(key)
+            except OSError:
+                pass
+
+    def _remove_disk(self, key: tuple[str, int]) -> None:
+        index = self._ensure_disk_index()
+        self._disk_bytes -= index.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
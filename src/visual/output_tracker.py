@@ -0,0 +1,170 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+
+from astrbot.api import logger
+
+from ..utils.blocking import BlockingExecutor
+
+
+class RenderOutputTracker:
+    """
+    渲染产物生命周期管理。
+    未进入渲染结果缓存的卡片 (缓存关闭、Pillow 兜底等) 在这里登记，发送完成后删除；
+    登记表持久化到 manifest 文件，重启时上一进程遗留的文件直接视为孤儿清理。
+    后台定期清扫：超过 max_age 仍未释放的登记文件 (如发送中途被取消)，以及插件
+    自有输出目录中未登记的过期文件 (崩溃时尚未来得及登记)。
+    以下同步方法均为阻塞 I/O，应在线程中调用。
+    """
+
+    SWEEP_INTERVAL = 600  # 后台清扫间隔 (秒)
+    UNTRACKED_GRACE = 600  # 自有目录中未登记文件的宽限期 (秒)，避免误删正在写入的文件
+
+    def __init__(
+        self,
+        manifest_path: str,
+        owned_dirs: tuple[str, ...] = (),
+        max_age: float = 6 * 3600,
+        executor: BlockingExecutor | None = None,
+    ):
+        self.manifest_path = manifest_path
+        self.owned_dirs = owned_dirs
+        self.max_age = max_age
+        self.executor = executor
+        self._files: dict[str, float] | None = None  # 路径 -> 登记时间
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self.stats = {"released": 0, "swept": 0, "bytes_freed": 0}
+
+    # ---------- 登记与释放 ----------
+    def track(self, path: str) -> None:
+        with self._lock:
+            self._ensure_loaded()[os.path.abspath(path)] = time.time()
+            self._save()
+
+    def release(self, path: str) -> bool:
+        """发送完成后调用；仅删除登记过的文件 (缓存中的卡片不受影响)"""
+        with self._lock:
+            files = self._ensure_loaded()
+            if files.pop(os.path.abspath(path), None) is None:
+                return False
+            self._delete(path)
+            self.stats["released"] += 1
+            self._save()
+            return True
+
+    def sweep(self) -> int:
+        """清理过期登记文件与自有目录中的孤儿文件，返回删除数量"""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            files = self._ensure_loaded()
+            for path, tracked_at in list(files.items()):
+                if now - tracked_at > self.max_age or not os.path.exists(path):
+                    del files[path]
+                    removed += self._delete(path)
+
+            for directory in self.owned_dirs:
+                if not os.path.isdir(directory):
+                    continue
+                for entry in os.scandir(directory):
+                    if not entry.is_file() or os.path.abspath(entry.path) in files:
+                        continue
+                    try:
+                        age = now - entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if age > self.UNTRACKED_GRACE:
+                        removed += self._delete(entry.path)
+            self._save()
+
+        self.stats["swept"] += removed
+        if removed:
+            logger.info(f"渲染产物清扫: 删除 {removed} 个过期/孤儿文件")
+        return removed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            files = dict(self._files or {})
+        tracked_bytes = 0
+        for path in files:
+            with contextlib.suppress(OSError):
+                tracked_bytes += os.path.getsize(path)
+        return {
+            **self.stats,
+            "tracked": len(files),
+            "tracked_bytes": tracked_bytes,
+        }
+
+    # ---------- 后台清扫 ----------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _loop(self) -> None:
+        first = True
+        while True:
+            try:
+                if first:
+                    # 上一进程登记过但未释放的文件已无人引用，启动时直接清理
+                    await self._run(self._drop_previous)
+                    first = False
+                await self._run(self.sweep)
+            except Exception as e:
+                logger.warning(f"渲染产物清扫失败: {e}")
+            await asyncio.sleep(self.SWEEP_INTERVAL)
+
+    async def _run(self, func):
+        if self.executor:
+            return await self.executor.run("output_sweep", func)
+        return await asyncio.to_thread(func)
+
+    # ---------- 内部实现 ----------
+    def _drop_previous(self) -> None:
+        with self._lock:
+            files = self._ensure_loaded()
+            stale = [p for p, t in files.items() if t < self._started_at]
+            for path in stale:
+                del files[path]
+                self.stats["swept"] += self._delete(path)
+            if stale:
+                logger.info(f"清理上次运行遗留的渲染产物 {len(stale)} 个")
+                self._save()
+
+    def _ensure_loaded(self) -> dict[str, float]:
+        if self._files is None:
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._files = {str(k): float(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                self._files = {}
+        return self._files
+
+    def _save(self) -> None:
+        tmp = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._files, f)
+            os.replace(tmp, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"渲染产物登记表写入失败: {e}")
+
+    def _delete(self, path: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        self.stats["bytes_freed"] += size
+        return 1
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from astrbot.api import logger
+
+
+class RenderCache:
+    """
+    渲染结果磁盘缓存。
+    以 "主题版本 + 最终渲染数据" 的 sha256 为键 (generated_time 不参与计算)，
+    命中时直接复用已截图的卡片，跳过 Jinja 渲染与无头浏览器截图。
+    按字节配额做 LRU 淘汰，命中时刷新文件 mtime，重启后仍能恢复 LRU 顺序。
+    """
+
+    # 不参与指纹计算的字段
+    VOLATILE_FIELDS = ("generated_time",)
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # key -> (图片文件名, 字节数)，按最近使用排序
+        self._index: OrderedDict[str, tuple[str, int]] | None = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @classmethod
+    def fingerprint(cls, theme_key: str, data: dict) -> str:
+        stable = {k: v for k, v in data.items() if k not in cls.VOLATILE_FIELDS}
+        payload = json.dumps(
+            stable,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(f"{theme_key}\n{payload}".encode()).hexdigest()
+
+    # ---------- 以下方法均为阻塞 I/O，应在线程中调用 ----------
+    def get(self, key: str) -> tuple[str, str] | None:
+        """命中时返回 (图片路径, 当时的 generated_time)"""
+        with self._lock:
+            index = self._ensure_index()
+            entry = index.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            path = os.path.join(self.cache_dir, entry[0])
+            try:
+                with open(self._meta_path(key), encoding="utf-8") as f:
+                    meta = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.stats["misses"] += 1
+                return None
+
+            index.move_to_end(key)
+            self.stats["hits"] += 1
+            return path, meta.get("generated_time", "")
+
+    def put(self, key: str, src_path: str, generated_time: str) -> str:
+        """
+        将渲染结果移入缓存 (不再在临时目录留下副本)，返回缓存内的图片路径；
+        失败时返回原路径，由调用方负责清理
+        """
+        with self._lock:
+            index = self._ensure_index()
+            ext = os.path.splitext(src_path)[1] or ".png"
+            filename = f"{key}{ext}"
+            dst = os.path.join(self.cache_dir, filename)
+            try:
+                try:
+                    os.replace(src_path, dst)
+                except OSError:
+                    # 跨文件系统时无法重命名，退化为复制后删除
+                    shutil.copyfile(src_path, dst)
+                    os.remove(src_path)
+                with open(self._meta_path(key), "w", encoding="utf-8") as f:
+                    json.dump({"generated_time": generated_time}, f)
+            except OSError as e:
+                logger.warning(f"渲染缓存写入失败: {e}")
+                return src_path
+
+            size = os.path.getsize(dst)
+            old = index.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+                if old[0] != filename:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, old[0]))
+                    except OSError:
+                        pass
+            index[key] = (filename, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and len(index) > 1:
+                self._remove(next(iter(index)))
+                self.stats["evictions"] += 1
+            return dst
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0,
+            "entries": len(self._index or {}),
+            "bytes": self._bytes,
+        }
+
+    # ---------- 内部实现 ----------
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _ensure_index(self) -> OrderedDict:
+        if self._index is not None:
+            return self._index
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext == ".json" or len(key) != 64:
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            files.append((st.st_mtime, key, name, st.st_size))
+
+        self._index = OrderedDict()
+        self._bytes = 0
+        for _, key, name, size in sorted(files):
+            self._index[key] = (name, size)
+            self._bytes += size
+        return self._index
+
+    def _remove(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        for path in (os.path.join(self.cache_dir, entry[0]), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from ..utils.metrics import MetricsRegistry
+
+
+class RenderQueueFull(Exception):
+    """渲染队列已满，拒绝新的渲染请求"""
+
+
+class RenderScheduler:
+    """
+    渲染调度器：限制同时进行的无头浏览器截图数量。
+    超出 workers 的请求进入有界队列排队 (FIFO)，队列满时直接拒绝；
+    排队与截图各自受 timeout 约束。按主题导出排队等待与截图耗时。
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 10,
+        timeout: float = 60,
+        metrics: MetricsRegistry | None = None,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.metrics = metrics
+        self._sem = asyncio.Semaphore(self.workers)
+        self._running = 0
+        self._waiting = 0
+
+    def queue_depth(self) -> int:
+        """当前排队中的请求数"""
+        return self._waiting
+
+    def queue_position(self) -> int:
+        """新请求此刻提交时需要等待的前序请求数 (0 表示可立即开始)"""
+        if self._running < self.workers:
+            return 0
+        return self._waiting + 1
+
+    async def run(self, theme: str, render: Callable[[], Awaitable[str]]) -> str:
+        if self._running >= self.workers and self._waiting >= self.max_queue:
+            raise RenderQueueFull(f"渲染队列已满 ({self._waiting}/{self.max_queue})")
+
+        enqueued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"渲染排队超时 ({self.timeout}s)") from None
+        finally:
+            self._waiting -= 1
+
+        started = time.perf_counter()
+        self._observe(f"render.queue_wait.{theme}", started - enqueued)
+        self._running += 1
+        try:
+            return await asyncio.wait_for(render(), self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"渲染超时 ({self.timeout}s)") from None
+        finally:
+            self._running -= 1
+            self._sem.release()
+            self._observe(f"render.screenshot.{theme}", time.perf_counter() - started)
+
+    def _observe(self, name: str, seconds: float) -> None:
+        if self.metrics:
+            self.metrics.observe(name, seconds * 1000)
@@ -1,28 +1,122 @@
 import asyncio
-import base64
 import os
 import re
+import time
 
-import aiohttp
-from jinja2 import Environment, FileSystemLoader
 
 from astrbot.api import logger
 from astrbot.core import html_renderer
 from astrbot.core.star.context import Context
 
-from .theme_manager import ThemeManager
+from ..utils.blocking import BlockingExecutor
+from ..utils.http_client import SharedHttpClient
+from ..utils.metrics import MetricsRegistry
+from .avatar_cache import AvatarCache
+from .output_tracker import RenderOutputTracker
+from .pil_renderer import PillowCardRenderer
+from .render_cache import RenderCache
+from .render_scheduler import RenderQueueFull, RenderScheduler
+from .theme_manager import ThemeAssets, ThemeManager
 
 DEFAULT_AVATAR = "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCAxMDAgMTAwIj48Y2lyY2xlIGN4PSI1MCIgY3k9IjUwIiByPSI1MCIgZmlsbD0iI2VlZSIvPjwvc3ZnPg=="
 
 
+# 截图策略，按画质从高到低 (体积从大到小) 排列
+RENDER_STRATEGIES = (
+    (
+        "png_ultra",
+        {
+            "type": "png",
+            "quality": None,
+            "full_page": True,
+            "scale": "device",
+            "device_scale_factor_level": "ultra",
+        },
+    ),
+    (
+        "jpeg100_ultra",
+        {
+            "type": "jpeg",
+            "quality": 100,
+            "full_page": True,
+            "scale": "device",
+            "device_scale_factor_level": "ultra",
+        },
+    ),
+    (
+        "jpeg95_high",
+        {
+            "type": "jpeg",
+            "quality": 95,
+            "full_page": True,
+            "scale": "device",
+            "device_scale_factor_level": "high",
+        },
+    ),
+    (
+        "jpeg80_normal",
+        {
+            "type": "jpeg",
+            "quality": 80,
+            "full_page": True,
+            "scale": "device",
+        },
+    ),
+)
+
+
 class LoveRenderer:
     """恋爱分析渲染器，负责将数据转化为视觉图片"""
 
-    def __init__(self, context: Context, theme_manager: ThemeManager):
+    PROBE_EVERY = 20  # 每隔多少次渲染向上试探一级画质
+
+    def __init__(
+        self,
+        context: Context,
+        theme_manager: ThemeManager,
+        avatar_cache: AvatarCache,
+        http: SharedHttpClient,
+        metrics: MetricsRegistry | None = None,
+        render_cache: RenderCache | None = None,
+        scheduler: RenderScheduler | None = None,
+        max_bytes: int = 0,
+        pillow: PillowCardRenderer | None = None,
+        pillow_fallback: bool = True,
+        executor: BlockingExecutor | None = None,
+        outputs: RenderOutputTracker | None = None,
+    ):
         self.context = context
         self.theme_manager = theme_manager
-        # 初始化 Jinja2 环境
-        self.env = Environment(loader=FileSystemLoader(theme_manager.themes_dir))
+        self.avatar_cache = avatar_cache
+        self.http = http
+        self.metrics = metrics
+        self.render_cache = render_cache
+        self.scheduler = scheduler or RenderScheduler(metrics=metrics)
+        # 渲染路径上的阻塞 I/O 与 CPU 工作统一放入有界线程池
+        self.executor = executor or BlockingExecutor(metrics=metrics)
+        self.outputs = outputs
+        # 输出体积预算 (字节)，0 表示不限制
+        self.max_bytes = max_bytes
+        # 每个主题上次成功的策略下标
+        self._preferred: dict[str, int] = {}
+        self._render_count = 0
+        self.strategy_stats: dict[str, dict[str, int]] = {}
+        # Pillow 轻量渲染器：renderer: pillow 的主题直接使用，浏览器渲染失败时兜底
+        self.pillow = pillow
+        self.pillow_fallback = pillow_fallback and pillow is not None
+        self.fallback_count = 0
+
+    async def fetch_avatar(self, user_id: str, size: int = 640) -> str:
+        """获取头像 data URI (走两级头像缓存)，失败时返回默认头像，可在渲染前预取"""
+        data_uri = await self.avatar_cache.get(user_id, size, self.http.session)
+        return data_uri or DEFAULT_AVATAR
+
+    def queue_position(self, theme_name: str = "galgame") -> int:
+        """新渲染请求当前需要排队等待的前序请求数 (Pillow 主题不经过浏览器队列)"""
+        assets = self.theme_manager.peek_assets(theme_name)
+        if assets is not None and assets.renderer == "pillow":
+            return 0
+        return self.scheduler.queue_position()
 
     async def render(self, data: dict, theme_name: str = "galgame") -> str:
         """
@@ -31,62 +125,42 @@ class LoveRenderer:
         """
         logger.info(f"开始渲染图片，主题: {theme_name}")
 
-        async with aiohttp.ClientSession() as session:
-
-            async def _fetch_avatar(url: str) -> str:
-                try:
-                    async with session.get(url, timeout=5) as resp:
-                        if resp.status == 200:
-                            content = await resp.read()
-                            return f"data:image/jpeg;base64,{base64.b64encode(content).decode()}"
-                except Exception as e:
-                    logger.warning(f"Failed to fetch avatar {url}: {e}")
-                return DEFAULT_AVATAR
-
-            # ---------- 1. 主头像处理 ----------
-            avatar_url = data.get("avatar_url")
-            if avatar_url and avatar_url.startswith("http"):
-                data["avatar_url"] = await _fetch_avatar(avatar_url)
-            elif not avatar_url:
-                data["avatar_url"] = DEFAULT_AVATAR
-
-            # ---------- 2. Deep Dive 证据头像并行下载 ----------
-            # 原顺序循环下载改为收集所有待下载任务，然后 asyncio.gather 并行下载
-            tasks = []
-            dialogues_to_update = []
-            if data.get("deep_dive") and data["deep_dive"].get("evidence"):
-                for scene in data["deep_dive"]["evidence"]:
-                    for dialog in scene.get("dialogue", []):
-                        uid = dialog.get("user_id")
-                        # 跳过已经是 base64 或无 uid 的
-                        if dialog.get("avatar_url", "").startswith("data:") or not uid:
-                            continue
-                        url = f"https://q1.qlogo.cn/g?b=qq&nk={uid}&s=100"
-                        # 每个任务返回 base64 头像
-                        tasks.append(_fetch_avatar(url))
-                        dialogues_to_update.append(dialog)
-
-                if tasks:
-                    # 并行下载所有头像
-                    results = await asyncio.gather(*tasks)
-                    # 将下载结果回填到对应 dialogue
-                    for dialog, avatar_b64 in zip(dialogues_to_update, results):
-                        dialog["avatar_url"] = avatar_b64
-
-            # ---------- 3. 模板资源（header_bg.png） ----------
-            asset_dir = self.theme_manager.get_asset_dir(theme_name)
-            header_bg_path = os.path.join(asset_dir, "header_bg.png")
-            header_bg_b64 = ""
-            if os.path.exists(header_bg_path):
-                with open(header_bg_path, "rb") as f:
-                    header_bg_b64 = (
-                        f"data:image/png;base64,{base64.b64encode(f.read()).decode()}"
-                    )
-
-        # ---------- 后续模板加载、渲染逻辑保持不变 ----------
-        template_name = f"{theme_name}/template.html"
+        # ---------- 1. 主头像处理 ----------
+        avatar_url = data.get("avatar_url")
+        if avatar_url and avatar_url.startswith("http"):
+            data["avatar_url"] = await self.fetch_avatar(data.get("user_id", ""), 640)
+        elif not avatar_url:
+            data["avatar_url"] = DEFAULT_AVATAR
+
+        # ---------- 2. Deep Dive 证据头像并行下载 ----------
+        # 原顺序循环下载改为收集所有待下载任务，然后 asyncio.gather 并行下载
+        tasks = []
+        dialogues_to_update = []
+        if data.get("deep_dive") and data["deep_dive"].get("evidence"):
+            for scene in data["deep_dive"]["evidence"]:
+                for dialog in scene.get("dialogue", []):
+                    uid = dialog.get("user_id")
+                    # 跳过已经是 base64 或无 uid 的
+                    if dialog.get("avatar_url", "").startswith("data:") or not uid:
+                        continue
+                    # 每个任务返回 base64 头像 (同一 uid 的并发请求由缓存合并)
+                    tasks.append(self.fetch_avatar(uid, 100))
+                    dialogues_to_update.append(dialog)
+
+            if tasks:
+                # 并行下载所有头像
+                results = await asyncio.gather(*tasks)
+                # 将下载结果回填到对应 dialogue
+                for dialog, avatar_b64 in zip(dialogues_to_update, results):
+                    dialog["avatar_url"] = avatar_b64
+
+        # ---------- 3. 预加载的主题资源 (编译后的模板 / header_bg / 配置) ----------
+        prep_start = time.perf_counter()
         try:
-            template = self.env.get_template(template_name)
+            # 热重载时会 stat 并可能重新读取模板/图片，不在事件循环中执行
+            assets = await self.executor.run(
+                "theme_assets", self.theme_manager.get_assets, theme_name
+            )
         except Exception as e:
             logger.error(f"模板加载失败: {e}")
             raise
@@ -126,93 +200,189 @@ class LoveRenderer:
         if data.get("equation"):
             data["equation"] = simple_math(data["equation"])
 
-        # 2. 渲染内容
+        # 命中渲染结果缓存时跳过 Jinja 渲染与截图，卡片沿用缓存时的生成时间
+        cache_key = None
+        if self.render_cache and self.render_cache.enabled:
+            cache_key = RenderCache.fingerprint(assets.version, data)
+            cached = await self.executor.run(
+                "render_cache", self.render_cache.get, cache_key
+            )
+            if cached:
+                path, data["generated_time"] = cached
+                logger.info(f"命中渲染结果缓存: {path}")
+                return path
+
+        if assets.renderer == "pillow":
+            if not self.pillow:
+                raise RuntimeError(f"主题 {theme_name} 需要 Pillow 渲染器")
+            path = await self._render_pillow(data, assets)
+        else:
+            try:
+                path = await self._render_html(data, theme_name, assets, prep_start)
+            except RenderQueueFull:
+                # 排队已满是过载信号，交给命令回复“繁忙”，不降级为轻量卡片
+                raise
+            except Exception as e:
+                if not self.pillow_fallback:
+                    raise
+                # 浏览器不可用或超时：降级为轻量卡片，且不写入结果缓存，
+                # 以免浏览器恢复后仍命中降级版本
+                self.fallback_count += 1
+                logger.warning(f"浏览器渲染失败 ({e!r})，回退到 Pillow 轻量渲染")
+                return await self._track(await self._render_pillow(data, assets))
+
+        if cache_key:
+            cached_path = await self.executor.run(
+                "render_cache",
+                self.render_cache.put,
+                cache_key,
+                path,
+                data.get("generated_time", ""),
+            )
+            if cached_path != path:
+                # 已移入有容量上限的结果缓存，由缓存负责淘汰
+                return cached_path
+        return await self._track(path)
+
+    async def _track(self, path: str) -> str:
+        """登记未进入结果缓存的产物，发送完成后由 release() 删除"""
+        if self.outputs:
+            await self.executor.run("outputs", self.outputs.track, path)
+        return path
+
+    async def release(self, path: str) -> None:
+        """卡片发送完成后调用，删除临时产物 (缓存中的卡片不受影响)"""
+        if self.outputs and path:
+            await self.executor.run("outputs", self.outputs.release, path)
+
+    async def _render_html(
+        self, data: dict, theme_name: str, assets: ThemeAssets, prep_start: float
+    ) -> str:
+        """Jinja 渲染 HTML 后交给调度器排队截图"""
         try:
-            html_content = template.render(
+            # 800 多行模板的渲染是纯 CPU 工作，放进线程池避免阻塞事件循环
+            html_content = await self.executor.run(
+                "jinja",
+                assets.template.render,
                 data=data,
-                theme_config=self.theme_manager.get_theme_config(theme_name),
-                header_bg=header_bg_b64,
+                theme_config=assets.config,
+                header_bg=assets.header_bg,
             )
             logger.debug(f"HTML 生成成功，长度: {len(html_content)}")
         except Exception as e:
             logger.error(f"Jinja2 渲染失败: {e}")
             raise
+        if self.metrics:
+            self.metrics.observe(
+                "render.prep", (time.perf_counter() - prep_start) * 1000
+            )
+
+        # 截图是最昂贵的一步，经调度器限流排队
+        return await self.scheduler.run(
+            theme_name, lambda: self._screenshot(html_content, theme_name)
+        )
+
+    async def _render_pillow(self, data: dict, assets: ThemeAssets) -> str:
+        """在线程中用 Pillow 直接绘制卡片 (不占用截图队列)"""
+        start = time.perf_counter()
+        path = await self.executor.run(
+            "pillow", self.pillow.render, data, assets.name, assets.config
+        )
+        self._observe(f"render.pillow.{assets.name}", time.perf_counter() - start)
+        logger.info(f"Pillow 卡片生成完成: {path}")
+        return path
 
-        # 3. 使用 AstrBot 的 HTML 渲染引擎
-        render_strategies = [
-            # 1. 第一策略: PNG, Ultra, quality, Device scale
-            {
-                "type": "png",
-                "full_page": True,
-                "scale": "device",
-                "device_scale_factor_level": "ultra",
-            },
-            # 2. 第二策略: JPEG, Ultra, quality 100%, Device scale
-            {
-                "type": "jpeg",
-                "quality": 100,
-                "full_page": True,
-                "scale": "device",
-                "device_scale_factor_level": "ultra",
-            },
-            # 3. 第三策略: JPEG, Normal quality 95%, Device scale
-            {
-                "type": "jpeg",
-                "quality": 95,
-                "full_page": True,
-                "scale": "device",
-                "device_scale_factor_level": "high",
-            },
-            # 4. 第四策略: JPEG, normal quality, Device scale (后备)
-            {
-                "full_page": True,
-                "type": "jpeg",
-                "quality": 80,
-                "scale": "device",
-                # normal quality
-            },
-        ]
+    async def _screenshot(self, html_content: str, theme_name: str) -> str:
+        """
+        调用 AstrBot 的 HTML 渲染引擎截图。
+        从该主题上次成功的策略开始尝试，失败或超出输出体积预算时逐级降级；
+        每隔 PROBE_EVERY 次渲染向上试探一级，以便在环境恢复后回到更高画质。
+        """
+        self._render_count += 1
+        start = self._preferred.get(theme_name, 0)
+        if start > 0 and self._render_count % self.PROBE_EVERY == 0:
+            start -= 1
 
+        over_budget_path = None  # 超出预算但可用的结果，作为最后的兜底
         last_exception = None
-        for options in render_strategies:
+        for index in range(start, len(RENDER_STRATEGIES)):
+            name, options = RENDER_STRATEGIES[index]
+            counters = self.strategy_stats.setdefault(
+                name, {"ok": 0, "failed": 0, "over_budget": 0}
+            )
+            begin = time.perf_counter()
             try:
-                # Cleanse options
-                if options.get("type") == "png":
-                    options["quality"] = None
-
-                logger.debug(f"调用 AstrBot html_renderer (options={options})...")
+                logger.debug(f"调用 AstrBot html_renderer ({name}: {options})...")
                 path = await html_renderer.render_custom_template(
                     tmpl_str=html_content,
                     tmpl_data={},
                     return_url=False,
-                    options=options,
+                    options=dict(options),
                 )
-                logger.info(f"图片生成完成: {path}")
-
-                # 验证: 检查文件是否为图片或错误文本
-                if os.path.exists(path):
-                    file_size = os.path.getsize(path)
-                    if file_size < 1024:  # 小于1KB可疑
-                        with open(path, "rb") as f:
-                            content = f.read(100)
-
-                        try:
-                            text_content = content.decode("utf-8")
-                            if "Error" in text_content or "Exception" in text_content:
-                                logger.warning(f"渲染策略失败: {text_content}")
-                                raise RuntimeError(f"渲染文件错误: {text_content}")
-                        except UnicodeDecodeError:
-                            # 二进制内容是好的
-                            pass
-
-                return path  # 成功，立即返回
-
+                size = await self.executor.run("validate", self._validate_output, path)
             except Exception as e:
-                logger.warning(f"渲染策略失败 ({options}): {e}")
+                counters["failed"] += 1
+                logger.warning(f"渲染策略失败 ({name}): {e}，尝试下一个策略")
                 last_exception = e
-                logger.warning("尝试下一个策略")
-                continue  # 尝试下一个策略
+                continue
+
+            counters["ok"] += 1
+            self._observe(f"render.strategy.{name}", time.perf_counter() - begin)
+            if self.metrics:
+                self.metrics.observe(f"render_size.{name}", size / 1024)
+            logger.info(f"图片生成完成 ({name}, {size / 1024:.0f} KB): {path}")
+
+            if self.max_bytes and size > self.max_bytes:
+                counters["over_budget"] += 1
+                if index + 1 < len(RENDER_STRATEGIES):
+                    # 保留最小的一份兜底，继续尝试体积更小的策略
+                    await self._discard(over_budget_path)
+                    over_budget_path = path
+                    continue
+
+            await self._discard(over_budget_path)
+            self._preferred[theme_name] = index
+            return path
+
+        if over_budget_path:
+            logger.warning("所有策略的输出均超出体积预算，使用最小的一份")
+            self._preferred[theme_name] = len(RENDER_STRATEGIES) - 1
+            return over_budget_path
 
         # 如果所有策略都失败
         logger.error(f"所有渲染策略均失败. 最后错误: {last_exception}")
         raise last_exception or RuntimeError("所有渲染策略均失败")
+
+    @staticmethod
+    def _validate_output(path: str) -> int:
+        """检查输出文件是否为图片而非错误文本，返回文件大小"""
+        if not os.path.exists(path):
+            raise RuntimeError(f"渲染输出不存在: {path}")
+        file_size = os.path.getsize(path)
+        if file_size < 1024:  # 小于1KB可疑
+            with open(path, "rb") as f:
+                content = f.read(100)
+            try:
+                text_content = content.decode("utf-8")
+                if "Error" in text_content or "Exception" in text_content:
+                    raise RuntimeError(f"渲染文件错误: {text_content}")
+            except UnicodeDecodeError:
+                # 二进制内容是好的
+                pass
+        return file_size
+
+    async def _discard(self, path: str | None) -> None:
+        """删除被淘汰的渲染输出 (在线程池中执行)"""
+        if path:
+            await self.executor.run("discard", self._remove_file, path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _observe(self, name: str, seconds: float) -> None:
+        if self.metrics:
+            self.metrics.observe(name, seconds * 1000)
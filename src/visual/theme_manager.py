@@ -1,33 +1,117 @@
 import os
+import threading
 from typing import Any
 
 import yaml
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from astrbot.api import logger
+
+from ..utils.blocking import b64encode_file
+
+
+class ThemeAssets:
+    """
+    单个主题的预加载资源：编译后的模板、已编码的图片与解析后的配置。
+    renderer: pillow 的轻量主题没有 HTML 模板，template 为 None。
+    """
+
+    __slots__ = ("name", "template", "config", "header_bg", "mtimes")
+
+    def __init__(
+        self,
+        name: str,
+        template: Template | None,
+        config: dict[str, Any],
+        header_bg: str,
+        mtimes: dict[str, float],
+    ):
+        self.name = name
+        self.template = template
+        self.config = config
+        self.header_bg = header_bg
+        self.mtimes = mtimes
+
+    @property
+    def renderer(self) -> str:
+        """渲染方式：html (无头浏览器截图，默认) 或 pillow (直接绘制)"""
+        return self.config.get("renderer", "html")
+
+    @property
+    def version(self) -> str:
+        """主题版本标识 (名称 + 各文件 mtime)，用于渲染结果缓存的键"""
+        stamps = ",".join(f"{k}={v:.0f}" for k, v in sorted(self.mtimes.items()))
+        return f"{self.name}@{stamps}"
 
 
 class ThemeManager:
-    """主题管理器，负责加载和切换渲染主题"""
+    """
+    主题管理器，负责加载和切换渲染主题。
+    启动时为所有已安装主题预加载模板 (Jinja 字节码缓存)、header_bg 的 base64
+    与 config.yaml，渲染期间不再读盘；开启热重载后按文件 mtime 自动刷新。
+    """
+
+    # 参与热重载 mtime 检查的主题文件 (相对主题目录)
+    WATCHED_FILES = (
+        "template.html",
+        "fonts.css",
+        "config.yaml",
+        "assets/header_bg.png",
+    )
 
-    def __init__(self, plugin_root: str):
+    def __init__(
+        self,
+        plugin_root: str,
+        bytecode_cache_dir: str | None = None,
+        hot_reload: bool = False,
+    ):
         self.plugin_root = plugin_root
         self.themes_dir = os.path.join(plugin_root, "assets", "themes")
         self.current_theme = "galgame"
-        self._cache = {}
+        self.hot_reload = hot_reload
 
-    def get_theme_config(self, theme_name: str = None) -> dict[str, Any]:
-        """获取指定主题的配置信息 (从 config.yaml 读取)"""
-        theme = theme_name or self.current_theme
-        if theme in self._cache:
-            return self._cache[theme]
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        # 未开启热重载时 Jinja 不再逐次 stat 模板文件
+        self.env = Environment(
+            loader=FileSystemLoader(self.themes_dir),
+            bytecode_cache=bytecode_cache,
+            auto_reload=hot_reload,
+        )
+        self._registry: dict[str, ThemeAssets] = {}
+        self._lock = threading.Lock()
 
-        config_path = os.path.join(self.themes_dir, theme, "config.yaml")
-        if not os.path.exists(config_path):
-            raise ValueError(f"在 {config_path} 未找到主题 {theme}")
+    def preload(self) -> list[str]:
+        """预加载全部已安装主题 (阻塞 I/O，建议在线程中调用)"""
+        if not os.path.isdir(self.themes_dir):
+            return []
+        loaded = []
+        for name in sorted(os.listdir(self.themes_dir)):
+            if os.path.exists(os.path.join(self.themes_dir, name, "config.yaml")):
+                try:
+                    self._load(name)
+                    loaded.append(name)
+                except Exception as e:
+                    logger.warning(f"主题 {name} 预加载失败: {e}")
+        return loaded
 
-        with open(config_path, encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+    def get_assets(self, theme_name: str = None) -> ThemeAssets:
+        """获取主题资源；未预加载或文件已变化 (热重载) 时重新加载"""
+        theme = theme_name or self.current_theme
+        assets = self._registry.get(theme)
+        if assets is None or (self.hot_reload and self._changed(assets)):
+            assets = self._load(theme)
+        return assets
+
+    def peek_assets(self, theme_name: str = None) -> ThemeAssets | None:
+        """已加载的主题资源，不触发加载与热重载检查 (供请求路径上的廉价判断)"""
+        return self._registry.get(theme_name or self.current_theme)
 
-        self._cache[theme] = config
-        return config
+    def get_theme_config(self, theme_name: str = None) -> dict[str, Any]:
+        """获取指定主题的配置信息 (从 config.yaml 读取)"""
+        return self.get_assets(theme_name).config
 
     def get_template_path(self, theme_name: str = None) -> str:
         """获取模板文件路径"""
@@ -38,3 +122,47 @@ class ThemeManager:
         """获取资源目录路径"""
         theme = theme_name or self.current_theme
         return os.path.join(self.themes_dir, theme, "assets")
+
+    # ---------- 内部实现 ----------
+    def _theme_mtimes(self, theme: str) -> dict[str, float]:
+        mtimes = {}
+        for rel in self.WATCHED_FILES:
+            path = os.path.join(self.themes_dir, theme, rel)
+            mtimes[rel] = os.path.getmtime(path) if os.path.exists(path) else 0.0
+        return mtimes
+
+    def _changed(self, assets: ThemeAssets) -> bool:
+        return self._theme_mtimes(assets.name) != assets.mtimes
+
+    def _load(self, theme: str) -> ThemeAssets:
+        with self._lock:
+            theme_dir = os.path.join(self.themes_dir, theme)
+            config_path = os.path.join(theme_dir, "config.yaml")
+            if not os.path.exists(config_path):
+                raise ValueError(f"在 {config_path} 未找到主题 {theme}")
+
+            mtimes = self._theme_mtimes(theme)
+            with open(config_path, encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+
+            header_bg = ""
+            header_bg_path = os.path.join(self.get_asset_dir(theme), "header_bg.png")
+            if os.path.exists(header_bg_path):
+                header_bg = f"data:image/png;base64,{b64encode_file(header_bg_path)}"
+
+            if self.hot_reload and self.env.cache is not None:
+                # 模板或 include 的字体包变化时丢弃 Jinja 内存中的旧模板
+                self.env.cache.clear()
+            template = None
+            if os.path.exists(os.path.join(theme_dir, "template.html")):
+                template = self.env.get_template(f"{theme}/template.html")
+            elif config.get("renderer") != "pillow":
+                raise ValueError(f"主题 {theme} 缺少 template.html")
+            if os.path.exists(os.path.join(theme_dir, "fonts.css")):
+                # 预编译模板 include 的离线字体包，避免首次渲染时才解析
+                self.env.get_template(f"{theme}/fonts.css")
+
+            assets = ThemeAssets(theme, template, config, header_bg, mtimes)
+            self._registry[theme] = assets
+            logger.debug(f"主题 {theme} 资源已加载")
+            return assets
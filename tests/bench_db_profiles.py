@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from sqlalchemy import update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from src.models.tables import LoveDailyRef  # noqa: E402
+
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+GROUP_ID = "10001"
+USERS = 200
+CONCURRENCY = 16
+
+
+async def run_concurrent(total: int, op) -> float:
+    """以 CONCURRENCY 个协程执行 total 次 op(i)，返回每秒操作数"""
+    queue = iter(range(total))
+
+    async def worker():
+        for i in queue:
+            await op(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return total / (time.perf_counter() - start)
+
+
+async def check_connections(db: DBManager) -> bool:
+    """同时占用全部只读连接，确认每个连接都应用了档位 PRAGMA 且拒绝写入"""
+    expected = str(db.pragmas["synchronous"])
+    levels = {"OFF": "0", "NORMAL": "1", "FULL": "2", "EXTRA": "3"}
+    ok = True
+    barrier = asyncio.Barrier(db.read_engine.pool.size())
+
+    async def probe():
+        nonlocal ok
+        async with db.read_engine.connect() as conn:
+            await barrier.wait()
+            sync = await conn.exec_driver_sql("PRAGMA synchronous")
+            query_only = await conn.exec_driver_sql("PRAGMA query_only")
+            if str(sync.scalar()) != levels[expected] or query_only.scalar() != 1:
+                ok = False
+
+    await asyncio.gather(*(probe() for _ in range(db.read_engine.pool.size())))
+
+    try:
+        async with db.get_read_session() as session:
+            await session.execute(
+                update(LoveDailyRef).values(msg_sent=LoveDailyRef.msg_sent)
+            )
+        ok = False
+    except OperationalError:
+        pass
+    return ok
+
+
+async def bench_profile(profile: str, writes: int, reads: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, "bench.db"), profile=profile)
+        await db.init_db()
+        repo = LoveRepo(db)
+
+        ok = await check_connections(db)
+        print(f"{'PASS' if ok else 'FAIL'}: [{profile}] 连接级 PRAGMA 与 query_only")
+
+        # 每日计数由内存热层累加后批量落盘，逐条写库的是消息归属索引
+        message_ids = itertools.count(1)
+
+        async def write(i):
+            await repo.save_message_index(
+                str(next(message_ids)), GROUP_ID, str(i % USERS)
+            )
+
+        async def read(i):
+            await repo.get_message_owner(str(i % writes + 1))
+
+        write_ops = await run_concurrent(writes, write)
+        read_ops = await run_concurrent(reads, read)
+
+        # 读写混合：读取不应被写事务阻塞
+        mixed_reads = asyncio.create_task(run_concurrent(reads, read))
+        await run_concurrent(writes, write)
+        mixed_ops = await mixed_reads
+
+        await db.close()
+
+    print(
+        f"BENCH: [{profile}] 写入 {write_ops:7.0f} ops/s | 读取 {read_ops:7.0f} ops/s"
+        f" | 写入期间读取 {mixed_ops:7.0f} ops/s"
+    )
+    return {"ok": ok, "write": write_ops, "read": read_ops}
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="数据库档位读写吞吐基准")
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=4000)
+    args = parser.parse_args()
+
+    results = {}
+    for profile in DBManager.PROFILES:
+        results[profile] = await bench_profile(profile, args.writes, args.reads)
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
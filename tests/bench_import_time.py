@@ -0,0 +1,115 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 这些依赖只应在首次渲染 / 后台预热时导入，插件加载阶段出现即视为回归
+DEFERRED_MODULES = ("jinja2", "yaml", "PIL", "aiohttp")
+
+# 在子进程中 mock AstrBot 并以包的形式导入插件 main 模块
+PRELUDE = """
+import sys, types
+from unittest.mock import MagicMock
+
+class _Filter:
+    def __getattr__(self, name):
+        if name[0].isupper():
+            return MagicMock()
+        return lambda *a, **k: (lambda f: f)
+
+class Star:
+    def __init__(self, context):
+        self.context = context
+
+for name in (
+    "astrbot", "astrbot.api", "astrbot.api.event", "astrbot.api.event.filter",
+    "astrbot.core", "astrbot.core.message", "astrbot.core.message.components",
+    "astrbot.core.platform", "astrbot.core.platform.sources",
+    "astrbot.core.platform.sources.aiocqhttp",
+    "astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event",
+    "astrbot.core.star", "astrbot.core.star.context",
+):
+    sys.modules[name] = MagicMock()
+sys.modules["astrbot.api.event"].filter = _Filter()
+sys.modules["astrbot.core.star"].Star = Star
+
+pkg = types.ModuleType("love_formula")
+pkg.__path__ = [{plugin_dir!r}]
+sys.modules["love_formula"] = pkg
+import love_formula.main
+"""
+
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure() -> list[tuple[int, int, int, str]]:
+    """返回 [(self_us, cumulative_us, 缩进层级, 模块名)]"""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            PRELUDE.format(plugin_dir=plugin_dir),
+        ],
+        capture_output=True,
+        text=True,
+        cwd=plugin_dir,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit("FAIL: 插件导入失败")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cum_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cum_us), len(indent) // 2, name))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="插件导入耗时基准")
+    parser.add_argument(
+        "--budget-ms", type=float, default=0, help="main 模块导入耗时上限"
+    )
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = measure()
+    main_row = next((r for r in rows if r[3] == "love_formula.main"), None)
+    if main_row is None:
+        print("FAIL: 未找到 love_formula.main 的导入记录")
+        return 1
+    total_ms = main_row[1] / 1000
+    print(f"love_formula.main 导入耗时: {total_ms:.1f} ms (含依赖)")
+
+    print(f"\n耗时最多的顶层依赖 (前 {args.top}):")
+    top_level = {}
+    for _, cum_us, _, name in rows:
+        root = name.split(".")[0]
+        if name == root:
+            top_level[root] = max(top_level.get(root, 0), cum_us)
+    for name, cum_us in sorted(top_level.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+    ok = True
+    loaded = sorted({r[3].split(".")[0] for r in rows} & set(DEFERRED_MODULES))
+    if loaded:
+        print(f"\nFAIL: 插件加载阶段导入了应延迟加载的依赖: {', '.join(loaded)}")
+        ok = False
+    else:
+        print(f"\nPASS: 加载阶段未导入 {', '.join(DEFERRED_MODULES)}")
+
+    if args.budget_ms and total_ms > args.budget_ms:
+        print(f"FAIL: 导入耗时 {total_ms:.1f} ms 超出预算 {args.budget_ms:.0f} ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.analysis.json_repair import extract_json  # noqa: E402
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(__file__), "data", "llm_malformed_outputs.json"
+)
+
+# 单个输入允许的最坏耗时 (秒)
+WORST_CASE_BUDGET = 0.25
+
+
+def _adversarial_inputs() -> dict[str, str]:
+    """构造容易让回溯型正则退化的畸形输出"""
+    return {
+        "unclosed_string_200k": '{"ANALYSIS": "' + "啊" * 200_000,
+        "quote_storm_100k": '{"ANALYSIS": "' + '"x' * 50_000 + "}",
+        "comma_storm_100k": "{" + "," * 100_000 + "}",
+        "deep_nesting_10k": "[" * 10_000 + "]" * 10_000,
+        "many_open_braces": "{" * 50_000,
+        "analysis_without_end": "ANALYSIS: " + "x" * 200_000,
+        "keywords_storm": '{"KEYWORDS": [' + "#标签, " * 30_000,
+    }
+
+
+def test_corpus() -> int:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    failures = 0
+    for case in cases:
+        got = extract_json(case["input"])
+        if got == case["expected"]:
+            print(f"PASS: {case['name']}")
+        else:
+            failures += 1
+            print(f"FAIL: {case['name']}\n  expected={case['expected']}\n  got={got}")
+    return failures
+
+
+def test_worst_case_time() -> int:
+    failures = 0
+    for name, payload in _adversarial_inputs().items():
+        start = time.perf_counter()
+        extract_json(payload)
+        elapsed = time.perf_counter() - start
+        status = "PASS" if elapsed < WORST_CASE_BUDGET else "FAIL"
+        if status == "FAIL":
+            failures += 1
+        print(
+            f"{status}: {name} ({len(payload) / 1024:.0f} KB) -> {elapsed * 1000:.1f} ms"
+        )
+    return failures
+
+
+if __name__ == "__main__":
+    print("--- JSON Repair Regression Corpus ---")
+    failed = test_corpus()
+    print("\n--- Worst-case Timing ---")
+    failed += test_worst_case_time()
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,101 @@
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+
+from jinja2 import Environment, FileSystemLoader
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+from src.utils.blocking import BlockingExecutor, b64encode_file  # noqa: E402
+from src.utils.loop_monitor import LoopLagMonitor  # noqa: E402
+from src.utils.metrics import MetricsRegistry  # noqa: E402
+
+THEMES_DIR = os.path.join(plugin_dir, "assets", "themes")
+CONCURRENT_REQUESTS = 8
+IMAGE_BYTES = 4 * 1024 * 1024  # 模拟一张 4MB 的 PNG 卡片
+
+SAMPLE_DATA = {
+    "user_name": "测试用户",
+    "user_id": "123456",
+    "avatar_url": "data:image/png;base64," + "A" * 200_000,
+    "title": "纯爱战神",
+    "score": 88,
+    "metrics": {"纯爱值": "72%", "存在感": "45%", "败犬值": "12%"},
+    "logic_insights": ["<b>高频输出</b>：今日发言密度远超群平均水平。"] * 5,
+    "comment": "你的每一条消息都像在等一个不会来的回复。" * 10,
+    "equation": "J<sub>love</sub> = 88",
+    "deep_dive": None,
+    "generated_time": "2026-01-18 16:00:00",
+}
+
+
+def render_template(template) -> str:
+    return template.render(data=SAMPLE_DATA, theme_config={}, header_bg="")
+
+
+def encode_whole(path: str) -> str:
+    """改造前：一次性读入并整体编码"""
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+async def run_variant(name: str, offload: bool, template, image_path: str) -> dict:
+    metrics = MetricsRegistry()
+    monitor = LoopLagMonitor(metrics, interval=0.01)
+    executor = BlockingExecutor(workers=4)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    async def request():
+        # 模拟一次 "渲染 + Base64 回退发送" 中的阻塞步骤
+        if offload:
+            await executor.run("jinja", render_template, template)
+            await executor.run("b64", b64encode_file, image_path)
+        else:
+            render_template(template)
+            encode_whole(image_path)
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*(request() for _ in range(CONCURRENT_REQUESTS)))
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    executor.shutdown()
+
+    lag = metrics.snapshot("loop.lag")["loop.lag"]
+    print(
+        f"{name}: 循环延迟 p95 {lag['p95']:.1f} ms, 最大 {monitor.max_lag_ms:.1f} ms"
+        f" ({lag['count']} 个样本)"
+    )
+    return {"p95": lag["p95"], "max": monitor.max_lag_ms}
+
+
+async def main() -> int:
+    env = Environment(loader=FileSystemLoader(THEMES_DIR))
+    template = env.get_template("galgame/template.html")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "card.png")
+        with open(image_path, "wb") as f:
+            f.write(os.urandom(IMAGE_BYTES))
+
+        if encode_whole(image_path) != b64encode_file(image_path):
+            print("FAIL: 分块编码结果与整体编码不一致")
+            return 1
+        print("PASS: 分块 Base64 编码结果一致")
+
+        before = await run_variant("before (事件循环内)", False, template, image_path)
+        after = await run_variant("after (线程池)", True, template, image_path)
+
+    if after["max"] < before["max"]:
+        print(f"PASS: 最大循环延迟 {before['max']:.0f} ms -> {after['max']:.0f} ms")
+        return 0
+    print("FAIL: 卸载到线程池后循环延迟没有下降")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from sqlalchemy import and_, select  # noqa: E402
+
+from src.analysis.calculator import LoveCalculator  # noqa: E402
+from src.models.dto import DailyCounters  # noqa: E402
+from src.models.tables import LoveDailyRef, MessageOwnerIndex  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+GROUP_ID = "10001"
+USER_ID = "20001"
+OLD_DAY = date.today() - timedelta(days=5)
+ROUNDS = 1000
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+# ---------- 改造前的 ORM 实现 (Session + SQLModel 实例) ----------
+async def orm_save_message_index(db: DBManager, message_id: str) -> None:
+    async with db.get_session() as session:
+        session.add(
+            MessageOwnerIndex(
+                message_id=message_id,
+                group_id=GROUP_ID,
+                user_id=USER_ID,
+                timestamp=time.time(),
+            )
+        )
+
+
+async def orm_get_message_owner(db: DBManager, message_id: str):
+    async with db.get_read_session() as session:
+        stmt = select(MessageOwnerIndex).where(
+            and_(MessageOwnerIndex.message_id == message_id)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+async def orm_get_data_by_date(db: DBManager, target_date: date):
+    async with db.get_read_session() as session:
+        stmt = select(LoveDailyRef).where(
+            and_(
+                LoveDailyRef.date == target_date,
+                LoveDailyRef.group_id == GROUP_ID,
+                LoveDailyRef.user_id == USER_ID,
+            )
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+async def per_call_us(rounds: int, op) -> float:
+    start = time.perf_counter()
+    for i in range(rounds):
+        await op(i)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def seed(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO love_daily_ref (date, group_id, user_id, msg_sent, "
+        "text_len_total, reply_sent, reply_received, poke_sent, poke_received, "
+        "reaction_sent, reaction_received, recall_count, repeat_count, "
+        "image_sent, topic_count, updated_at) "
+        "VALUES (?, ?, ?, 30, 600, 4, 6, 1, 2, 3, 1, 0, 2, 5, 3, 0)",
+        (OLD_DAY.isoformat(), int(GROUP_ID), int(USER_ID)),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "overhead.db")
+        db = DBManager(path)
+        await db.init_db()
+        seed(path)
+        repo = LoveRepo(db)
+
+        # 1. 结果一致
+        await repo.save_message_index("1", GROUP_ID, USER_ID)
+        owner = await repo.get_message_owner("1")
+        legacy_owner = await orm_get_message_owner(db, "1")
+        check(
+            "Core 与 ORM 读取的消息归属一致",
+            owner is not None
+            and legacy_owner is not None
+            and (owner.message_id, owner.user_id, owner.group_id)
+            == (legacy_owner.message_id, legacy_owner.user_id, legacy_owner.group_id),
+        )
+        ref = await repo.get_data_by_date(GROUP_ID, USER_ID, OLD_DAY)
+        legacy_ref = await orm_get_data_by_date(db, OLD_DAY)
+        check(
+            "Core 与 ORM 读取的每日数据一致",
+            ref is not None
+            and legacy_ref is not None
+            and ref.model_dump() == legacy_ref.model_dump(),
+        )
+        calc = LoveCalculator()
+        check(
+            "DailyCounters 与 LoveDailyRef 计算结果一致",
+            calc.calculate_scores(ref, 40) == calc.calculate_scores(legacy_ref, 40),
+        )
+
+        # 2. 单次调用开销
+        rows = [
+            (
+                "save_message_index",
+                await per_call_us(
+                    ROUNDS, lambda i: orm_save_message_index(db, str(10**6 + i))
+                ),
+                await per_call_us(
+                    ROUNDS,
+                    lambda i: repo.save_message_index(
+                        str(2 * 10**6 + i), GROUP_ID, "2"
+                    ),
+                ),
+            ),
+            (
+                "get_message_owner",
+                await per_call_us(
+                    ROUNDS, lambda i: orm_get_message_owner(db, str(10**6 + i))
+                ),
+                await per_call_us(
+                    ROUNDS, lambda i: repo.get_message_owner(str(2 * 10**6 + i))
+                ),
+            ),
+            (
+                "get_data_by_date (历史)",
+                await per_call_us(ROUNDS, lambda i: orm_get_data_by_date(db, OLD_DAY)),
+                await per_call_us(
+                    ROUNDS, lambda i: repo.get_data_by_date(GROUP_ID, USER_ID, OLD_DAY)
+                ),
+            ),
+        ]
+        await db.close()
+
+    # 3. 构造行对象并计算得分 (不含 I/O)
+    mapping = ref.model_dump()
+    start = time.perf_counter()
+    for _ in range(ROUNDS * 10):
+        calc.calculate_scores(LoveDailyRef.model_validate(mapping), 40)
+    orm_calc = (time.perf_counter() - start) / (ROUNDS * 10) * 1e6
+    start = time.perf_counter()
+    for _ in range(ROUNDS * 10):
+        calc.calculate_scores(DailyCounters.from_mapping(mapping), 40)
+    dto_calc = (time.perf_counter() - start) / (ROUNDS * 10) * 1e6
+    rows.append(("构造行 + calculate_scores", orm_calc, dto_calc))
+
+    print(f"\n{'调用':<26}{'ORM (µs)':>10}{'Core/DTO (µs)':>15}{'节省':>8}")
+    for name, orm_us, core_us in rows:
+        saved = (1 - core_us / orm_us) * 100
+        print(f"BENCH: {name:<20}{orm_us:>10.1f}{core_us:>15.1f}{saved:>7.0f}%")
+    check("Core/DTO 路径的单次开销均低于 ORM", all(c < o for _, o, c in rows))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from src.persistence import ids  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+# 引入整数 ID 之前的表结构 (TEXT ID + 与主键重复的 idx_message_id)
+LEGACY_SCHEMA = """
+CREATE TABLE love_daily_ref (
+    id INTEGER NOT NULL PRIMARY KEY, date DATE NOT NULL,
+    group_id VARCHAR NOT NULL, user_id VARCHAR NOT NULL,
+    msg_sent INTEGER NOT NULL DEFAULT 0, text_len_total INTEGER NOT NULL DEFAULT 0,
+    reply_sent INTEGER NOT NULL DEFAULT 0, reply_received INTEGER NOT NULL DEFAULT 0,
+    poke_sent INTEGER NOT NULL DEFAULT 0, poke_received INTEGER NOT NULL DEFAULT 0,
+    reaction_sent INTEGER NOT NULL DEFAULT 0,
+    reaction_received INTEGER NOT NULL DEFAULT 0,
+    recall_count INTEGER NOT NULL DEFAULT 0, repeat_count INTEGER NOT NULL DEFAULT 0,
+    image_sent INTEGER NOT NULL DEFAULT 0, topic_count INTEGER NOT NULL DEFAULT 0,
+    updated_at FLOAT NOT NULL DEFAULT 0
+);
+CREATE INDEX ix_love_daily_ref_date ON love_daily_ref (date);
+CREATE INDEX ix_love_daily_ref_group_id ON love_daily_ref (group_id);
+CREATE INDEX ix_love_daily_ref_user_id ON love_daily_ref (user_id);
+CREATE TABLE message_owner_index (
+    message_id VARCHAR NOT NULL PRIMARY KEY, user_id VARCHAR NOT NULL,
+    group_id VARCHAR NOT NULL, timestamp FLOAT NOT NULL
+);
+CREATE INDEX idx_message_id ON message_owner_index (message_id);
+CREATE TABLE user_cooldown (
+    user_id VARCHAR NOT NULL, group_id VARCHAR NOT NULL,
+    last_rate_at FLOAT NOT NULL, PRIMARY KEY (user_id, group_id)
+);
+CREATE TABLE report_request_log (
+    date DATE NOT NULL, group_id VARCHAR NOT NULL, user_id VARCHAR NOT NULL,
+    nickname VARCHAR NOT NULL, request_count INTEGER NOT NULL,
+    last_request_at FLOAT NOT NULL, PRIMARY KEY (date, group_id, user_id)
+);
+"""
+
+GROUPS = 20
+USERS_PER_GROUP = 300
+DAYS = 30
+BATCH = 500
+DAILY_COLUMNS = (
+    "date, group_id, user_id, msg_sent, text_len_total, reply_sent, "
+    "reply_received, poke_sent, poke_received, reaction_sent, reaction_received, "
+    "recall_count, repeat_count, image_sent, topic_count, updated_at"
+)
+
+
+def sample_rows(messages: int) -> tuple[list[tuple], list[tuple]]:
+    rng = random.Random(42)
+    groups = [str(rng.randint(10**8, 10**9)) for _ in range(GROUPS)]
+    users = [str(rng.randint(10**8, 4 * 10**9)) for _ in range(USERS_PER_GROUP)]
+    msg_rows = [
+        (
+            str(rng.randint(-(2**31), 2**31 - 1)),
+            rng.choice(users),
+            rng.choice(groups),
+            t,
+        )
+        for t in range(messages)
+    ]
+    daily_rows = [
+        (date.fromordinal(date.today().toordinal() - d).isoformat(), g, u, 10, 200)
+        + (0,) * 10
+        + (float(d),)
+        for d in range(DAYS)
+        for g in groups
+        for u in users[: USERS_PER_GROUP // 3]
+    ]
+    return msg_rows, daily_rows
+
+
+def fill(path: str, schema: str | None, msg_rows, daily_rows) -> dict:
+    """按 BATCH 行一个事务写入，返回写入吞吐 (行/秒)；schema 为空时按整数 ID 编码"""
+    encode = schema is None
+    conn = sqlite3.connect(path)
+    if schema:
+        conn.executescript(schema)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    def insert(sql: str, rows: list[tuple], id_positions: tuple[int, ...]) -> float:
+        if encode:
+            # ID 编码 (运行时由 PlatformId 完成) 不计入 SQLite 写入耗时
+            rows = [
+                tuple(
+                    ids.encode_id(v) if n in id_positions else v
+                    for n, v in enumerate(row)
+                )
+                for row in rows
+            ]
+        start = time.perf_counter()
+        for i in range(0, len(rows), BATCH):
+            with conn:
+                conn.executemany(sql, rows[i : i + BATCH])
+        return len(rows) / (time.perf_counter() - start)
+
+    result = {
+        "msg_ops": insert(
+            "INSERT OR IGNORE INTO message_owner_index "
+            "(message_id, user_id, group_id, timestamp) VALUES (?, ?, ?, ?)",
+            msg_rows,
+            (0, 1, 2),
+        ),
+        "daily_ops": insert(
+            f"INSERT INTO love_daily_ref ({DAILY_COLUMNS}) "
+            f"VALUES ({', '.join('?' * 16)})",
+            daily_rows,
+            (1, 2),
+        ),
+    }
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    result["size"] = os.path.getsize(path)
+    return result
+
+
+async def init_db(path: str) -> float:
+    """用插件自身的迁移建库或升级旧库，返回耗时"""
+    start = time.perf_counter()
+    db = DBManager(path)
+    await db.init_db()
+    elapsed = time.perf_counter() - start
+    await db.close()
+    return elapsed
+
+
+async def verify_roundtrip(path: str, msg_rows) -> bool:
+    db = DBManager(path)
+    await db.init_db()
+    repo = LoveRepo(db)
+    ok = True
+    for message_id, user_id, group_id, _ in msg_rows[:200]:
+        owner = await repo.get_message_owner(message_id)
+        if owner is None or (owner.user_id, owner.group_id) != (user_id, group_id):
+            ok = False
+            break
+    await db.close()
+    return ok
+
+
+def fmt_size(size: int) -> str:
+    return f"{size / 1024 / 1024:6.2f} MB"
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="整数 ID 存储布局基准")
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+
+    msg_rows, daily_rows = sample_rows(args.messages)
+    # 重复的消息 ID 只保留首次写入，与 INSERT OR IGNORE 的结果对齐
+    expected = {row[0]: row for row in reversed(msg_rows)}
+    print(
+        f"数据量: message_owner_index {len(expected)} 行, "
+        f"love_daily_ref {len(daily_rows)} 行"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        compact_path = os.path.join(tmp, "compact.db")
+
+        before = fill(legacy_path, LEGACY_SCHEMA, msg_rows, daily_rows)
+        await init_db(compact_path)
+        after = fill(compact_path, None, msg_rows, daily_rows)
+
+        for name, r in (("before (TEXT)", before), ("after (INTEGER)", after)):
+            print(
+                f"BENCH: {name:16s} 文件 {fmt_size(r['size'])} | "
+                f"消息索引写入 {r['msg_ops']:9.0f} 行/s | "
+                f"日数据写入 {r['daily_ops']:9.0f} 行/s"
+            )
+
+        legacy_size = os.path.getsize(legacy_path)
+        elapsed = await init_db(legacy_path)
+        print(
+            f"BENCH: 旧库迁移耗时 {elapsed:.2f} s, 文件 {fmt_size(legacy_size)} -> "
+            f"{fmt_size(os.path.getsize(legacy_path))}"
+        )
+
+        ok = await verify_roundtrip(legacy_path, list(expected.values()))
+        print(f"{'PASS' if ok else 'FAIL'}: 迁移后按字符串 ID 读取结果一致")
+
+    if after["size"] >= before["size"]:
+        print("FAIL: 整数 ID 布局没有减小数据库体积")
+        return 1
+    print(f"PASS: 数据库体积减少 {1 - after['size'] / before['size']:.0%}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+import time
+
+from jinja2 import DictLoader, Environment
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+THEMES_DIR = os.path.join(plugin_dir, "assets", "themes")
+FONTS_CSS = os.path.join(THEMES_DIR, "galgame", "fonts.css")
+ROUNDS = 5
+
+# 构建离线字体包之前模板依赖的外部资源
+REMOTE_IMPORTS = """
+@import url('https://fonts.googleapis.com/css2?family=ZCOOL+KuaiLe&display=swap');
+@import url('https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;700&display=swap');
+@import url('https://cdn.jsdelivr.net/npm/katex@0.16.9/dist/katex.min.css');
+"""
+
+SAMPLE_DATA = {
+    "user_name": "测试用户",
+    "user_id": "123456",
+    "avatar_url": "",
+    "title": "纯爱战神",
+    "score": 88,
+    "metrics": {
+        "纯爱值": "72%",
+        "存在感": "45%",
+        "败犬值": "12%",
+        "白月光指数": "60%",
+        "营业频率": "42条/日",
+        "小作文功率": "18字/条",
+    },
+    "logic_insights": ["<b>高频输出</b>：今日发言密度远超群平均水平。"],
+    "comment": "你的每一条消息都像在等一个不会来的回复。",
+    "equation": "J<sub>love</sub> = 88",
+    "deep_dive": None,
+    "generated_time": "2026-01-18 16:00:00",
+}
+
+
+def build_html(variant: str) -> str:
+    """variant: before = 远程 @import；after = 离线字体包"""
+    template_path = os.path.join(THEMES_DIR, "galgame", "template.html")
+    with open(template_path, encoding="utf-8") as f:
+        source = f.read()
+
+    if variant == "before":
+        fonts = REMOTE_IMPORTS
+    elif os.path.exists(FONTS_CSS):
+        with open(FONTS_CSS, encoding="utf-8") as f:
+            fonts = f.read()
+    else:
+        fonts = ""
+
+    env = Environment(
+        loader=DictLoader({"galgame/template.html": source, "galgame/fonts.css": fonts})
+    )
+    return env.get_template("galgame/template.html").render(
+        data=SAMPLE_DATA, theme_config={}, header_bg=""
+    )
+
+
+async def time_screenshots(html: str) -> list[float] | None:
+    """用 pyppeteer 截图计时；未安装浏览器环境时返回 None"""
+    try:
+        from pyppeteer import launch
+    except ImportError:
+        return None
+
+    browser = await launch(args=["--no-sandbox", "--disable-setuid-sandbox"])
+    timings = []
+    try:
+        for _ in range(ROUNDS):
+            page = await browser.newPage()
+            await page.setViewport({"width": 600, "height": 1000})
+            start = time.perf_counter()
+            await page.setContent(html, {"waitUntil": "networkidle0", "timeout": 30000})
+            await page.screenshot({"fullPage": True})
+            timings.append(time.perf_counter() - start)
+            await page.close()
+    finally:
+        await browser.close()
+    return timings
+
+
+async def main() -> int:
+    if not os.path.exists(FONTS_CSS):
+        print(f"WARN: 未找到 {FONTS_CSS}，请先运行 scripts/build_theme_bundle.py")
+
+    results = {}
+    for variant in ("before", "after"):
+        html = build_html(variant)
+        remote = html.count("https://")
+        print(f"{variant}: HTML {len(html) / 1024:.1f} KB, 外部资源引用 {remote} 处")
+        if variant == "after" and remote:
+            print("FAIL: 离线模板仍引用外部资源")
+            return 1
+        timings = await time_screenshots(html)
+        if timings is None:
+            print("SKIP: 未安装 pyppeteer，跳过截图计时")
+            continue
+        results[variant] = timings
+        print(
+            f"{variant}: 平均 {sum(timings) / len(timings) * 1000:.0f} ms, "
+            f"最慢 {max(timings) * 1000:.0f} ms ({ROUNDS} 次)"
+        )
+
+    if len(results) == 2:
+        before = sum(results["before"]) / ROUNDS
+        after = sum(results["after"]) / ROUNDS
+        print(f"PASS: 渲染耗时 {before * 1000:.0f} ms -> {after * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
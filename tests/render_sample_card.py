@@ -35,6 +35,8 @@ mock_config_module = MagicMock()
 sys.modules["astrbot.core.config"] = mock_config_module
 
 # Now import renderer
+from src.utils.http_client import SharedHttpClient  # noqa: E402
+from src.visual.avatar_cache import AvatarCache  # noqa: E402
 from src.visual.renderer import LoveRenderer  # noqa: E402
 from src.visual.theme_manager import ThemeManager  # noqa: E402
 
@@ -67,7 +69,12 @@ async def main():
     theme_mgr = ThemeManager(plugin_dir)
     print(f"ThemeManager initialized with root: {plugin_dir}")
     print(f"ThemeManager resolved themes_dir: {theme_mgr.themes_dir}")
-    renderer = LoveRenderer(context, theme_mgr)
+    renderer = LoveRenderer(
+        context,
+        theme_mgr,
+        AvatarCache(os.path.join(plugin_dir, "tests", "avatar_cache")),
+        SharedHttpClient(),
+    )
 
     # Mock Data
     data = {
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the visual layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from src.utils.blocking import BlockingExecutor  # noqa: E402
+from src.utils.metrics import MetricsRegistry  # noqa: E402
+from src.visual.avatar_cache import AvatarCache, AvatarEntry  # noqa: E402
+
+UIDS = ["123456", "wx_user/42", "用户甲", "ABC", "abc"]
+CONTENT = b"\x89PNG fake avatar"
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+async def verify_disk_keys() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AvatarCache(tmp)
+        for uid in UIDS:
+            entry = AvatarEntry("data:image/png;base64,", len(CONTENT), "", "", 0.0)
+            entry.fetched_at = time.time()
+            cache._write_disk((uid, 100), entry, CONTENT)
+
+        names = {n[:-4] for n in os.listdir(tmp) if n.endswith(".img")}
+        check("每个 uid 对应独立文件", len(names) == len(UIDS), str(sorted(names)))
+
+        # 重启后由文件名还原出原始 uid
+        metrics = MetricsRegistry()
+        restarted = AvatarCache(tmp, executor=BlockingExecutor(metrics=metrics))
+        session = MagicMock()
+        uris = [await restarted.get(uid, 100, session) for uid in UIDS]
+        index = restarted._disk_index
+        check(
+            "重建的磁盘索引使用原始 uid",
+            sorted(k[0] for k in index) == sorted(UIDS),
+            str(list(index)),
+        )
+        check(
+            "重启后全部命中磁盘缓存且不发起下载",
+            all(uris)
+            and restarted.stats["disk_hits"] == len(UIDS)
+            and not session.get.called,
+        )
+        check(
+            "磁盘读写经由共享线程池",
+            "blocking.avatar_disk" in metrics.snapshot("blocking."),
+        )
+
+
+def main() -> int:
+    asyncio.run(verify_disk_keys())
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+sys.modules["astrbot.api.event"] = mock_astrbot.api.event
+sys.modules["astrbot.core.star.context"] = mock_astrbot.core.star.context
+
+from sqlalchemy import event  # noqa: E402
+
+from src.handlers.history_fetcher import OneBotAdapter  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.hot_tier import DailyHotTier  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+GROUP_ID = "10001"
+TODAY = date.today()
+HONORS = {
+    "talkative": {"user_id": 1},
+    "performer": [{"user_id": 2}, {"user_id": 2}],
+    "emotion": [{"user_id": 1}, {"user_id": 3}],
+}
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+def db_counters(path: str) -> dict[int, tuple]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT user_id, msg_sent, reply_received, image_sent FROM love_daily_ref "
+        "WHERE date = ?",
+        (TODAY.isoformat(),),
+    ).fetchall()
+    conn.close()
+    return {r[0]: r[1:] for r in rows}
+
+
+async def open_repo(path: str) -> LoveRepo:
+    db = DBManager(path)
+    await db.init_db()
+    repo = LoveRepo(db, DailyHotTier(db, interval=3600))
+    await repo.hot.start()
+    return repo
+
+
+async def close_repo(repo: LoveRepo) -> None:
+    await repo.hot.stop()
+    await repo.db.close()
+
+
+async def verify_ledger() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "honor.db")
+        repo = await open_repo(path)
+
+        writes = []
+
+        def on_execute(conn, cursor, statement, *args):
+            if "honor_bonus_ledger" in statement:
+                writes.append(statement)
+
+        event.listen(repo.db.engine.sync_engine, "before_cursor_execute", on_execute)
+
+        # 1. 首次发放：一条批量写入，重复的荣誉只计一次
+        updated = await repo.apply_honor_bonus(GROUP_ID, HONORS)
+        expected = {1: (20, 5, 5), 2: (0, 10, 0), 3: (0, 0, 5)}
+        check(
+            "首次发放加成并立即落盘",
+            sorted(updated) == ["1", "2", "3"] and db_counters(path) == expected,
+            str(db_counters(path)),
+        )
+        check("发放记录一次批量写入", len(writes) == 1, f"{len(writes)} 条语句")
+
+        # 2. 同日重复请求：不再加成，也不再访问数据库
+        again = await repo.apply_honor_bonus(GROUP_ID, HONORS)
+        check(
+            "同日重复发放无效且不访问数据库",
+            again == {} and db_counters(path) == expected and len(writes) == 1,
+        )
+
+        # 3. 当天新出现的荣誉仍会发放
+        later = {**HONORS, "performer": [{"user_id": 2}, {"user_id": 4}]}
+        updated = await repo.apply_honor_bonus(GROUP_ID, later)
+        check("新增荣誉只加成新用户", sorted(updated) == ["4"])
+
+        # 4. 重启后内存记录丢失，由发放记录表保证不重复加成
+        await close_repo(repo)
+        repo = await open_repo(path)
+        updated = await repo.apply_honor_bonus(GROUP_ID, later)
+        counters = db_counters(path)
+        check(
+            "重启后不重复加成",
+            updated == {} and counters == {**expected, 4: (0, 10, 0)},
+            str(counters),
+        )
+        await close_repo(repo)
+
+
+async def verify_honor_cache() -> None:
+    adapter = OneBotAdapter(MagicMock(), {})
+    call_action = AsyncMock(return_value=HONORS)
+
+    async def slow_call(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return await call_action(*args, **kwargs)
+
+    evt = MagicMock()
+    evt.message_obj.group_id = GROUP_ID
+    evt.bot.api.call_action = slow_call
+
+    first = await asyncio.gather(*(adapter.fetch_group_honor(evt) for _ in range(5)))
+    check(
+        "同一群的并发请求合并为一次调用",
+        call_action.await_count == 1 and all(r == HONORS for r in first),
+    )
+    for _ in range(10):
+        await adapter.fetch_group_honor(evt)
+    check("当天后续请求命中缓存", call_action.await_count == 1)
+
+    # 获取为空时在 HONOR_RETRY_SEC 内不重试
+    empty = OneBotAdapter(MagicMock(), {})
+    call_action.return_value = {}
+    call_action.reset_mock()
+    await empty.fetch_group_honor(evt)
+    await empty.fetch_group_honor(evt)
+    check("空结果在重试间隔内不重复请求", call_action.await_count == 1)
+
+
+def main() -> int:
+    asyncio.run(verify_ledger())
+    asyncio.run(verify_honor_cache())
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
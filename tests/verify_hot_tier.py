@@ -0,0 +1,197 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from sqlalchemy import and_, event, select  # noqa: E402
+
+from src.models.tables import LoveDailyRef  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.hot_tier import DailyHotTier  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+GROUP_ID = "10001"
+TODAY = date.today()
+BENCH_ROUNDS = 2000
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+def db_rows(path: str, day: date) -> dict[int, tuple]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT user_id, msg_sent, reply_received FROM love_daily_ref WHERE date = ?",
+        (day.isoformat(),),
+    ).fetchall()
+    conn.close()
+    return {r[0]: r[1:] for r in rows}
+
+
+async def open_repo(path: str) -> LoveRepo:
+    db = DBManager(path)
+    await db.init_db()
+    repo = LoveRepo(db, DailyHotTier(db, interval=3600))
+    await repo.hot.start()
+    return repo
+
+
+async def close_repo(repo: LoveRepo) -> None:
+    await repo.hot.stop()
+    await repo.db.close()
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hot.db")
+        repo = await open_repo(path)
+
+        # 1. 写入只进入内存，读取立即可见
+        for _ in range(5):
+            await repo.update_msg_stats(GROUP_ID, "1", 10)
+        await repo.update_interaction_received(GROUP_ID, "1", reply=2)
+        today = await repo.get_today_data(GROUP_ID, "1")
+        check(
+            "计数写入内存后立即可读",
+            today is not None and today.msg_sent == 5 and today.reply_received == 2,
+        )
+        check("落盘前数据库中没有今日行", db_rows(path, TODAY) == {})
+
+        # 2. 落盘
+        written = await repo.hot.checkpoint()
+        check("落盘写入变更行", written == 1 and db_rows(path, TODAY) == {1: (5, 2)})
+
+        # 3. 落盘期间的并发写入不会丢失
+        async def writer(uid: str):
+            for _ in range(50):
+                await repo.update_msg_stats(GROUP_ID, uid, 1)
+                await asyncio.sleep(0)
+
+        async def flusher():
+            for _ in range(10):
+                await repo.hot.checkpoint()
+                await asyncio.sleep(0)
+
+        await asyncio.gather(writer("1"), writer("2"), writer("3"), flusher())
+        await repo.hot.checkpoint()
+        rows = db_rows(path, TODAY)
+        check(
+            "落盘与写入并发时计数完整",
+            rows == {1: (55, 2), 2: (50, 0), 3: (50, 0)},
+            str(rows),
+        )
+
+        # 4. 历史日期走数据库，趋势查询合并内存与数据库
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "INSERT INTO love_daily_ref (date, group_id, user_id, msg_sent, "
+            "text_len_total, reply_sent, reply_received, poke_sent, poke_received, "
+            "reaction_sent, reaction_received, recall_count, repeat_count, "
+            "image_sent, topic_count, updated_at) "
+            "VALUES (?, ?, 1, 7, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)",
+            ((TODAY - timedelta(days=5)).isoformat(), int(GROUP_ID)),
+        )
+        conn.commit()
+        conn.close()
+        old = await repo.get_data_by_date(GROUP_ID, "1", TODAY - timedelta(days=5))
+        await repo.update_msg_stats(GROUP_ID, "1", 1)  # 未落盘
+        trend = await repo.get_user_daily_refs(
+            GROUP_ID, "1", TODAY - timedelta(days=7), TODAY
+        )
+        check("历史日期从数据库读取", old is not None and old.msg_sent == 7)
+        check(
+            "趋势查询以内存中的今日数据为准",
+            [r.msg_sent for r in trend] == [7, 56],
+            str([(str(r.date), r.msg_sent) for r in trend]),
+        )
+
+        queries = []
+
+        def on_execute(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        event.listen(
+            repo.db.read_engine.sync_engine, "before_cursor_execute", on_execute
+        )
+        today_ref, yesterday_ref = await repo.get_today_and_yesterday(GROUP_ID, "1")
+        check(
+            "今日+昨日一次取回且不访问数据库",
+            today_ref is trend[-1] and yesterday_ref is None and queries == [],
+        )
+        days = await repo.get_user_days(
+            GROUP_ID, "1", TODAY - timedelta(days=30), TODAY
+        )
+        check(
+            "跨越历史与热层的区间只查询一次数据库",
+            sorted(days) == [TODAY - timedelta(days=5), TODAY] and len(queries) == 1,
+            f"{len(queries)} 次查询",
+        )
+        event.remove(
+            repo.db.read_engine.sync_engine, "before_cursor_execute", on_execute
+        )
+
+        ranking = await repo.get_group_daily_refs(GROUP_ID, TODAY, min_msg=51)
+        check("群榜单读取内存", [r.user_id for r in ranking] == ["1"])
+
+        # 5. 重启后从数据库恢复，继续累加到同一行
+        await close_repo(repo)
+        repo = await open_repo(path)
+        restored = await repo.get_today_data(GROUP_ID, "1")
+        check("重启后恢复今日计数", restored is not None and restored.msg_sent == 56)
+        await repo.update_msg_stats(GROUP_ID, "1", 1)
+        await repo.hot.checkpoint()
+        conn = sqlite3.connect(path)
+        count = conn.execute(
+            "SELECT COUNT(*) FROM love_daily_ref WHERE date = ? AND user_id = 1",
+            (TODAY.isoformat(),),
+        ).fetchone()[0]
+        conn.close()
+        check("恢复后更新原有行而不是插入新行", count == 1)
+
+        # 6. 报告路径读取耗时：内存热层 vs ORM 查询
+        start = time.perf_counter()
+        for _ in range(BENCH_ROUNDS):
+            await repo.get_today_data(GROUP_ID, "1")
+        hot_us = (time.perf_counter() - start) / BENCH_ROUNDS * 1e6
+
+        start = time.perf_counter()
+        for _ in range(BENCH_ROUNDS // 10):
+            async with repo.db.get_read_session() as session:
+                result = await session.execute(
+                    select(LoveDailyRef).where(
+                        and_(
+                            LoveDailyRef.date == TODAY,
+                            LoveDailyRef.group_id == GROUP_ID,
+                            LoveDailyRef.user_id == "1",
+                        )
+                    )
+                )
+                result.scalar_one_or_none().model_dump()
+        orm_us = (time.perf_counter() - start) / (BENCH_ROUNDS // 10) * 1e6
+        print(f"BENCH: get_today_data 内存 {hot_us:.1f} µs | ORM 查询 {orm_us:.0f} µs")
+        check("内存读取快于数据库查询", hot_us < orm_us)
+
+        await close_repo(repo)
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the handlers
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+sys.modules["astrbot.api.event"] = mock_astrbot.api.event
+sys.modules["astrbot.core.star.context"] = mock_astrbot.core.star.context
+
+from src.handlers.history_fetcher import OneBotAdapter  # noqa: E402
+from src.handlers.member_directory import MemberDirectory  # noqa: E402
+
+GROUP_ID = "10001"
+MEMBERS = [
+    {"user_id": 1, "nickname": "阿一", "card": "一号群名片"},
+    {"user_id": 2, "nickname": "阿二", "card": ""},
+    {"user_id": 3, "nickname": "", "card": ""},
+]
+LOOKUPS = 100_000
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+def message_event(user_id: int, nickname: str, card: str = ""):
+    sender = {"user_id": user_id, "nickname": nickname, "card": card}
+    return SimpleNamespace(
+        message_obj=SimpleNamespace(
+            group_id=GROUP_ID,
+            raw_message={"post_type": "message", "sender": sender},
+            sender=SimpleNamespace(user_id=str(user_id), nickname=nickname),
+        )
+    )
+
+
+async def verify_directory() -> None:
+    fetch = AsyncMock(return_value=MEMBERS)
+    members = MemberDirectory(fetch, refresh_interval=3600)
+
+    # 1. 消息到达时立即记录发送者，并只触发一次后台整群拉取
+    for _ in range(20):
+        members.observe(message_event(9, "路人", card="九号"))
+    check("消息发送者立即可查", members.name(GROUP_ID, "9") == "九号")
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    check("多条消息只触发一次整群拉取", fetch.await_count == 1)
+    check(
+        "整群刷新后群名片优先、昵称兜底",
+        members.name(GROUP_ID, "1") == "一号群名片"
+        and members.name(GROUP_ID, "2") == "阿二"
+        and members.name(GROUP_ID, "3") is None,
+    )
+
+    # 2. 刷新后的增量更新 (改名片) 与刷新间隔
+    members.observe(message_event(2, "阿二", card="二号新名片"))
+    await asyncio.sleep(0)
+    check(
+        "增量更新覆盖旧名称且未到期不再拉取",
+        members.name(GROUP_ID, "2") == "二号新名片" and fetch.await_count == 1,
+    )
+
+    # 3. 拉取失败时按重试间隔再试
+    failing = MemberDirectory(AsyncMock(side_effect=RuntimeError("boom")))
+    failing.observe(message_event(5, "五"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    failing.observe(message_event(5, "五"))
+    await asyncio.sleep(0)
+    check(
+        "拉取失败不影响增量名录且在重试间隔内不重复请求",
+        failing.name(GROUP_ID, "5") == "五"
+        and failing.fetch_members.await_count == 1
+        and failing.stats["failures"] == 1,
+    )
+    await failing.stop()
+
+    # 4. 拉取期间观察到的名称在刷新后保留 (合并而非替换)
+    release = asyncio.Event()
+
+    async def slow_fetch(event):
+        await release.wait()
+        return MEMBERS
+
+    merging = MemberDirectory(slow_fetch)
+    merging.observe(message_event(1, "阿一", card="旧名片"))
+    await asyncio.sleep(0)
+    merging.observe(message_event(1, "阿一", card="拉取中改的名片"))
+    merging.observe(message_event(7, "新人"))
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    check(
+        "刷新合并拉取期间的增量更新",
+        merging.name(GROUP_ID, "1") == "拉取中改的名片"
+        and merging.name(GROUP_ID, "7") == "新人"
+        and merging.name(GROUP_ID, "2") == "阿二",
+        str(merging._members.get(GROUP_ID)),
+    )
+    await merging.stop()
+
+    # 5. 查询开销
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        members.name(GROUP_ID, "1")
+    per_lookup = (time.perf_counter() - start) / LOOKUPS * 1e9
+    print(
+        f"BENCH: 名录查询 {per_lookup:.0f} ns/次 ({members.snapshot()['members']} 人)"
+    )
+    await members.stop()
+
+
+async def verify_context_names() -> None:
+    members = MemberDirectory(AsyncMock(return_value=[]))
+    adapter = OneBotAdapter(MagicMock(), {"analyze_history_count": 10}, members)
+    now = time.time()
+    history = [
+        {
+            "message_id": i,
+            "time": now - 10 + i,
+            "sender": {"user_id": uid, "nickname": nick, "card": card},
+            "message": [{"type": "text", "data": {"text": f"第{i}句"}}],
+        }
+        for i, (uid, nick, card) in enumerate(
+            [(1, "阿一", "一号群名片"), (2, "阿二", ""), (1, "阿一", "一号群名片")]
+        )
+    ]
+    evt = MagicMock()
+    evt.message_obj.group_id = GROUP_ID
+    evt.self_id = "0"
+    evt.bot.self_id = "0"
+    evt.bot.api.call_action = AsyncMock(return_value={"messages": history})
+
+    context = await adapter.fetch_context(evt, "1")
+    names = {msg["user_id"]: msg["nickname"] for msg in context if msg.get("user_id")}
+    check(
+        "呈堂证供使用名录中的群名片",
+        names == {"1": "一号群名片", "2": "阿二"},
+        str(names),
+    )
+    check("历史消息的发送者写入名录", members.name(GROUP_ID, "2") == "阿二")
+
+
+def main() -> int:
+    asyncio.run(verify_directory())
+    asyncio.run(verify_context_names())
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+import src.models.tables  # noqa: E402, F401
+from src.persistence import migrations  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+
+# 引入版本号之前的旧库：旧版 user_cooldown (不按群隔离)、缺少后加的列、冗余索引
+LEGACY_SCHEMA = """
+CREATE TABLE love_daily_ref (
+    id INTEGER NOT NULL, date DATE NOT NULL, group_id VARCHAR NOT NULL,
+    user_id VARCHAR NOT NULL, msg_sent INTEGER NOT NULL,
+    text_len_total INTEGER NOT NULL, reply_sent INTEGER NOT NULL,
+    reply_received INTEGER NOT NULL, poke_sent INTEGER NOT NULL,
+    poke_received INTEGER NOT NULL, reaction_sent INTEGER NOT NULL,
+    reaction_received INTEGER NOT NULL, recall_count INTEGER NOT NULL,
+    image_sent INTEGER NOT NULL, updated_at FLOAT NOT NULL, PRIMARY KEY (id)
+);
+CREATE INDEX ix_love_daily_ref_date ON love_daily_ref (date);
+CREATE TABLE message_owner_index (
+    message_id VARCHAR NOT NULL, user_id VARCHAR NOT NULL,
+    group_id VARCHAR NOT NULL, timestamp FLOAT NOT NULL, PRIMARY KEY (message_id)
+);
+CREATE INDEX idx_message_id ON message_owner_index(message_id);
+CREATE TABLE user_cooldown (
+    user_id VARCHAR NOT NULL, last_rate_at FLOAT NOT NULL, PRIMARY KEY (user_id)
+);
+INSERT INTO love_daily_ref VALUES
+    (1, '2026-01-01', '10001', '20001', 5, 50, 1, 2, 0, 0, 0, 0, 0, 1, 0.0),
+    (2, '2026-01-01', 'qq-group', 'u-1', 3, 30, 0, 0, 0, 0, 0, 0, 0, 0, 0.0);
+INSERT INTO message_owner_index VALUES ('m1', '20001', '10001', 1.0);
+"""
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+def schema(path: str) -> dict[str, list]:
+    """表 -> 列 (名称, 类型, 非空, 主键序号)，索引 -> 列"""
+    conn = sqlite3.connect(path)
+    result = {}
+    tables = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for name, sql in tables:
+        columns = [
+            (r[1], r[2].upper(), r[3], r[5])
+            for r in conn.execute(f"PRAGMA table_info({name})")
+        ]
+        result[f"table {name}"] = columns + ["WITHOUT ROWID" in sql.upper()]
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' "
+        "AND name NOT LIKE 'sqlite_autoindex_%'"
+    ):
+        result[f"index {name}"] = [
+            r[2] for r in conn.execute(f"PRAGMA index_info({name})")
+        ]
+    conn.close()
+    return result
+
+
+def model_schema(tmp: str) -> dict[str, list]:
+    path = os.path.join(tmp, "models.db")
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    return schema(path)
+
+
+async def migrate(path: str) -> int:
+    db = DBManager(path)
+    await db.init_db()
+    await db.close()
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return version
+
+
+async def main() -> int:
+    latest = migrations.MIGRATIONS[-1].version
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = model_schema(tmp)
+
+        # 1. 新库：逐步迁移后与当前模型一致 (后续迁移创建各自的表与索引)
+        fresh = os.path.join(tmp, "fresh.db")
+        version = await migrate(fresh)
+        actual = schema(fresh)
+        diff = sorted(set(expected) ^ set(actual)) or [
+            k for k in expected if expected[k] != actual[k]
+        ]
+        check(f"新库迁移到 v{latest}", version == latest, f"v{version}")
+        check("新库结构与当前模型一致", not diff, str(diff))
+
+        # 2. 旧库：升级后结构一致且数据保留
+        legacy = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.close()
+        version = await migrate(legacy)
+        actual = schema(legacy)
+        diff = sorted(set(expected) ^ set(actual)) or [
+            k for k in expected if expected[k] != actual[k]
+        ]
+        check("旧库升级后结构与当前模型一致", not diff, str(diff))
+        conn = sqlite3.connect(legacy)
+        rows = conn.execute(
+            "SELECT group_id, user_id, msg_sent, topic_count FROM love_daily_ref "
+            "ORDER BY id"
+        ).fetchall()
+        owners = conn.execute("SELECT user_id FROM message_owner_index").fetchall()
+        conn.close()
+        check(
+            "旧库数据保留 (数字 ID 转为整数，补齐的列取默认值)",
+            len(rows) == 2 and rows[0] == (10001, 20001, 5, 0) and owners == [(20001,)],
+            str(rows),
+        )
+
+        # 3. 基线步骤固定为 v1 时的表结构，不随当前模型变化
+        baseline = os.path.join(tmp, "baseline.db")
+        engine = create_engine(f"sqlite:///{baseline}")
+        with engine.connect() as conn:
+            migrations.MIGRATIONS[0].apply(conn)
+            conn.commit()
+        engine.dispose()
+        tables = sorted(k for k in schema(baseline) if k.startswith("table "))
+        check(
+            "基线步骤只创建 v1 的表",
+            tables
+            == [
+                "table love_daily_ref",
+                "table message_owner_index",
+                "table report_request_log",
+                "table user_cooldown",
+            ],
+            str(tables),
+        )
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
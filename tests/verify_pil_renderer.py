@@ -0,0 +1,208 @@
+import base64
+import io
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+from PIL import Image, ImageChops, ImageStat
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the renderer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from src.visual.pil_renderer import (  # noqa: E402
+    BUNDLED_FONT,
+    PILLOW_DEFAULTS,
+    PillowCardRenderer,
+    parse_color,
+    plain_text,
+)
+
+GOLDEN_DIR = os.path.join(plugin_dir, "tests", "data", "golden")
+THEMES_DIR = os.path.join(plugin_dir, "assets", "themes")
+# 允许的平均像素差 (0~255)，吸收不同 FreeType 版本的抗锯齿差异
+TOLERANCE = 2.0
+BENCH_ROUNDS = 20
+
+THEME_CONFIG = {
+    "font_color": "#ffffff",
+    "text_box": {"bg_color": "rgba(0, 0, 0, 0.7)"},
+    "colors": {"simp": "#FF69B4", "vibe": "#00CED1", "ick": "#800080"},
+}
+
+
+def make_avatar(color: tuple[int, int, int]) -> str:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buf, "PNG")
+    return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}"
+
+
+BASIC_CARD = {
+    "user_name": "Tester",
+    "user_id": "123456",
+    "avatar_url": make_avatar((200, 100, 50)),
+    "title": "Pure Love Warrior",
+    "score": 88,
+    "metrics": {
+        "纯爱值": "72%",
+        "存在感": "45%",
+        "败犬值": "12%",
+        "白月光指数": "60%",
+        "营业频率": "42/day",
+        "小作文功率": "18/msg",
+    },
+    "logic_insights": ["<b>High output</b>: message density far above average."],
+    "comment": "Every message looks like waiting for a reply that never comes.",
+    "equation": "J<sub>love</sub> = 88",
+    "deep_dive": None,
+    "generated_time": "2026-01-18 16:00:00",
+}
+
+EVIDENCE_CARD = {
+    **BASIC_CARD,
+    "deep_dive": {
+        "keywords": ["late-night", "double-text"],
+        "content": "Sends a follow-up within 30 seconds every time.",
+        "evidence": [
+            {
+                "title": "The 3 AM Essay",
+                "reason": "Long monologue with no reply.",
+                "dialogue": [
+                    {
+                        "role": "Target",
+                        "user_id": "123456",
+                        "avatar_url": make_avatar((200, 100, 50)),
+                        "content": "are you still awake? I wrote something long "
+                        "about yesterday and wanted to share it with you",
+                    },
+                    {
+                        "role": "Friend",
+                        "user_id": "654321",
+                        "avatar_url": "data:image/svg+xml;base64,PHN2Zy8+",
+                        "content": "zzz",
+                    },
+                ],
+            }
+        ],
+    },
+}
+
+
+def draw(data: dict) -> Image.Image:
+    # 只使用随插件分发的字体子集，保证各环境下的基准图一致且中文正常显示
+    renderer = PillowCardRenderer(plugin_dir, THEMES_DIR, font_candidates=())
+    return renderer.draw_card(
+        data, THEME_CONFIG, dict(PILLOW_DEFAULTS), font_path=BUNDLED_FONT
+    )
+
+
+def compare_golden(name: str, image: Image.Image, update: bool) -> bool:
+    path = os.path.join(GOLDEN_DIR, f"{name}.png")
+    if update or not os.path.exists(path):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        image.save(path)
+        print(f"UPDATED: {path}")
+        return True
+
+    golden = Image.open(path).convert("RGB")
+    if golden.size != image.size:
+        print(f"FAIL: {name} 尺寸不一致 {image.size} != {golden.size}")
+        return False
+    diff = ImageChops.difference(golden, image)
+    mean = sum(ImageStat.Stat(diff).mean) / 3
+    if mean > TOLERANCE:
+        out = os.path.join(GOLDEN_DIR, f"{name}.actual.png")
+        image.save(out)
+        print(f"FAIL: {name} 平均像素差 {mean:.2f} > {TOLERANCE}，实际输出: {out}")
+        return False
+    print(f"PASS: {name} 与基准图一致 (平均像素差 {mean:.2f})")
+    return True
+
+
+def test_helpers() -> bool:
+    cases = [
+        (parse_color("rgba(0, 0, 0, 0.7)"), (0, 0, 0, 178)),
+        (parse_color("#FF69B4"), (255, 105, 180, 255)),
+        (parse_color("not-a-color", "#ffffff"), (255, 255, 255, 255)),
+        (
+            plain_text("<b>粗体</b> **强调** &amp; J<sub>love</sub>"),
+            "粗体 强调 & J_love",
+        ),
+    ]
+    ok = True
+    for actual, expected in cases:
+        if actual != expected:
+            print(f"FAIL: 期望 {expected!r}，实际 {actual!r}")
+            ok = False
+    if ok:
+        print("PASS: 颜色解析与文本清洗")
+    return ok
+
+
+def test_font_resolution() -> bool:
+    """无系统中文字体时退回内置子集；全部缺失时记录警告"""
+    bundled = PillowCardRenderer(
+        plugin_dir, THEMES_DIR, font_candidates=(BUNDLED_FONT,)
+    )
+    missing = PillowCardRenderer(plugin_dir, THEMES_DIR, font_candidates=())
+    mock_astrbot.api.logger.warning.reset_mock()
+    ok = (
+        os.path.exists(BUNDLED_FONT)
+        and bundled._resolve_font("galgame_lite", None) == BUNDLED_FONT
+        and missing._resolve_font("galgame_lite", None) is None
+        and mock_astrbot.api.logger.warning.call_count == 1
+    )
+    print(f"{'PASS' if ok else 'FAIL'}: 内置中文字体兜底与缺失告警")
+    return ok
+
+
+def test_right_aligned_bubbles() -> bool:
+    """Target 的气泡靠右：右侧头像区域应出现头像颜色"""
+    image = draw(EVIDENCE_CARD)
+    width = image.size[0]
+    found = any(
+        image.getpixel((x, y)) == (200, 100, 50)
+        for y in range(image.size[1] // 2, image.size[1])
+        for x in range(width - 100, width - 40, 4)
+    )
+    print(f"{'PASS' if found else 'FAIL'}: Target 发言显示在右侧")
+    return found
+
+
+def bench() -> None:
+    timings = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        renderer = PillowCardRenderer(out_dir, THEMES_DIR)
+        for _ in range(BENCH_ROUNDS):
+            start = time.perf_counter()
+            renderer.render(EVIDENCE_CARD, "galgame_lite", THEME_CONFIG)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        f"BENCH: 渲染 + JPEG 编码 中位数 {timings[len(timings) // 2] * 1000:.1f} ms, "
+        f"最慢 {timings[-1] * 1000:.1f} ms ({BENCH_ROUNDS} 次)"
+    )
+
+
+def main() -> int:
+    update = "--update" in sys.argv
+    results = [
+        test_helpers(),
+        compare_golden("basic_card", draw(BASIC_CARD), update),
+        compare_golden("evidence_card", draw(EVIDENCE_CARD), update),
+        test_font_resolution(),
+        test_right_aligned_bubbles(),
+    ]
+    bench()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, time, timedelta
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the handlers
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+sys.modules["astrbot.api.event"] = mock_astrbot.api.event
+
+from src.analysis.calculator import LoveCalculator  # noqa: E402
+from src.analysis.classifier import ArchetypeClassifier  # noqa: E402
+from src.handlers.precompute_scheduler import PrecomputeScheduler  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.hot_tier import DailyHotTier  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+from src.persistence.report_cache import ReportCache  # noqa: E402
+
+GROUP_ID = "10001"
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+# 昨日请求者: user_id -> (请求次数, 最后请求时间)
+REQUESTS = {
+    "1": (5, time(14, 20)),
+    "2": (3, time(14, 45)),
+    "3": (2, time(14, 5)),
+    "4": (1, time(9, 30)),
+}
+# 今日发言数 (用户 3 今天尚未发言)
+MESSAGES = {"1": 12, "2": 8, "4": 5}
+
+results = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}: {name}" + (f" ({detail})" if detail else ""))
+
+
+def seed_requests(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO report_request_log (date, group_id, user_id, nickname, "
+        "request_count, last_request_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                YESTERDAY.isoformat(),
+                int(GROUP_ID),
+                int(uid),
+                f"用户{uid}",
+                count,
+                datetime.combine(YESTERDAY, at).timestamp(),
+            )
+            for uid, (count, at) in REQUESTS.items()
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def verify_default_window() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "precompute.db")
+        db = DBManager(path)
+        await db.init_db()
+        seed_requests(path)
+        repo = LoveRepo(db, DailyHotTier(db, interval=3600))
+        await repo.hot.start()
+
+        config = {}  # 全部使用默认配置
+        calculator = LoveCalculator()
+        cache = ReportCache(tolerance=config.get("precompute_score_tolerance", 5))
+
+        async def build_report(group_id, user_id, nickname, group_ref) -> bool:
+            # 与 main._precompute_report 相同的判定与缓存写入 (生成卡片替换为占位文件)
+            daily, _ = await repo.get_today_and_yesterday(group_id, user_id)
+            if not daily or daily.msg_sent < config.get("min_msg_threshold", 3):
+                return False
+            scores = calculator.calculate_scores(daily)
+            archetype_key, _ = ArchetypeClassifier.classify(scores)
+            if cache.get(group_id, user_id, nickname, scores, archetype_key):
+                return False
+            image_path = os.path.join(tmp, f"{user_id}.png")
+            open(image_path, "wb").close()
+            cache.put(group_id, user_id, nickname, scores, archetype_key, image_path)
+            return True
+
+        scheduler = PrecomputeScheduler(repo, config, build_report)
+        await scheduler.load_request_history()
+
+        # 1. 默认窗口落在观测到的请求高峰 (14 点) 之前最空闲的一小时
+        start, end = scheduler.window()
+        check(
+            "默认窗口位于请求高峰前",
+            (start, end) == (time(13, 0), time(14, 0)),
+            f"{start:%H:%M}-{end:%H:%M}",
+        )
+        load = scheduler.hourly_load()
+        check(
+            "每条请求记录只计入最后请求时刻的一次请求 (昨日权重减半)",
+            load[14] == 1.5 and load[9] == 0.5 and sum(load) == 2.0,
+            str({h: c for h, c in enumerate(load) if c}),
+        )
+
+        # 2. 今日发言写入后，窗口外不运行，窗口内生成缓存
+        for uid, count in MESSAGES.items():
+            for _ in range(count):
+                await repo.update_msg_stats(GROUP_ID, uid, text_len=10)
+
+        ran = await scheduler.tick(datetime.combine(TODAY, time(4, 30)))
+        check("窗口外不运行", not ran and len(cache) == 0)
+
+        ran = await scheduler.tick(datetime.combine(TODAY, time(13, 30)))
+        check(
+            "默认配置在窗口内生成缓存条目",
+            ran and len(cache) == 3 and scheduler.stats["generated"] == 3,
+            f"候选 {scheduler.stats['candidates']}，缓存 {len(cache)} 张",
+        )
+        check("今日未发言的用户被跳过", scheduler.stats["skipped"] == 1)
+        hits = 0
+        for uid in MESSAGES:
+            daily, _ = await repo.get_today_and_yesterday(GROUP_ID, uid)
+            scores = calculator.calculate_scores(daily)
+            key, _ = ArchetypeClassifier.classify(scores)
+            hits += cache.get(GROUP_ID, uid, f"用户{uid}", scores, key) is not None
+        check("高峰期请求命中预计算结果", hits == len(MESSAGES))
+
+        ran = await scheduler.tick(datetime.combine(TODAY, time(13, 45)))
+        check("每天只运行一次", not ran)
+
+        # 3. 新的请求记录改变高峰时段
+        for _ in range(20):
+            scheduler.observe_request(datetime.combine(TODAY, time(21, 10)).timestamp())
+        start, end = scheduler.window()
+        check(
+            "窗口跟随请求高峰",
+            (start, end) == (time(20, 0), time(21, 0)),
+            f"{start:%H:%M}-{end:%H:%M}",
+        )
+
+        # 4. 避开高峰前的次高峰，选最空闲的一小时
+        for _ in range(3):
+            scheduler.observe_request(datetime.combine(TODAY, time(20, 30)).timestamp())
+        start, end = scheduler.window()
+        check(
+            "窗口避开高峰前的繁忙时段",
+            (start, end) == (time(19, 0), time(20, 0)),
+            f"{start:%H:%M}-{end:%H:%M}",
+        )
+
+        # 5. 旧的请求模式随天数衰减，超出保留天数的记录被丢弃
+        for _ in range(30):
+            old = datetime.combine(TODAY - timedelta(days=3), time(8, 0))
+            scheduler.observe_request(old.timestamp())
+        expired = datetime.combine(TODAY - timedelta(days=10), time(8, 0))
+        scheduler.observe_request(expired.timestamp())
+        scheduler.observe_request(datetime.combine(TODAY, time(21, 20)).timestamp())
+        check(
+            "旧请求按天衰减且统计有界",
+            scheduler.peak_hour() == 21
+            and scheduler.hourly_load()[8] == 30 * 0.5**3
+            and expired.date() not in scheduler._requests
+            and len(scheduler._requests) <= PrecomputeScheduler.HISTORY_DAYS,
+            f"{len(scheduler._requests)} 天",
+        )
+
+        # 6. 显式配置的窗口仍然生效
+        config["precompute_window"] = "23:30-01:00"
+        check(
+            "显式窗口支持跨零点",
+            scheduler._in_window(datetime.combine(TODAY, time(0, 30)))
+            and not scheduler._in_window(datetime.combine(TODAY, time(13, 30))),
+        )
+
+        await repo.hot.stop()
+        await db.close()
+
+
+async def verify_fallback_window() -> None:
+    scheduler = PrecomputeScheduler(MagicMock(), {}, MagicMock())
+    start, end = scheduler.window()
+    check(
+        "无请求记录时使用默认高峰",
+        end.hour == PrecomputeScheduler.FALLBACK_PEAK_HOUR
+        and (end.hour - start.hour) % 24 == 1,
+        f"{start:%H:%M}-{end:%H:%M}",
+    )
+
+
+def main() -> int:
+    asyncio.run(verify_default_window())
+    asyncio.run(verify_fallback_window())
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import asyncio
+import inspect
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+# Setup Paths
+plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, plugin_dir)
+
+# Mock astrbot package before importing the persistence layer
+mock_astrbot = MagicMock()
+sys.modules["astrbot"] = mock_astrbot
+sys.modules["astrbot.api"] = mock_astrbot.api
+
+from sqlalchemy import event  # noqa: E402
+
+from src.models.dto import MessageOwner  # noqa: E402
+from src.persistence.database import DBManager  # noqa: E402
+from src.persistence.repo import LoveRepo  # noqa: E402
+
+GROUP_ID = "10001"
+USER_ID = "20001"
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+
+# 不直接执行 SQL 的方法
+INDIRECT: set[str] = set()
+
+# 每个仓库方法的一次代表性调用
+CALLS = {
+    "update_msg_stats": lambda r: r.update_msg_stats(GROUP_ID, USER_ID, 12, 1),
+    "update_interaction_sent": lambda r: r.update_interaction_sent(
+        GROUP_ID, USER_ID, poke=1, reply=1
+    ),
+    "update_interaction_received": lambda r: r.update_interaction_received(
+        GROUP_ID, USER_ID, reaction=1
+    ),
+    "update_behavior_stats": lambda r: r.update_behavior_stats(
+        GROUP_ID, USER_ID, topic_inc=1
+    ),
+    "save_message_index": lambda r: r.save_message_index("99", GROUP_ID, USER_ID),
+    "get_message_owner": lambda r: r.get_message_owner("99"),
+    "get_today_data": lambda r: r.get_today_data(GROUP_ID, USER_ID),
+    "get_data_by_date": lambda r: r.get_data_by_date(GROUP_ID, USER_ID, YESTERDAY),
+    "get_group_daily_refs": lambda r: r.get_group_daily_refs(
+        GROUP_ID, TODAY, min_msg=3, limit=10
+    ),
+    "get_user_daily_refs": lambda r: r.get_user_daily_refs(
+        GROUP_ID, USER_ID, TODAY - timedelta(days=7), TODAY
+    ),
+    "get_user_days": lambda r: r.get_user_days(
+        GROUP_ID, USER_ID, TODAY - timedelta(days=10), TODAY
+    ),
+    "get_today_and_yesterday": lambda r: r.get_today_and_yesterday(GROUP_ID, USER_ID),
+    "apply_honor_bonus": lambda r: r.apply_honor_bonus(
+        GROUP_ID,
+        {
+            "talkative": {"user_id": USER_ID},
+            "performer": [{"user_id": "20002"}],
+            "emotion": [{"user_id": "20003"}],
+        },
+    ),
+    "check_and_update_cooldown": lambda r: r.check_and_update_cooldown(
+        USER_ID, GROUP_ID, 60
+    ),
+    "record_report_request": lambda r: r.record_report_request(
+        GROUP_ID, USER_ID, "测试"
+    ),
+    "get_report_requests": lambda r: r.get_report_requests(TODAY),
+    "batch_backfill": lambda r: r.batch_backfill(
+        GROUP_ID,
+        [MessageOwner("100", USER_ID, GROUP_ID, 1.0)],
+        {USER_ID: {"msg": 1, "text": 5, "image": 0}},
+        {USER_ID: {"repeat": 1, "topic": 0}},
+        {USER_ID: {"reply": 1}},
+        {"20002": {"reply": 1}},
+    ),
+    "filter_existing_message_ids": lambda r: r.filter_existing_message_ids(
+        ["99", "100", "101"]
+    ),
+}
+
+
+def seed(path: str) -> None:
+    """写入若干群、若干天的数据，让 ANALYZE 统计信息接近真实分布"""
+    conn = sqlite3.connect(path)
+    rows = [
+        ((TODAY - timedelta(days=d)).isoformat(), g, u, 5, 50)
+        for d in range(14)
+        for g in range(10000, 10010)
+        for u in range(20000, 20050)
+    ]
+    zeros = ", ".join(["0"] * 10)
+    conn.executemany(
+        "INSERT INTO love_daily_ref (date, group_id, user_id, msg_sent, "
+        "text_len_total, reply_sent, reply_received, poke_sent, poke_received, "
+        "reaction_sent, reaction_received, recall_count, repeat_count, image_sent, "
+        f"topic_count, updated_at) VALUES (?, ?, ?, ?, ?, {zeros}, 0)",
+        rows,
+    )
+    conn.executemany(
+        "INSERT INTO message_owner_index VALUES (?, ?, ?, ?)",
+        [
+            (m, 20000 + m % 50, 10000 + m % 10, float(m))
+            for m in range(10**6, 10**6 + 5000)
+        ],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def query_plan(conn: sqlite3.Connection, statement: str, params) -> list[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", params)]
+
+
+async def create(path: str) -> None:
+    db = DBManager(path)
+    await db.init_db()
+    await db.close()
+
+
+async def collect(path: str) -> list[tuple[str, str, tuple]]:
+    """执行全部仓库方法，返回 [(方法名, SQL, 参数)]"""
+    db = DBManager(path)
+    await db.init_db()
+    repo = LoveRepo(db)
+
+    current = {"name": ""}
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            params = parameters[0] if executemany else parameters
+            captured.append((current["name"], statement, tuple(params or ())))
+
+    for engine in (db.engine, db.read_engine):
+        event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+
+    for name, call in CALLS.items():
+        current["name"] = name
+        await call(repo)
+    # 计数写入先进入内存热层，落盘时才生成 SQL；查询更早的日期才会访问数据库
+    current["name"] = "hot.checkpoint"
+    await repo.hot.checkpoint()
+    current["name"] = "get_data_by_date (历史)"
+    await repo.get_data_by_date(GROUP_ID, USER_ID, TODAY - timedelta(days=5))
+    current["name"] = "get_group_daily_refs (历史)"
+    await repo.get_group_daily_refs(GROUP_ID, TODAY - timedelta(days=5), min_msg=3)
+    await db.close()
+    return captured
+
+
+def main() -> int:
+    ok = True
+
+    public = {
+        name
+        for name, func in inspect.getmembers(LoveRepo, inspect.iscoroutinefunction)
+        if not name.startswith("_")
+    }
+    missing = public - set(CALLS) - INDIRECT
+    if missing:
+        print(f"FAIL: 以下仓库方法没有加入查询计划检查: {', '.join(sorted(missing))}")
+        ok = False
+    else:
+        print(f"PASS: 覆盖全部 {len(public)} 个仓库方法")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.db")
+        asyncio.run(create(path))
+        seed(path)
+        statements = asyncio.run(collect(path))
+
+        conn = sqlite3.connect(path)
+        seen = set()
+        for name, statement, params in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = query_plan(conn, statement, params)
+            scans = [step for step in plan if step.startswith("SCAN")]
+            if scans:
+                ok = False
+                print(f"FAIL: {name} 出现全表扫描: {'; '.join(plan)}")
+                print(f"      {' '.join(statement.split())}")
+            else:
+                print(f"PASS: {name}: {'; '.join(plan)}")
+        conn.close()
+
+    print(f"\n共检查 {len(seen)} 条不同的 SQL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -84,7 +84,7 @@ async def test_repeat_fix():
     for msg in history:
         msg["time"] = now_ts - (2000 - msg.get("time", 0))  # Ensure it's today
 
-    stats = await handler.backfill_from_history("123456", history)
+    stats, _ = await handler.backfill_from_history("123456", history)
     print(f"Backfill stats: {stats}")
 
     if stats.get("repeat_count") == 1: